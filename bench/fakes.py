@@ -0,0 +1,294 @@
+"""
+Local stand-ins for the external services used by spotify-worker
+------------------------------------------------------------------
+Each fake is a threaded HTTP server on 127.0.0.1 with configurable latency and error rate:
+  - FakeSpotify: Web API subset (me, search, playlist create/add/list/items)
+  - FakeGoogle:  Custom Search JSON API (/customsearch/v1)
+  - FakeLLM:     OpenAI-compatible chat completions (plain and stream=True), /v1/models
+Responses are deterministic functions of the request, so runs are repeatable.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+
+class Behavior:
+	"""Latency (mean +/- jitter, in seconds) and the fraction of requests that fail."""
+	def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=500, retry_after=0):
+		self.latency = latency
+		self.jitter = jitter
+		self.error_rate = error_rate
+		self.error_status = error_status
+		self.retry_after = retry_after
+		self._random = random.Random(42)
+		self._lock = threading.Lock()
+
+	def delay(self):
+		with self._lock:
+			offset = self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+		return max(0.0, self.latency + offset)
+
+	def should_fail(self):
+		if not self.error_rate:
+			return False
+		with self._lock:
+			return self._random.random() < self.error_rate
+
+
+class _FakeServer:
+	"""Base class: runs a ThreadingHTTPServer in a daemon thread and counts requests."""
+	handler_class = None
+
+	def __init__(self, behavior=None):
+		self.behavior = behavior or Behavior()
+		self.requests = 0
+		self.errors = 0
+		self._count_lock = threading.Lock()
+		fake = self
+
+		class Handler(self.handler_class):
+			server_fake = fake
+		self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+		self.httpd.daemon_threads = True
+		self.thread = threading.Thread(target=self.httpd.serve_forever, name=type(self).__name__, daemon=True)
+
+	@property
+	def url(self):
+		host, port = self.httpd.server_address[:2]
+		return f"http://{host}:{port}"
+
+	def start(self):
+		self.thread.start()
+		return self
+
+	def stop(self):
+		self.httpd.shutdown()
+		self.httpd.server_close()
+
+	def __enter__(self):
+		return self.start()
+
+	def __exit__(self, *exc):
+		self.stop()
+
+	def count(self, failed):
+		with self._count_lock:
+			self.requests += 1
+			if failed:
+				self.errors += 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+	server_fake = None
+	protocol_version = 'HTTP/1.1'
+
+	def log_message(self, format, *args):
+		pass
+
+	def _body(self):
+		length = int(self.headers.get('Content-Length') or 0)
+		raw = self.rfile.read(length) if length else b''
+		try:
+			return json.loads(raw) if raw else {}
+		except ValueError:
+			return {}
+
+	def _send_json(self, status, payload, headers=None):
+		body = json.dumps(payload).encode('utf-8')
+		self.send_response(status)
+		self.send_header('Content-Type', 'application/json')
+		self.send_header('Content-Length', str(len(body)))
+		for key, value in (headers or {}).items():
+			self.send_header(key, value)
+		self.end_headers()
+		self.wfile.write(body)
+
+	def _simulate(self):
+		"""Apply latency; returns True if an error response was sent instead of a real one."""
+		behavior = self.server_fake.behavior
+		time.sleep(behavior.delay())
+		failed = behavior.should_fail()
+		self.server_fake.count(failed)
+		if failed:
+			headers = {'Retry-After': str(behavior.retry_after)} if behavior.error_status == 429 else None
+			self._send_json(behavior.error_status, {'error': {'status': behavior.error_status, 'message': 'injected failure'}}, headers)
+		return failed
+
+	def do_GET(self):
+		if not self._simulate():
+			self.route('GET', urlparse(self.path), {})
+
+	def do_POST(self):
+		body = self._body()
+		if not self._simulate():
+			self.route('POST', urlparse(self.path), body)
+
+	def route(self, method, url, body):
+		self._send_json(404, {'error': 'not found'})
+
+
+def _digest(text, length=10):
+	return hashlib.sha1(text.encode('utf-8')).hexdigest()[:length]
+
+
+class _SpotifyHandler(_Handler):
+	def route(self, method, url, body):
+		fake = self.server_fake
+		path = url.path
+		params = {k: v[0] for k, v in parse_qs(url.query).items()}
+		if method == 'GET' and path.rstrip('/') == '/v1/me':
+			return self._send_json(200, {'id': 'bench-user', 'display_name': 'Bench User'})
+		if method == 'GET' and path == '/v1/search':
+			query = params.get('q', '')
+			limit = int(params.get('limit', 10))
+			return self._send_json(200, {'tracks': {'items': [fake.track(query, i) for i in range(limit)], 'next': None}})
+		if method == 'GET' and path.rstrip('/') == '/v1/audio-features':
+			ids = [tid for tid in params.get('ids', '').split(',') if tid]
+			return self._send_json(200, {'audio_features': [fake.audio_features(tid) for tid in ids]})
+		match = re.fullmatch(r'/v1/users/([^/]+)/playlists', path)
+		if match and method == 'POST':
+			playlist_id = 'pl' + _digest(body.get('name', '') + str(time.time()), 20)
+			fake.playlists[playlist_id] = {'id': playlist_id, 'name': body.get('name', ''), 'snapshot_id': 's0', 'items': []}
+			return self._send_json(201, {'id': playlist_id, 'name': body.get('name', ''), 'snapshot_id': 's0'})
+		if match or path == '/v1/me/playlists':
+			items = [
+				{'id': pl['id'], 'name': pl['name'], 'snapshot_id': pl['snapshot_id'], 'owner': {'id': 'bench-user'}, 'tracks': {'total': len(pl['items'])}}
+				for pl in fake.playlists.values()
+			]
+			return self._send_json(200, {'items': items, 'next': None, 'total': len(items)})
+		match = re.fullmatch(r'/v1/playlists/([^/]+)/(tracks|items)', path)
+		if match:
+			playlist = fake.playlists.setdefault(match.group(1), {'id': match.group(1), 'name': '', 'snapshot_id': 's0', 'items': []})
+			if method == 'POST':
+				uris = body if isinstance(body, list) else body.get('uris', [])
+				playlist['items'].extend(uri.split(':')[-1] for uri in uris)
+				playlist['snapshot_id'] = 's' + str(len(playlist['items']))
+				return self._send_json(201, {'snapshot_id': playlist['snapshot_id']})
+			items = [{'track': {'id': tid, 'name': tid, 'artists': [{'name': 'Bench'}]}} for tid in playlist['items']]
+			return self._send_json(200, {'items': items, 'next': None})
+		return self._send_json(404, {'error': {'status': 404, 'message': f'no fake for {method} {path}'}})
+
+
+class FakeSpotify(_FakeServer):
+	handler_class = _SpotifyHandler
+
+	def __init__(self, behavior=None):
+		super().__init__(behavior)
+		self.playlists = {}
+
+	@staticmethod
+	def track(query, index):
+		track_id = _digest(f"{query}#{index}", 22)
+		words = query.split()
+		return {
+			'id': track_id,
+			'uri': f"spotify:track:{track_id}",
+			'name': ' '.join(words[:-1]) or query,
+			'artists': [{'name': words[-1] if words else 'Unknown'}],
+			'album': {'name': 'Bench Album'},
+			'popularity': 100 - index * 7 % 100,
+			'duration_ms': 200000,
+		}
+
+
+	@staticmethod
+	def audio_features(track_id):
+		# Deterministic per id, spread over 0..1 (tempo 60..180 BPM)
+		values = [int(_digest(f"{track_id}/{field}", 4), 16) / 0xffff for field in range(6)]
+		return {
+			'id': track_id, 'energy': values[0], 'valence': values[1], 'danceability': values[2],
+			'acousticness': values[3], 'instrumentalness': values[4], 'tempo': 60 + 120 * values[5],
+			'speechiness': 0.05, 'loudness': -8.0, 'mode': 1,
+		}
+
+
+class _GoogleHandler(_Handler):
+	def route(self, method, url, body):
+		if url.path != '/customsearch/v1':
+			return self._send_json(404, {'error': 'not found'})
+		params = {k: v[0] for k, v in parse_qs(url.query).items()}
+		query = params.get('q', '')
+		num = int(params.get('num', 5))
+		items = [
+			{'title': f"{query} result {i}", 'snippet': f"Music that fits {query}: artist {_digest(query + str(i), 6)}.", 'link': f"https://example.com/{i}"}
+			for i in range(num)
+		]
+		return self._send_json(200, {'items': items})
+
+
+class FakeGoogle(_FakeServer):
+	handler_class = _GoogleHandler
+
+	@property
+	def search_url(self):
+		return self.url + '/customsearch/v1'
+
+
+class _LLMHandler(_Handler):
+	def route(self, method, url, body):
+		fake = self.server_fake
+		if method == 'GET' and url.path.rstrip('/') == '/v1/models':
+			return self._send_json(200, {'object': 'list', 'data': [{'id': 'bench-model', 'object': 'model'}]})
+		if method != 'POST' or url.path != '/v1/chat/completions':
+			return self._send_json(404, {'error': 'not found'})
+		prompt = (body.get('messages') or [{}])[-1].get('content', '')
+		content = fake.reply(prompt)
+		if body.get('stream'):
+			return self._stream(body.get('model', 'bench-model'), content)
+		return self._send_json(200, {
+			'id': 'chatcmpl-bench',
+			'object': 'chat.completion',
+			'created': int(time.time()),
+			'model': body.get('model', 'bench-model'),
+			'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+			'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': len(content) // 4, 'total_tokens': (len(prompt) + len(content)) // 4},
+		})
+
+	def _stream(self, model, content):
+		self.send_response(200)
+		self.send_header('Content-Type', 'text/event-stream')
+		self.send_header('Connection', 'close')
+		self.end_headers()
+		for token in re.findall(r'\S+\s*', content):
+			chunk = {
+				'id': 'chatcmpl-bench',
+				'object': 'chat.completion.chunk',
+				'created': int(time.time()),
+				'model': model,
+				'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}],
+			}
+			self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+			self.wfile.flush()
+			time.sleep(self.server_fake.token_delay)
+		self.wfile.write(b"data: [DONE]\n\n")
+		self.wfile.flush()
+		self.close_connection = True
+
+
+class FakeLLM(_FakeServer):
+	handler_class = _LLMHandler
+
+	def __init__(self, behavior=None, token_delay=0.0, song_count=10):
+		super().__init__(behavior)
+		self.token_delay = token_delay
+		self.song_count = song_count
+
+	@property
+	def base_url(self):
+		return self.url + '/v1'
+
+	def reply(self, prompt):
+		"""JSON for structured prompts, a query per line for song prompts, a short name otherwise."""
+		seed = _digest(prompt, 8)
+		queries = [f"Bench Song {seed}{i} Artist{i}" for i in range(self.song_count)]
+		if '"song_queries"' in prompt:
+			return json.dumps({'playlist_name': f"Bench Mood {seed}", 'song_queries': queries})
+		if 'song search queries' in prompt:
+			return '\n'.join(queries)
+		return f"Bench Mood {seed}"
@@ -0,0 +1,257 @@
+"""
+Offline benchmark suite for spotify-worker
+------------------------------------------
+Starts local fakes for Spotify, Google CSE and an OpenAI-compatible LLM (bench/fakes.py),
+points the real code at them through a throwaway config, and drives llm_complete,
+SpotifyAPI.search_tracks and create_moody_playlist (threads, and the asyncio engine as
+moody_async) end to end at several concurrency levels.
+Reports throughput and latency percentiles; compares against a saved baseline to gate regressions.
+
+Run from the repo root (no credentials or network needed):
+	python bench/run_bench.py --concurrency 1,4,16 --ops 40
+	python bench/run_bench.py --save-baseline bench/baseline.json
+	python bench/run_bench.py --baseline bench/baseline.json --tolerance 0.25
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from bench.fakes import Behavior, FakeSpotify, FakeGoogle, FakeLLM  # noqa: E402
+
+SCENARIOS = ['llm_complete', 'spotify_search', 'moody_playlist', 'moody_async']
+
+_SPOTIFY_CONFIG = """[logging]
+level = WARNING
+file = {log_file}
+
+[spotify]
+client_id = bench
+client_secret = bench
+redirect_uri = http://127.0.0.1/callback
+scope = playlist-modify-private
+token_cache = {token_cache}
+max_concurrency = {spotify_concurrency}
+requests_per_second = {spotify_rps}
+max_retries = 3
+
+[AIPlayList]
+playlist_prefix =
+playlist_llm_meta_prompt =
+song_count = {song_count}
+llm_mode = {llm_mode}
+
+[SearchAPI]
+GoogleSearchAPIKey = bench
+GoogleCSEID = bench
+"""
+
+_LLM_CONFIG = """[llm]
+alias = bench
+variant = model
+endpoint = {endpoint}
+api_key = bench
+llm_backend = openai
+default_meta_prompt =
+llm_log = {log_file}
+max_tokens = 512
+llm_log_level = WARNING
+cache_enabled = false
+"""
+
+
+def _percentile(values, pct):
+	ordered = sorted(values)
+	rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+	return ordered[min(rank, len(ordered)) - 1]
+
+
+def _configure(workdir, spotify, google, llm_server, args):
+	"""Write throwaway configs pointing at the fakes and import the project against them."""
+	token_cache = os.path.join(workdir, 'token_cache.json')
+	with open(token_cache, 'w', encoding='utf-8') as f:
+		json.dump({'access_token': 'bench', 'token_type': 'Bearer', 'expires_in': 3600,
+			'expires_at': int(time.time()) + 86400, 'refresh_token': 'bench', 'scope': 'playlist-modify-private'}, f)
+	spotify_config = os.path.join(workdir, 'config.ini')
+	with open(spotify_config, 'w', encoding='utf-8') as f:
+		f.write(_SPOTIFY_CONFIG.format(
+			log_file=os.path.join(workdir, 'worker.log'), token_cache=token_cache,
+			spotify_concurrency=args.spotify_concurrency, spotify_rps=args.spotify_rps,
+			song_count=args.song_count, llm_mode=args.llm_mode))
+	llm_config = os.path.join(workdir, 'llm_config.ini')
+	with open(llm_config, 'w', encoding='utf-8') as f:
+		f.write(_LLM_CONFIG.format(endpoint=llm_server.base_url, log_file=os.path.join(workdir, 'llm_log.txt')))
+	os.environ['SPOTIFY_WORKER_CONFIG'] = spotify_config
+	os.environ['LLMLOCAL_CONFIG'] = llm_config
+
+	from src import db, googleapi
+	db.db_path = os.path.join(workdir, 'spotify_db.json')
+	googleapi.SEARCH_URL = google.search_url
+	from src.api import get_api
+	api = get_api()
+	api.sp.prefix = spotify.url + '/v1/'
+	return api
+
+
+def _scenario_op(name, api, tag):
+	from llmlocal import llm
+	from util.moodyplaylist import create_moody_playlist
+	if name == 'llm_complete':
+		return lambda i: llm.llm_complete([{"role": "user", "content": f"Generate a short, fun, moody playlist name for {tag} {i}"}], use_cache=False)
+	if name == 'spotify_search':
+		return lambda i: api.search_tracks(f"Bench Track {tag} {i} Artist", limit=5, use_cache=False)
+	if name == 'moody_playlist':
+		return lambda i: create_moody_playlist(f"bench mood {tag} {i}", api=api)
+	raise ValueError(f"Unknown scenario: {name}")
+
+
+def _run_level(op, ops, concurrency):
+	def timed(i):
+		start = time.perf_counter()
+		try:
+			op(i)
+			return time.perf_counter() - start, None
+		except Exception as e:
+			return time.perf_counter() - start, e
+
+	start = time.perf_counter()
+	with ThreadPoolExecutor(max_workers=concurrency) as pool:
+		outcomes = list(pool.map(timed, range(ops)))
+	return _summarize(outcomes, time.perf_counter() - start)
+
+
+def _run_level_async(api, ops, concurrency, tag):
+	"""moody_async: `ops` playlist jobs as tasks on one event loop, at most `concurrency` at a time."""
+	import asyncio
+	from util.moodyasync import AsyncEngine
+
+	async def run_all():
+		async with AsyncEngine(api=api) as engine:
+			gate = asyncio.Semaphore(concurrency)
+
+			async def timed(i):
+				async with gate:
+					start = time.perf_counter()
+					try:
+						await engine.create_moody_playlist(f"bench mood {tag} {i}")
+						return time.perf_counter() - start, None
+					except Exception as e:
+						return time.perf_counter() - start, e
+			return await asyncio.gather(*(timed(i) for i in range(ops)))
+
+	start = time.perf_counter()
+	outcomes = asyncio.run(run_all())
+	return _summarize(outcomes, time.perf_counter() - start)
+
+
+def _summarize(outcomes, wall):
+	"""Stats for a list of (elapsed_seconds, error_or_None) outcomes."""
+	latencies = [elapsed for elapsed, _ in outcomes]
+	errors = sum(1 for _, error in outcomes if error is not None)
+	ops = len(outcomes)
+	return {
+		'ops': ops,
+		'errors': errors,
+		'wall_seconds': round(wall, 4),
+		'throughput_ops_s': round(ops / wall, 2) if wall > 0 else 0.0,
+		'p50_ms': round(_percentile(latencies, 50) * 1000, 2),
+		'p95_ms': round(_percentile(latencies, 95) * 1000, 2),
+		'p99_ms': round(_percentile(latencies, 99) * 1000, 2),
+	}
+
+
+def _compare(results, baseline, tolerance):
+	"""Return a list of regressions: throughput below or p95 above baseline by more than tolerance."""
+	regressions = []
+	for scenario, levels in results.items():
+		for level, current in levels.items():
+			reference = baseline.get(scenario, {}).get(level)
+			if not reference:
+				continue
+			if current['throughput_ops_s'] < reference['throughput_ops_s'] * (1 - tolerance):
+				regressions.append(f"{scenario} c={level}: throughput {current['throughput_ops_s']} < baseline {reference['throughput_ops_s']}")
+			if current['p95_ms'] > reference['p95_ms'] * (1 + tolerance):
+				regressions.append(f"{scenario} c={level}: p95 {current['p95_ms']}ms > baseline {reference['p95_ms']}ms")
+	return regressions
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Offline spotify-worker benchmarks against local fake services.")
+	parser.add_argument('--scenarios', default=','.join(SCENARIOS), help="Comma-separated subset of: " + ', '.join(SCENARIOS))
+	parser.add_argument('--concurrency', default='1,4,16', help="Comma-separated concurrency levels")
+	parser.add_argument('--ops', type=int, default=40, help="Operations per scenario and level")
+	parser.add_argument('--latency-ms', type=float, default=20.0, help="Mean latency of the Spotify and Google fakes")
+	parser.add_argument('--jitter-ms', type=float, default=5.0)
+	parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of fake Spotify/Google requests that fail")
+	parser.add_argument('--llm-latency-ms', type=float, default=200.0, help="Time before the fake LLM starts answering")
+	parser.add_argument('--llm-token-ms', type=float, default=2.0, help="Delay between streamed tokens")
+	parser.add_argument('--llm-mode', default='single', choices=['single', 'split', 'stream'])
+	parser.add_argument('--song-count', type=int, default=10)
+	parser.add_argument('--spotify-concurrency', type=int, default=8)
+	parser.add_argument('--spotify-rps', type=float, default=1000.0)
+	parser.add_argument('--output', help="Write results JSON here")
+	parser.add_argument('--baseline', help="Baseline JSON to compare against; exit 1 on regression")
+	parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed relative regression vs baseline")
+	parser.add_argument('--save-baseline', help="Write these results as the new baseline")
+	args = parser.parse_args()
+
+	scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+	levels = [int(c) for c in args.concurrency.split(',') if c.strip()]
+	service = Behavior(args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate)
+	spotify = FakeSpotify(service).start()
+	google = FakeGoogle(Behavior(args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate)).start()
+	llm_server = FakeLLM(Behavior(args.llm_latency_ms / 1000), token_delay=args.llm_token_ms / 1000, song_count=args.song_count).start()
+
+	results = {}
+	with tempfile.TemporaryDirectory(prefix='spotify-worker-bench-') as workdir:
+		api = _configure(workdir, spotify, google, llm_server, args)
+		run_tag = str(int(time.time()))
+		print(f"[bench] fakes: spotify={spotify.url} google={google.url} llm={llm_server.url}")
+		print(f"{'scenario':<16}{'conc':>6}{'ops':>6}{'err':>5}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+		for scenario in scenarios:
+			results[scenario] = {}
+			for level in levels:
+				tag = f"{run_tag}-{scenario}-{level}"
+				# The pipeline narrates every step on stdout; keep the report readable
+				with contextlib.redirect_stdout(io.StringIO()):
+					if scenario == 'moody_async':
+						stats = _run_level_async(api, args.ops, level, tag)
+					else:
+						stats = _run_level(_scenario_op(scenario, api, tag), args.ops, level)
+				results[scenario][str(level)] = stats
+				print(f"{scenario:<16}{level:>6}{stats['ops']:>6}{stats['errors']:>5}{stats['throughput_ops_s']:>10}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+	for fake in (spotify, google, llm_server):
+		fake.stop()
+	print(f"[bench] fake requests: spotify={spotify.requests} google={google.requests} llm={llm_server.requests}")
+
+	report = {'args': vars(args), 'results': results}
+	if args.output:
+		with open(args.output, 'w', encoding='utf-8') as f:
+			json.dump(report, f, indent=2)
+	if args.save_baseline:
+		with open(args.save_baseline, 'w', encoding='utf-8') as f:
+			json.dump(results, f, indent=2)
+		print(f"[bench] baseline saved to {args.save_baseline}")
+	if args.baseline:
+		with open(args.baseline, 'r', encoding='utf-8') as f:
+			regressions = _compare(results, json.load(f), args.tolerance)
+		if regressions:
+			print("[bench] REGRESSIONS:")
+			for line in regressions:
+				print(f"  - {line}")
+			sys.exit(1)
+		print(f"[bench] no regressions beyond {args.tolerance:.0%} of baseline")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,130 @@
+# Private response cache for llm-local
+# Two tiers: an in-memory LRU for the current process and a JSON-file store on disk
+# that survives restarts. Keys are a hash of everything that determines the response.
+
+from collections import OrderedDict
+from contextlib import suppress
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+
+def make_key(model, system_prompt, messages, max_tokens, kwargs):
+	"""Stable hash of the full request (model, system prompt, messages, max_tokens, kwargs)."""
+	payload = {
+		'model': model,
+		'system_prompt': system_prompt,
+		'messages': messages,
+		'max_tokens': max_tokens,
+		'kwargs': kwargs,
+	}
+	blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+	return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+	def __init__(self, cache_dir, memory_entries=256, disk_entries=5000):
+		self.cache_dir = cache_dir
+		self.memory_entries = memory_entries
+		self.disk_entries = disk_entries
+		self._memory = OrderedDict()
+		self._disk = None  # key -> None, oldest first; indexed lazily from the cache dir
+		self._lock = threading.Lock()
+		self.stats = {
+			'memory_hits': 0,
+			'disk_hits': 0,
+			'misses': 0,
+			'memory_evictions': 0,
+			'disk_evictions': 0,
+		}
+
+	def _path(self, key):
+		return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+	def _index_disk(self):
+		if self._disk is not None:
+			return
+		entries = []
+		if os.path.isdir(self.cache_dir):
+			for root, _, files in os.walk(self.cache_dir):
+				for name in files:
+					if name.endswith('.json'):
+						path = os.path.join(root, name)
+						entries.append((os.path.getmtime(path), name[:-5]))
+		self._disk = OrderedDict((key, None) for _, key in sorted(entries))
+
+	def _remember(self, key, value):
+		self._memory[key] = value
+		self._memory.move_to_end(key)
+		while len(self._memory) > self.memory_entries:
+			self._memory.popitem(last=False)
+			self.stats['memory_evictions'] += 1
+
+	def _touch(self, key):
+		# mtime carries disk-tier recency across restarts
+		try:
+			os.utime(self._path(key))
+		except OSError:
+			pass
+
+	def get(self, key, disk=True):
+		"""Cached response or None. disk=False only checks the memory tier (no file I/O, a miss is not counted)."""
+		with self._lock:
+			if key in self._memory:
+				self._memory.move_to_end(key)
+				self.stats['memory_hits'] += 1
+				return self._memory[key]
+			if not disk:
+				return None
+			self._index_disk()
+			if key in self._disk:
+				try:
+					with open(self._path(key), 'r', encoding='utf-8') as f:
+						value = json.load(f)['response']
+				except (OSError, ValueError, KeyError) as e:
+					logging.warning(f"[LLM CACHE] Dropping unreadable entry {key}: {e}")
+					self._disk.pop(key, None)
+				else:
+					self._touch(key)
+					self._disk.move_to_end(key)
+					self._remember(key, value)
+					self.stats['disk_hits'] += 1
+					return value
+			self.stats['misses'] += 1
+			return None
+
+	def set(self, key, value):
+		with self._lock:
+			self._remember(key, value)
+			self._index_disk()
+			path = self._path(key)
+			tmp_path = None
+			try:
+				os.makedirs(os.path.dirname(path), exist_ok=True)
+				# A temp file per writer: processes sharing the cache dir may store the same key at once
+				fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=key + '.', suffix='.tmp')
+				with os.fdopen(fd, 'w', encoding='utf-8') as f:
+					json.dump({'response': value}, f, ensure_ascii=False)
+				os.replace(tmp_path, path)
+			except OSError as e:
+				logging.warning(f"[LLM CACHE] Failed to write {path}: {e}")
+				if tmp_path is not None:
+					with suppress(OSError):
+						os.remove(tmp_path)
+				return
+			self._disk[key] = None
+			self._disk.move_to_end(key)
+			while len(self._disk) > self.disk_entries:
+				old_key, _ = self._disk.popitem(last=False)
+				try:
+					os.remove(self._path(old_key))
+				except OSError:
+					pass
+				self.stats['disk_evictions'] += 1
+
+	def snapshot(self):
+		with self._lock:
+			return dict(self.stats, memory_entries=len(self._memory), disk_entries=len(self._disk or ()))
@@ -6,7 +6,8 @@
 import configparser
 import os
 
-_CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'config.ini')
+# LLMLOCAL_CONFIG points at an alternate config.ini (e.g. benchmarks)
+_CONFIG_PATH = os.environ.get('LLMLOCAL_CONFIG') or os.path.join(os.path.dirname(__file__), 'config.ini')
 _config = configparser.ConfigParser()
 if not os.path.exists(_CONFIG_PATH):
 	raise FileNotFoundError(f"llm-local/config.ini not found. Please copy config.ini.example and fill in the required values.")
@@ -28,3 +29,28 @@ LLM_LOG_PATH = _get('llm', 'llm_log')
 LLM_BACKEND = _get('llm', 'llm_backend')
 LLM_LOG_LEVEL = _get('llm', 'llm_log_level')
 LLM_MAX_TOKENS = int(_get('llm', 'max_tokens'))
+# Longest prompt/response text written to DEBUG log lines and JSONL records (optional; 0 = no limit)
+LLM_LOG_PAYLOAD_CHARS = int(_get('llm', 'log_payload_chars', required=False, fallback='2000'))
+
+def _get_bool(section, key, fallback):
+	return _get(section, key, required=False, fallback=fallback).strip().lower() in ('1', 'true', 'yes', 'on')
+
+# Optional response cache (opt-in; identical requests skip inference)
+LLM_CACHE_ENABLED = _get_bool('llm', 'cache_enabled', 'false')
+LLM_CACHE_DIR = _get('llm', 'cache_dir', required=False, fallback='llmlocal/cache')
+LLM_CACHE_MEMORY_ENTRIES = int(_get('llm', 'cache_memory_entries', required=False, fallback='256'))
+LLM_CACHE_DISK_ENTRIES = int(_get('llm', 'cache_disk_entries', required=False, fallback='5000'))
+
+# Concurrent requests allowed per event loop by the asyncio engine (optional)
+LLM_MAX_CONCURRENCY = int(_get('llm', 'max_concurrency', required=False, fallback='4'))
+
+# Optional endpoint pool: several servers hosting the same model (comma-separated; defaults to `endpoint`)
+LLM_ENDPOINTS = [e.strip() for e in _get('llm', 'endpoints', required=False, fallback='').split(',') if e.strip()]
+LLM_WARMUP = _get_bool('llm', 'warmup', 'true')
+LLM_HEDGE = _get_bool('llm', 'hedge', 'false')
+LLM_HEDGE_MIN_MS = float(_get('llm', 'hedge_min_ms', required=False, fallback='250'))
+LLM_EJECT_AFTER_FAILURES = int(_get('llm', 'eject_after_failures', required=False, fallback='3'))
+LLM_EJECT_SECONDS = float(_get('llm', 'eject_seconds', required=False, fallback='30'))
+
+# Default per-request timeout in seconds (optional)
+LLM_TIMEOUT_SECONDS = float(_get('llm', 'timeout_seconds', required=False, fallback='120'))
@@ -17,17 +17,32 @@
 # - Imports many config values from .config; these must exist in the new project's config.
 # - Uses relative import from .config, which may break if the module is moved or used outside a package.
 # - Assumes logging and time are available (these are standard, but still worth noting).
-import openai
+import asyncio
+import contextvars
 import logging
 import time
 import sys
 import os
-from .config import LLM_ENDPOINT, LLM_API_KEY, LLM_ALIAS, LLM_VARIANT, DEFAULT_META_PROMPT, LLM_LOG_PATH, LLM_BACKEND, LLM_LOG_LEVEL, LLM_MAX_TOKENS
+import threading
+from .config import LLM_ENDPOINT, LLM_API_KEY, LLM_ALIAS, LLM_VARIANT, DEFAULT_META_PROMPT, LLM_LOG_PATH, LLM_BACKEND, LLM_LOG_LEVEL, LLM_MAX_TOKENS, LLM_LOG_PAYLOAD_CHARS
+from .config import LLM_CACHE_ENABLED, LLM_CACHE_DIR, LLM_CACHE_MEMORY_ENTRIES, LLM_CACHE_DISK_ENTRIES
+from .config import LLM_ENDPOINTS, LLM_WARMUP, LLM_HEDGE, LLM_HEDGE_MIN_MS, LLM_EJECT_AFTER_FAILURES, LLM_EJECT_SECONDS, LLM_TIMEOUT_SECONDS
+from .cache import ResponseCache, make_key
+from .txlog import TransactionLog
 
 
 _client = None
+_pool = None  # EndpointPool; _client is its first endpoint's client
+_init_lock = threading.Lock()
+_warmup_future = None
 _model = None
 _meta_prompt = None
+_cache = ResponseCache(LLM_CACHE_DIR, LLM_CACHE_MEMORY_ENTRIES, LLM_CACHE_DISK_ENTRIES)
+# Context-local, so it is per thread and per asyncio task
+_last_call_cached = contextvars.ContextVar('llm_last_call_cached', default=False)
+_LOG_LEVEL = getattr(logging, (LLM_LOG_LEVEL or 'INFO').strip().upper(), logging.INFO)
+# Structured transaction records go next to the human-readable log: llm_log.txt -> llm_log.jsonl
+_txlog = TransactionLog(os.path.splitext(LLM_LOG_PATH or 'llmlocal/llm.log')[0] + '.jsonl')
 
 # Setup logging to both file and console, and ensure log file path is valid
 def _setup_logging():
@@ -45,8 +60,6 @@ def _setup_logging():
 		handlers=log_handlers
 	)
 
-_setup_logging()
-
 def _init_llm():
 	# --- REVIEW: This function assumes FoundryLocalManager and foundry_local are available if LLM_BACKEND is set accordingly.
 	# - If foundry_local is not installed, this will fail unless LLM_BACKEND is set to something else.
@@ -56,29 +69,77 @@ def _init_llm():
 	Initialize the LLM client and model using canonical config values.
 	Only runs once per process. Meta prompt is set to the default from config.
 	"""
-	global _client, _model, _meta_prompt
-	if _client is not None and _model is not None and _meta_prompt is not None:
-		return
-	backend = (LLM_BACKEND or '').strip().lower()
-	alias = LLM_ALIAS or 'phi-3.5-mini'
-	variant = LLM_VARIANT or 'instruct-cuda-gpu'
-	endpoint = LLM_ENDPOINT or 'http://localhost:5273/v1'
-	api_key = LLM_API_KEY or ''
-	meta_prompt = DEFAULT_META_PROMPT or ''
-	if backend == "foundrylocalmanager":
-		try:
-			from foundry_local import FoundryLocalManager
-		except ImportError:
-			raise ImportError("foundry_local package is required for FoundryLocalManager backend.")
-		manager = FoundryLocalManager(alias)
-		_client = openai.OpenAI(base_url=manager.endpoint, api_key=manager.api_key)
-		model_info = manager.get_model_info(alias)
-		_model = model_info.id if model_info else f"{alias}-{variant}"
-		_meta_prompt = meta_prompt
-	else:
-		_client = openai.OpenAI(base_url=endpoint, api_key=api_key)
-		_model = f"{alias}-{variant}"
+	global _client, _pool, _model, _meta_prompt, _warmup_future
+	with _init_lock:
+		if _client is not None and _model is not None and _meta_prompt is not None:
+			return
+		# Logging handlers and the openai package are set up on first use, not at import, so importing stays cheap
+		_setup_logging()
+		from .pool import EndpointPool
+		backend = (LLM_BACKEND or '').strip().lower()
+		alias = LLM_ALIAS or 'phi-3.5-mini'
+		variant = LLM_VARIANT or 'instruct-cuda-gpu'
+		endpoint = LLM_ENDPOINT or 'http://localhost:5273/v1'
+		api_key = LLM_API_KEY or ''
+		meta_prompt = DEFAULT_META_PROMPT or ''
+		if backend == "foundrylocalmanager":
+			try:
+				from foundry_local import FoundryLocalManager
+			except ImportError:
+				raise ImportError("foundry_local package is required for FoundryLocalManager backend.")
+			manager = FoundryLocalManager(alias)
+			endpoints, api_key = [manager.endpoint], manager.api_key
+			model_info = manager.get_model_info(alias)
+			_model = model_info.id if model_info else f"{alias}-{variant}"
+		else:
+			endpoints = LLM_ENDPOINTS or [endpoint]
+			_model = f"{alias}-{variant}"
+		_pool = EndpointPool(
+			endpoints,
+			api_key,
+			hedge=LLM_HEDGE,
+			hedge_min_seconds=LLM_HEDGE_MIN_MS / 1000.0,
+			eject_after=LLM_EJECT_AFTER_FAILURES,
+			eject_seconds=LLM_EJECT_SECONDS,
+			timeout=LLM_TIMEOUT_SECONDS
+		)
+		_client = _pool.endpoints[0].client
 		_meta_prompt = meta_prompt
+		logging.info("[LLM] Endpoint pool: %s (hedge=%s)", ', '.join(ep.url for ep in _pool.endpoints), _pool.hedge)
+		if LLM_WARMUP:
+			_warmup_future = _start_warmup()
+
+def _start_warmup():
+	from concurrent.futures import Future
+	future = Future()
+
+	def run():
+		try:
+			future.set_result(_pool.warmup(_model))
+		except Exception as e:
+			future.set_exception(e)
+	threading.Thread(target=run, name='llm-warmup', daemon=True).start()
+	return future
+
+def warmup():
+	"""
+	Load the model on every configured endpoint (a 1-token completion each) and wait for it;
+	joins the startup warmup if one is already running. Returns {endpoint_url: ok}.
+	Endpoints that fail the warmup start out ejected from routing.
+	"""
+	global _warmup_future
+	_init_llm()
+	with _init_lock:
+		if _warmup_future is None:
+			_warmup_future = _start_warmup()
+	return _warmup_future.result()
+
+def pool_stats():
+	"""
+	Return per-endpoint routing counters (in flight, requests, errors, ejected, latency EWMA) and hedge counts.
+	"""
+	_init_llm()
+	return _pool.stats()
 
 def set_meta_prompt(prompt):
 	"""
@@ -87,7 +148,138 @@ def set_meta_prompt(prompt):
 	global _meta_prompt
 	_meta_prompt = prompt
 
-def llm_complete(messages, system_prompt=None, **kwargs):
+def last_call_cached():
+	"""
+	True if the most recent completion call in this thread (or asyncio task) was served from the cache.
+	"""
+	return _last_call_cached.get()
+
+def cache_stats():
+	"""
+	Return response cache counters (memory/disk hits, misses, evictions, entry counts).
+	"""
+	return _cache.snapshot()
+
+def _clip(text):
+	# Prompts and responses in DEBUG lines and JSONL records are capped at log_payload_chars (0 = no limit)
+	if not text or not LLM_LOG_PAYLOAD_CHARS or len(text) <= LLM_LOG_PAYLOAD_CHARS:
+		return text
+	return f"{text[:LLM_LOG_PAYLOAD_CHARS]}... (+{len(text) - LLM_LOG_PAYLOAD_CHARS} chars)"
+
+def _log_transaction(msgs, kwargs, start_time, status, response=None, error=None, **extra):
+	"""
+	Queue one structured JSONL record for this transaction on the background log writer.
+	Messages and response text are only included at DEBUG (cut to log_payload_chars); at WARNING and above only errors are recorded.
+	"""
+	if status != 'error' and _LOG_LEVEL > logging.INFO:
+		return
+	record = {
+		'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(start_time)),
+		'status': status,
+		'endpoint': LLM_ENDPOINT,
+		'model': _model,
+		'message_count': len(msgs),
+		'payload_chars': sum(len(m.get('content', '')) for m in msgs),
+		'max_tokens': LLM_MAX_TOKENS,
+		'kwargs': kwargs,
+		'elapsed': round(time.time() - start_time, 3),
+		'response_chars': len(response) if response else 0,
+	}
+	record.update(extra)
+	if error is not None:
+		import traceback
+		record['error'] = str(error)
+		record['traceback'] = traceback.format_exc()
+	if _LOG_LEVEL <= logging.DEBUG:
+		record['messages'] = [dict(m, content=_clip(m.get('content', ''))) for m in msgs]
+		record['response'] = _clip(response)
+	_txlog.write(record)
+
+def flush_log():
+	"""
+	Block until all queued LLM transaction records are on disk (also done automatically at exit).
+	"""
+	_txlog.flush()
+
+def _prepare_messages(messages, system_prompt):
+	"""
+	Prepend the per-call system prompt (or the module meta prompt) to a copy of messages.
+	Returns (messages_to_send, system_prompt_used).
+	"""
+	msgs = messages[:]
+	prompt_to_use = system_prompt if system_prompt is not None else _meta_prompt
+	if prompt_to_use:
+		msgs = [{"role": "system", "content": prompt_to_use}] + msgs
+	return msgs, prompt_to_use
+
+def _cache_key(messages, prompt_to_use, use_cache, kwargs):
+	if use_cache is None:
+		use_cache = LLM_CACHE_ENABLED
+	return make_key(_model, prompt_to_use, messages, LLM_MAX_TOKENS, kwargs) if use_cache else None
+
+def _cached_response(cache_key, msgs, kwargs, stream=False):
+	"""
+	Look the request up in the response cache and record whether it was a hit.
+	Returns the cached response text, or None on a miss (or when caching is off for this call).
+	"""
+	return _record_cache_lookup(cache_key, _cache.get(cache_key) if cache_key else None, msgs, kwargs, stream)
+
+async def _cached_response_async(cache_key, msgs, kwargs, stream=False):
+	"""_cached_response for the asyncio paths: the disk tier's file I/O runs in a worker thread."""
+	cached = None
+	if cache_key:
+		cached = _cache.get(cache_key, disk=False)
+		if cached is None:
+			cached = await asyncio.to_thread(_cache.get, cache_key)
+	return _record_cache_lookup(cache_key, cached, msgs, kwargs, stream)
+
+def _record_cache_lookup(cache_key, cached, msgs, kwargs, stream):
+	_last_call_cached.set(False)
+	if cached is None:
+		return None
+	_last_call_cached.set(True)
+	logging.info("[LLM] Cache hit%s: key=%s, response_chars=%d", " (stream)" if stream else "", cache_key[:12], len(cached))
+	extra = {'stream': True} if stream else {}
+	_log_transaction(msgs, kwargs, time.time(), 'cache_hit', response=cached, **extra)
+	return cached
+
+def _release_stream(endpoint, error, completed):
+	"""Return a stream's endpoint lease. A stream the caller closed early (or a cancelled task) says nothing about the endpoint."""
+	if endpoint is None:
+		return
+	if error is None and not completed:
+		_pool.abandon(endpoint)
+	else:
+		_pool.release(endpoint, error=error)
+
+# A timed-out call that had at least this share of its full timeout counts as an outage
+_OUTAGE_TIMEOUT_SHARE = 0.9
+
+def is_outage(error, timeout=None, budget=None):
+	"""
+	True if error says the LLM service is unavailable: connection errors, 5xx responses, and
+	timeouts of requests that had most of their full timeout, the client timeout (timeout_seconds)
+	capped by budget (the caller's stage budget, if any). A timeout that expired because earlier
+	calls had used up the budget says more about the caller than about the server, and 4xx
+	responses are about the request.
+	"""
+	import openai
+	if isinstance(error, openai.APITimeoutError):
+		if timeout is None:
+			return True
+		full = min(LLM_TIMEOUT_SECONDS, budget) if budget else LLM_TIMEOUT_SECONDS
+		return timeout >= _OUTAGE_TIMEOUT_SHARE * full
+	if isinstance(error, openai.APIConnectionError):
+		return True
+	if isinstance(error, openai.APIStatusError):
+		return error.status_code >= 500
+	return False
+
+def _timeout_option(timeout):
+	# Per-request override of the client timeout; kept out of kwargs so it does not change the cache key
+	return {'timeout': timeout} if timeout else {}
+
+def llm_complete(messages, system_prompt=None, use_cache=None, timeout=None, **kwargs):
 	# --- REVIEW: This function assumes a specific OpenAI-compatible API and config structure.
 	# - Uses LLM_LOG_PATH for logging; this must be writable and exist in config.
 	# - Uses LLM_MAX_TOKENS, LLM_LOG_LEVEL, etc. from config; these must be defined.
@@ -102,127 +294,214 @@ def llm_complete(messages, system_prompt=None, **kwargs):
 	Args:
 		messages: List of dicts, e.g. [{"role": "user", "content": "..."}]
 		system_prompt: Optional string to use as the system/meta prompt for this call only.
+		use_cache: True/False to force or bypass the response cache for this call; None follows config (cache_enabled).
+		timeout: Seconds before this request is abandoned (default: timeout_seconds from config); not part of the cache key.
 		kwargs: Additional OpenAI chat params (e.g., temperature)
 	Returns:
 		The LLM's response message (str)
 	"""
 	_init_llm()
-	msgs = messages[:]
-	prompt_to_use = system_prompt if system_prompt is not None else _meta_prompt
-	if prompt_to_use:
-		msgs = [{"role": "system", "content": prompt_to_use}] + msgs
+	msgs, prompt_to_use = _prepare_messages(messages, system_prompt)
 	payload_len = sum(len(m.get('content', '')) for m in msgs)
 	payload_count = len(msgs)
+	# Memoization: identical (model, system prompt, messages, max_tokens, kwargs) returns the stored response
+	cache_key = _cache_key(messages, prompt_to_use, use_cache, kwargs)
+	cached = _cached_response(cache_key, msgs, kwargs)
+	if cached is not None:
+		return cached
 	# Always pass max_tokens from config to the OpenAI API call, do not inject into kwargs
-	# Step-by-step, readable logging for all major steps (all levels), and JSONL payloads at DEBUG
-	log_path = LLM_LOG_PATH or 'llmlocal/llm.log'
-	def log_to_file(msg):
-		try:
-			if log_path:
-				with open(log_path, 'a', encoding='utf-8') as f:
-					f.write(msg + '\n')
-		except Exception as e:
-			logging.error(f"Failed to write LLM log to {log_path}: {e}")
-
-	# 1. Prompt preparation
-	# --- REVIEW: Logging and prompt handling are tightly coupled to config and file system.
-	prep_msg = (
-		f"\n[LLM STEP 1: Prompt Preparation]"
-		f"\nSystem prompt: {prompt_to_use}"
-		f"\nUser prompt: {messages[-1]['content'] if messages else ''}"
-		f"\n---"
-	)
-	logging.debug(prep_msg)
-	log_to_file(prep_msg)
-
-	# 2. Payload construction
-	# --- REVIEW: Assumes LLM_ENDPOINT, _model, and LLM_MAX_TOKENS are always set and valid.
-	payload_msg = (
-		f"[LLM STEP 2: Payload Construction]"
-		f"\nEndpoint: {LLM_ENDPOINT}"
-		f"\nModel: {_model}"
-		f"\nMessage count: {payload_count}"
-		f"\nPayload chars: {payload_len}"
-		f"\nmax_tokens: {LLM_MAX_TOKENS}"
-		f"\nPayload kwargs: {kwargs}"
-		f"\n---"
-	)
-	logging.debug(payload_msg)
-	log_to_file(payload_msg)
-
-	# 3. Sending request
-	# --- REVIEW: Assumes _client is a valid OpenAI client and will not fail on .chat.completions.create.
-	send_msg = (
-		f"[LLM STEP 3: Sending Request]"
-		f"\nSending request to LLM..."
-		f"\n---"
-	)
-	logging.debug(send_msg)
-	log_to_file(send_msg)
-
-	# DEBUG: log full request payload as single-line JSONL
-	# --- REVIEW: Uses json and logs full payloads; may expose sensitive data if not careful.
-	log_level = (LLM_LOG_LEVEL or 'INFO').strip().upper()
-	if log_level == "DEBUG":
-		import json
-		request_payload = {
-			'endpoint': LLM_ENDPOINT,
-			'model': _model,
-			'messages': msgs,
-			'max_tokens': LLM_MAX_TOKENS,
-			'kwargs': kwargs
-		}
-		log_to_file('[LLM DEBUG] REQUEST PAYLOAD: ' + json.dumps(request_payload, ensure_ascii=False))
+	# Prompt/response text is only formatted when DEBUG is enabled; the transaction record is queued, not written inline
+	if logging.getLogger().isEnabledFor(logging.DEBUG):
+		logging.debug("[LLM] System prompt: %s", _clip(prompt_to_use))
+		logging.debug("[LLM] User prompt: %s", _clip(messages[-1]['content'] if messages else ''))
+	logging.info("[LLM] Request sent: model=%s, message_count=%d, payload_chars=%d", _model, payload_count, payload_len)
+	start_time = time.time()
+	try:
+		# The pool picks the endpoint (and may hedge or fail over)
+		response, endpoint = _pool.complete(
+			model=_model,
+			messages=msgs,
+			max_tokens=LLM_MAX_TOKENS,
+			**_timeout_option(timeout),
+			**kwargs
+		)
+	except Exception as e:
+		logging.error("[LLM] Request failed after %.2fs: %s", time.time() - start_time, e)
+		_log_transaction(msgs, kwargs, start_time, 'error', error=e)
+		raise
+	elapsed = time.time() - start_time
+	resp_content = response.choices[0].message.content
+	resp_len = len(resp_content) if resp_content else 0
+	logging.info("[LLM] Response received: endpoint=%s, elapsed=%.2fs, response_chars=%d", endpoint.url, elapsed, resp_len)
+	if logging.getLogger().isEnabledFor(logging.DEBUG):
+		logging.debug("[LLM] Response: %s", _clip(resp_content))
+	_log_transaction(msgs, kwargs, start_time, 'ok', response=resp_content, endpoint=endpoint.url)
+	if cache_key and resp_content is not None:
+		_cache.set(cache_key, resp_content)
+	return resp_content
 
+def llm_stream(messages, system_prompt=None, lines=False, use_cache=None, timeout=None, **kwargs):
+	"""
+	Streaming counterpart of llm_complete using the OpenAI-compatible stream=True path.
+	Yields tokens as they arrive, or with lines=True each complete line (without the newline)
+	as soon as it is finished, so callers can act on early output while generation continues.
+	Args and caching behave as in llm_complete; a cache hit is replayed without a request.
+	"""
+	_init_llm()
+	msgs, prompt_to_use = _prepare_messages(messages, system_prompt)
+	cache_key = _cache_key(messages, prompt_to_use, use_cache, kwargs)
+	cached = _cached_response(cache_key, msgs, kwargs, stream=True)
+	if cached is not None:
+		yield from (cached.split('\n') if lines else [cached])
+		return
+	payload_len = sum(len(m.get('content', '')) for m in msgs)
+	logging.info("[LLM] Stream request sent: model=%s, message_count=%d, payload_chars=%d", _model, len(msgs), payload_len)
 	start_time = time.time()
+	first_token = None
+	parts = []
+	buffer = ''
+	endpoint = None
+	error = None
+	completed = False
 	try:
-		response = _client.chat.completions.create(
+		stream, endpoint = _pool.open_stream(
 			model=_model,
 			messages=msgs,
 			max_tokens=LLM_MAX_TOKENS,
+			**_timeout_option(timeout),
 			**kwargs
 		)
-		elapsed = time.time() - start_time
-		resp_content = response.choices[0].message.content
-		resp_len = len(resp_content) if resp_content else 0
-
-		# 4. Response received
-		resp_msg = (
-			f"[LLM STEP 4: Response Received]"
-			f"\nElapsed: {elapsed:.2f}s"
-			f"\nResponse chars: {resp_len}"
-			f"\nResponse:\n{resp_content}"
-			f"\n{'='*40}"
+		for chunk in stream:
+			if not chunk.choices:
+				continue
+			token = chunk.choices[0].delta.content
+			if not token:
+				continue
+			if first_token is None:
+				first_token = time.time() - start_time
+			parts.append(token)
+			if not lines:
+				yield token
+				continue
+			buffer += token
+			while '\n' in buffer:
+				line, buffer = buffer.split('\n', 1)
+				yield line
+		if lines and buffer:
+			yield buffer
+		completed = True
+	except Exception as e:
+		error = e
+		logging.error("[LLM] Stream request failed: %s", e)
+		_log_transaction(msgs, kwargs, start_time, 'error', error=e, stream=True)
+		raise
+	finally:
+		# Stream durations depend on output length, so they are not used as latency samples
+		_release_stream(endpoint, error, completed)
+	resp_content = ''.join(parts)
+	logging.info(
+		"[LLM] Stream completed: endpoint=%s, elapsed=%.2fs, first_token=%.2fs, response_chars=%d",
+		endpoint.url, time.time() - start_time, first_token or 0.0, len(resp_content)
+	)
+	_log_transaction(msgs, kwargs, start_time, 'ok', response=resp_content, stream=True, first_token=first_token, endpoint=endpoint.url)
+	if cache_key:
+		_cache.set(cache_key, resp_content)
+
+async def llm_complete_async(messages, system_prompt=None, use_cache=None, timeout=None, **kwargs):
+	"""
+	Asyncio counterpart of llm_complete using openai.AsyncOpenAI; same arguments, caching and logging.
+	"""
+	_init_llm()
+	msgs, prompt_to_use = _prepare_messages(messages, system_prompt)
+	cache_key = _cache_key(messages, prompt_to_use, use_cache, kwargs)
+	cached = await _cached_response_async(cache_key, msgs, kwargs)
+	if cached is not None:
+		return cached
+	payload_len = sum(len(m.get('content', '')) for m in msgs)
+	logging.info("[LLM] Async request sent: model=%s, message_count=%d, payload_chars=%d", _model, len(msgs), payload_len)
+	start_time = time.time()
+	try:
+		response, endpoint = await _pool.complete_async(
+			model=_model,
+			messages=msgs,
+			max_tokens=LLM_MAX_TOKENS,
+			**_timeout_option(timeout),
+			**kwargs
 		)
-		logging.debug(resp_msg)
-		log_to_file(resp_msg)
-
-		# DEBUG: log full response payload as single-line JSONL
-		if log_level == "DEBUG":
-			import json
-			response_payload = {
-				'elapsed': elapsed,
-				'response_chars': resp_len,
-				'response': resp_content
-			}
-			log_to_file('[LLM DEBUG] RESPONSE PAYLOAD: ' + json.dumps(response_payload, ensure_ascii=False))
-
-		if log_level != "DEBUG":
-			logging.info("[LLM] Request sent: endpoint=%s, model=%s, message_count=%d, payload_chars=%d", LLM_ENDPOINT, _model, payload_count, payload_len)
-			logging.info("[LLM] Response received: elapsed=%.2fs, response_chars=%d", elapsed, resp_len)
-		return resp_content
 	except Exception as e:
-		import traceback
-		tb = traceback.format_exc()
-		err_msg = (
-			f"[LLM STEP 5: ERROR]"
-			f"\nException occurred during LLM request: {e}"
-			f"\nTraceback:\n{tb}"
-			f"\n{'='*40}"
+		logging.error("[LLM] Async request failed after %.2fs: %s", time.time() - start_time, e)
+		_log_transaction(msgs, kwargs, start_time, 'error', error=e)
+		raise
+	resp_content = response.choices[0].message.content
+	logging.info("[LLM] Async response received: endpoint=%s, elapsed=%.2fs, response_chars=%d", endpoint.url, time.time() - start_time, len(resp_content) if resp_content else 0)
+	_log_transaction(msgs, kwargs, start_time, 'ok', response=resp_content, endpoint=endpoint.url)
+	if cache_key and resp_content is not None:
+		await asyncio.to_thread(_cache.set, cache_key, resp_content)
+	return resp_content
+
+async def llm_stream_async(messages, system_prompt=None, lines=False, use_cache=None, timeout=None, **kwargs):
+	"""
+	Asyncio counterpart of llm_stream: an async generator of tokens, or of complete lines with lines=True.
+	"""
+	_init_llm()
+	msgs, prompt_to_use = _prepare_messages(messages, system_prompt)
+	cache_key = _cache_key(messages, prompt_to_use, use_cache, kwargs)
+	cached = await _cached_response_async(cache_key, msgs, kwargs, stream=True)
+	if cached is not None:
+		for part in (cached.split('\n') if lines else [cached]):
+			yield part
+		return
+	payload_len = sum(len(m.get('content', '')) for m in msgs)
+	logging.info("[LLM] Async stream request sent: model=%s, message_count=%d, payload_chars=%d", _model, len(msgs), payload_len)
+	start_time = time.time()
+	first_token = None
+	parts = []
+	buffer = ''
+	endpoint = None
+	error = None
+	completed = False
+	try:
+		stream, endpoint = await _pool.open_stream_async(
+			model=_model,
+			messages=msgs,
+			max_tokens=LLM_MAX_TOKENS,
+			**_timeout_option(timeout),
+			**kwargs
 		)
-		logging.error(err_msg)
-		log_to_file(err_msg)
+		async for chunk in stream:
+			if not chunk.choices:
+				continue
+			token = chunk.choices[0].delta.content
+			if not token:
+				continue
+			if first_token is None:
+				first_token = time.time() - start_time
+			parts.append(token)
+			if not lines:
+				yield token
+				continue
+			buffer += token
+			while '\n' in buffer:
+				line, buffer = buffer.split('\n', 1)
+				yield line
+		if lines and buffer:
+			yield buffer
+		completed = True
+	except Exception as e:
+		error = e
+		logging.error("[LLM] Async stream request failed: %s", e)
+		_log_transaction(msgs, kwargs, start_time, 'error', error=e, stream=True)
 		raise
+	finally:
+		_release_stream(endpoint, error, completed)
+	resp_content = ''.join(parts)
+	logging.info(
+		"[LLM] Async stream completed: endpoint=%s, elapsed=%.2fs, first_token=%.2fs, response_chars=%d",
+		endpoint.url, time.time() - start_time, first_token or 0.0, len(resp_content)
+	)
+	_log_transaction(msgs, kwargs, start_time, 'ok', response=resp_content, stream=True, first_token=first_token, endpoint=endpoint.url)
+	if cache_key:
+		await asyncio.to_thread(_cache.set, cache_key, resp_content)
 
 # --- SUMMARY OF NON-GENERIC/INCOMPATIBLE ASPECTS ---
 # 1. Assumes a specific config structure and presence of many LLM-related config values.
@@ -0,0 +1,326 @@
+# Private endpoint pool for llm-local
+# Spreads chat completions over several OpenAI-compatible servers hosting the same model:
+#   - least-outstanding-requests routing (ties go to the endpoint with the lower latency EWMA)
+#   - warmup: a 1-token completion per endpoint so model load happens before real traffic
+#   - optional hedging: if the first endpoint has not answered within the recent p95 latency,
+#     the same request is sent to a second endpoint and the first answer wins
+#   - ejection: after N consecutive connection/server errors an endpoint is skipped for a while,
+#     then gets traffic again (and is ejected again if it still fails)
+#   - failover: a request that fails on one endpoint is retried once on another
+
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import openai
+
+# Failures that say something about the endpoint (not about the request)
+_ENDPOINT_ERRORS = (openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)
+
+_MIN_HEDGE_SAMPLES = 20
+
+
+class Endpoint:
+	def __init__(self, url, api_key, max_retries, timeout=None):
+		self.url = url
+		self._client_kwargs = {'base_url': url, 'api_key': api_key, 'max_retries': max_retries}
+		if timeout:
+			self._client_kwargs['timeout'] = timeout
+		self.client = openai.OpenAI(**self._client_kwargs)
+		self._async_clients = weakref.WeakKeyDictionary()  # event loop -> openai.AsyncOpenAI
+		self.outstanding = 0
+		self.latencies = deque(maxlen=200)
+		self.ewma = None
+		self.failures = 0
+		self.ejected_until = 0.0
+		self.requests = 0
+		self.errors = 0
+
+	def async_client(self):
+		"""AsyncOpenAI client for the running event loop (connection pools cannot be shared between loops)."""
+		loop = asyncio.get_running_loop()
+		client = self._async_clients.get(loop)
+		if client is None:
+			client = openai.AsyncOpenAI(**self._client_kwargs)
+			self._async_clients[loop] = client
+		return client
+
+
+class EndpointPool:
+	def __init__(self, urls, api_key, hedge=False, hedge_min_seconds=0.25, eject_after=3, eject_seconds=30.0, timeout=None):
+		# With several endpoints, fail over immediately instead of letting the client retry the same one
+		max_retries = 2 if len(urls) == 1 else 0
+		self.endpoints = [Endpoint(url, api_key, max_retries, timeout) for url in urls]
+		self.hedge = hedge and len(self.endpoints) > 1
+		self.hedge_min_seconds = hedge_min_seconds
+		self.eject_after = eject_after
+		self.eject_seconds = eject_seconds
+		self.hedged = 0
+		self.hedge_wins = 0
+		self._lock = threading.Lock()
+		self._hedge_executor = None
+
+	# --- routing and health ---
+
+	def acquire(self, exclude=()):
+		"""Pick and lease the best endpoint not in exclude; None if every endpoint is excluded."""
+		now = time.monotonic()
+		with self._lock:
+			candidates = [ep for ep in self.endpoints if ep not in exclude]
+			if not candidates:
+				return None
+			healthy = [ep for ep in candidates if ep.ejected_until <= now]
+			if healthy:
+				endpoint = min(healthy, key=lambda ep: (ep.outstanding, ep.ewma or 0.0))
+			else:
+				# Everything is ejected: try the one that comes back soonest rather than failing outright
+				endpoint = min(candidates, key=lambda ep: ep.ejected_until)
+			endpoint.outstanding += 1
+			endpoint.requests += 1
+			return endpoint
+
+	def release(self, endpoint, elapsed=None, error=None):
+		"""Return a lease; successful latencies feed routing and the hedge delay, endpoint errors count toward ejection."""
+		with self._lock:
+			endpoint.outstanding -= 1
+			if error is None:
+				endpoint.failures = 0
+				endpoint.ejected_until = 0.0
+				if elapsed is not None:
+					endpoint.latencies.append(elapsed)
+					endpoint.ewma = elapsed if endpoint.ewma is None else 0.8 * endpoint.ewma + 0.2 * elapsed
+				return
+			endpoint.errors += 1
+			if not isinstance(error, _ENDPOINT_ERRORS):
+				return
+			endpoint.failures += 1
+			if endpoint.failures >= self.eject_after:
+				endpoint.ejected_until = time.monotonic() + self.eject_seconds
+				logging.warning("[LLM] Ejecting endpoint %s for %.0fs after %d consecutive failures", endpoint.url, self.eject_seconds, endpoint.failures)
+
+	def abandon(self, endpoint):
+		"""Return a lease without judging the endpoint: the request was cancelled or its stream closed early."""
+		with self._lock:
+			endpoint.outstanding -= 1
+
+	def hedge_delay(self):
+		"""Seconds to wait before hedging: p95 of recent latencies (at least hedge_min_seconds); None when off or too few samples."""
+		if not self.hedge:
+			return None
+		with self._lock:
+			samples = sorted(s for ep in self.endpoints for s in ep.latencies)
+		if len(samples) < _MIN_HEDGE_SAMPLES:
+			return None
+		return max(samples[int(0.95 * (len(samples) - 1))], self.hedge_min_seconds)
+
+	def stats(self):
+		with self._lock:
+			return {
+				'hedged': self.hedged,
+				'hedge_wins': self.hedge_wins,
+				'endpoints': [
+					{
+						'url': ep.url,
+						'outstanding': ep.outstanding,
+						'requests': ep.requests,
+						'errors': ep.errors,
+						'ejected': ep.ejected_until > time.monotonic(),
+						'ewma_seconds': round(ep.ewma, 4) if ep.ewma is not None else None,
+					}
+					for ep in self.endpoints
+				],
+			}
+
+	# --- warmup ---
+
+	def warmup(self, model, timeout=120.0):
+		"""Send a 1-token completion to every endpoint in parallel; endpoints that fail start out ejected."""
+		def ping(endpoint):
+			start = time.time()
+			try:
+				endpoint.client.with_options(timeout=timeout).chat.completions.create(
+					model=model, messages=[{"role": "user", "content": "ping"}], max_tokens=1
+				)
+				logging.info("[LLM] Warmed up endpoint %s in %.2fs", endpoint.url, time.time() - start)
+				return True
+			except Exception as e:
+				logging.warning("[LLM] Warmup failed for endpoint %s: %s", endpoint.url, e)
+				with self._lock:
+					endpoint.failures = self.eject_after
+					endpoint.ejected_until = time.monotonic() + self.eject_seconds
+				return False
+
+		with ThreadPoolExecutor(max_workers=len(self.endpoints), thread_name_prefix='llm-warmup') as pool:
+			return dict(zip((ep.url for ep in self.endpoints), pool.map(ping, self.endpoints)))
+
+	# --- blocking requests ---
+
+	def _attempt(self, endpoint, request):
+		start = time.perf_counter()
+		try:
+			response = endpoint.client.chat.completions.create(**request)
+		except Exception as e:
+			self.release(endpoint, error=e)
+			raise
+		self.release(endpoint, time.perf_counter() - start)
+		return response, endpoint
+
+	def _with_failover(self, request, tried=()):
+		tried = set(tried)
+		while True:
+			endpoint = self.acquire(exclude=tried)
+			try:
+				return self._attempt(endpoint, request)
+			except _ENDPOINT_ERRORS as e:
+				tried.add(endpoint)
+				if len(tried) >= len(self.endpoints):
+					raise
+				logging.warning("[LLM] Endpoint %s failed (%s); failing over", endpoint.url, e)
+
+	def _get_hedge_executor(self):
+		with self._lock:
+			if self._hedge_executor is None:
+				self._hedge_executor = ThreadPoolExecutor(max_workers=4 * len(self.endpoints), thread_name_prefix='llm-hedge')
+			return self._hedge_executor
+
+	def complete(self, **request):
+		"""chat.completions.create on the pool. Returns (response, endpoint)."""
+		delay = self.hedge_delay()
+		if delay is None:
+			return self._with_failover(request)
+		executor = self._get_hedge_executor()
+		primary = self.acquire()
+		first = executor.submit(self._attempt, primary, request)
+		done, _ = wait([first], timeout=delay)
+		if done:
+			try:
+				return first.result()
+			except _ENDPOINT_ERRORS:
+				return self._with_failover(request, tried={primary})
+		backup = self.acquire(exclude={primary})
+		if backup is None:
+			return first.result()
+		with self._lock:
+			self.hedged += 1
+		logging.info("[LLM] Hedging request to %s after %.2fs without reply from %s", backup.url, delay, primary.url)
+		second = executor.submit(self._attempt, backup, request)
+		# The slower request keeps running in the background; its result is discarded
+		pending = {first, second}
+		error = None
+		while pending:
+			done, pending = wait(pending, return_when=FIRST_COMPLETED)
+			for future in done:
+				try:
+					result = future.result()
+				except Exception as e:
+					error = e
+					continue
+				if future is second:
+					with self._lock:
+						self.hedge_wins += 1
+				return result
+		raise error
+
+	def open_stream(self, **request):
+		"""
+		Start a stream=True completion (failing over if it cannot be opened).
+		Returns (stream, endpoint); the caller must release(endpoint, error=...) once the stream is consumed,
+		or abandon(endpoint) if it stops reading early.
+		"""
+		tried = set()
+		while True:
+			endpoint = self.acquire(exclude=tried)
+			try:
+				return endpoint.client.chat.completions.create(stream=True, **request), endpoint
+			except Exception as e:
+				self.release(endpoint, error=e)
+				tried.add(endpoint)
+				if not isinstance(e, _ENDPOINT_ERRORS) or len(tried) >= len(self.endpoints):
+					raise
+				logging.warning("[LLM] Endpoint %s failed (%s); failing over", endpoint.url, e)
+
+	# --- asyncio requests ---
+
+	async def _attempt_async(self, endpoint, request):
+		start = time.perf_counter()
+		try:
+			response = await endpoint.async_client().chat.completions.create(**request)
+		except asyncio.CancelledError:
+			# Lost a hedge race; not the endpoint's fault, nor a sign that it recovered
+			self.abandon(endpoint)
+			raise
+		except Exception as e:
+			self.release(endpoint, error=e)
+			raise
+		self.release(endpoint, time.perf_counter() - start)
+		return response, endpoint
+
+	async def _with_failover_async(self, request, tried=()):
+		tried = set(tried)
+		while True:
+			endpoint = self.acquire(exclude=tried)
+			try:
+				return await self._attempt_async(endpoint, request)
+			except _ENDPOINT_ERRORS as e:
+				tried.add(endpoint)
+				if len(tried) >= len(self.endpoints):
+					raise
+				logging.warning("[LLM] Endpoint %s failed (%s); failing over", endpoint.url, e)
+
+	async def complete_async(self, **request):
+		"""Async complete(): the losing hedge request is cancelled instead of left running."""
+		delay = self.hedge_delay()
+		if delay is None:
+			return await self._with_failover_async(request)
+		primary = self.acquire()
+		first = asyncio.create_task(self._attempt_async(primary, request))
+		done, _ = await asyncio.wait({first}, timeout=delay)
+		if done:
+			try:
+				return first.result()
+			except _ENDPOINT_ERRORS:
+				return await self._with_failover_async(request, tried={primary})
+		backup = self.acquire(exclude={primary})
+		if backup is None:
+			return await first
+		with self._lock:
+			self.hedged += 1
+		logging.info("[LLM] Hedging request to %s after %.2fs without reply from %s", backup.url, delay, primary.url)
+		second = asyncio.create_task(self._attempt_async(backup, request))
+		pending = {first, second}
+		error = None
+		try:
+			while pending:
+				done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+				for task in done:
+					if task.exception() is not None:
+						error = task.exception()
+						continue
+					if task is second:
+						with self._lock:
+							self.hedge_wins += 1
+					return task.result()
+			raise error
+		finally:
+			for task in pending:
+				task.cancel()
+
+	async def open_stream_async(self, **request):
+		"""Async open_stream(): returns (stream, endpoint); the caller releases the endpoint."""
+		tried = set()
+		while True:
+			endpoint = self.acquire(exclude=tried)
+			try:
+				return await endpoint.async_client().chat.completions.create(stream=True, **request), endpoint
+			except asyncio.CancelledError:
+				self.abandon(endpoint)
+				raise
+			except Exception as e:
+				self.release(endpoint, error=e)
+				tried.add(endpoint)
+				if not isinstance(e, _ENDPOINT_ERRORS) or len(tried) >= len(self.endpoints):
+					raise
+				logging.warning("[LLM] Endpoint %s failed (%s); failing over", endpoint.url, e)
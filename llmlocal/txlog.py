@@ -0,0 +1,86 @@
+# Private transaction log writer for llm-local
+# Completions enqueue one dict per transaction; a daemon thread batches them into the
+# JSONL log file, so the caller never blocks on file I/O. Flushed at interpreter exit.
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+
+_SENTINEL = object()
+
+
+class TransactionLog:
+	def __init__(self, path):
+		self.path = path
+		self._queue = queue.Queue()
+		self._thread = None
+		self._lock = threading.Lock()
+
+	def _start(self):
+		with self._lock:
+			if self._thread is None:
+				log_dir = os.path.dirname(self.path)
+				if log_dir:
+					os.makedirs(log_dir, exist_ok=True)
+				self._thread = threading.Thread(target=self._run, name='llm-txlog', daemon=True)
+				self._thread.start()
+				atexit.register(self.close)
+
+	def write(self, record):
+		"""Queue one transaction record (a JSON-serializable dict)."""
+		if not self.path:
+			return
+		if self._thread is None:
+			self._start()
+		self._queue.put(record)
+
+	def _run(self):
+		try:
+			f = open(self.path, 'a', encoding='utf-8')
+		except OSError as e:
+			logging.error(f"Failed to open LLM log {self.path}: {e}")
+			f = None
+		while True:
+			item = self._queue.get()
+			batch = [item]
+			# Drain whatever else is waiting so a burst costs one write + flush
+			while True:
+				try:
+					batch.append(self._queue.get_nowait())
+				except queue.Empty:
+					break
+			stop = False
+			lines = []
+			for record in batch:
+				if record is _SENTINEL:
+					stop = True
+				else:
+					lines.append(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+			if f is not None and lines:
+				try:
+					f.writelines(lines)
+					f.flush()
+				except OSError as e:
+					logging.error(f"Failed to write LLM log to {self.path}: {e}")
+			for _ in batch:
+				self._queue.task_done()
+			if stop:
+				if f is not None:
+					f.close()
+				return
+
+	def flush(self):
+		"""Block until every queued record has been written."""
+		if self._thread is not None:
+			self._queue.join()
+
+	def close(self):
+		"""Flush pending records and stop the writer thread."""
+		with self._lock:
+			thread, self._thread = self._thread, None
+		if thread is not None and thread.is_alive():
+			self._queue.put(_SENTINEL)
+			thread.join(timeout=5)
@@ -15,11 +15,35 @@ No direct Spotify API logic or implementation in this file.
 # 5 iteratively submits the proposed song names to spotify song search api and returns a song list object
 # 6 creates a spotify playlist using the song list object
 
-from src import db
-from src.api import SpotifyAPI
-from util.moodyplaylist import create_moody_playlist
+# Heavy modules (spotipy, tinydb, requests, openai, config parsing) are imported on first use
+# inside the menu handlers, so the menu appears immediately. See scripts/bench_startup.py.
+import argparse
 import os
 
+_playlist_index = None
+
+def _api(account=None):
+	from src.api import get_api
+	return get_api(account)
+
+def _index():
+	global _playlist_index
+	if _playlist_index is None:
+		from src.playlistindex import PlaylistIndex
+		_playlist_index = PlaylistIndex()
+	return _playlist_index
+
+def _start_prefetch(mood_prompt, thoughts_paths):
+	try:
+		from src import config
+		from util.moodyplaylist import start_prefetch
+		# Without a cached token, auth needs the terminal; leave it to the foreground
+		return start_prefetch(mood_prompt, thoughts_paths, warm_spotify=os.path.exists(config.SPOTIFY_TOKEN_CACHE))
+	except Exception as e:
+		# The run itself reports real problems; prefetch is only an optimization
+		print(f"(Background prefetch unavailable: {e})")
+		return None
+
 def print_menu():
 	print("\nSpotify Playlist Worker")
 	print("1. List my playlists")
@@ -29,26 +53,27 @@ def print_menu():
 	print("5. Exit")
 
 def main():
-	api = SpotifyAPI()
-	user = api.sp.current_user()
-	user_id = user['id']
-
 	while True:
 		print_menu()
 		choice = input("Select an option: ").strip()
 
 		if choice == '1':
-			playlists = api.get_user_playlists(user_id)
-			print("\nYour Playlists:")
-			for idx, pl in enumerate(playlists['items'], 1):
-				print(f"{idx}. {pl['name']} (ID: {pl['id']})")
+			api = _api()
+			sync = _index().sync(api, api.user_id)
+			print(f"\nYour Playlists ({sync['total']} total, {sync['fetched']} updated, {sync['unchanged']} unchanged):")
+			for idx, pl in enumerate(_index().list_playlists(), 1):
+				print(f"{idx}. {pl['name']} (ID: {pl['id']}, {pl['track_total']} tracks)")
+			if sync['fetched'] and api.catalog is not None:
+				api.catalog.add_playlist_index(_index())
 
 		elif choice == '2':
 			print("\n[Moody Playlist Creation]")
 			mood_prompt = input("Enter a mood, theme, or idea for your playlist: ").strip()
-			# List available thoughts files
 			thoughts_dir = os.path.join(os.path.dirname(__file__), 'playlist-thoughts', 'thoughts')
 			thoughts_files = [f for f in os.listdir(thoughts_dir) if f.endswith('.md')]
+			# Google search, LLM warmup, Spotify auth and thoughts indexing run while the user picks a file
+			prefetch = _start_prefetch(mood_prompt, [os.path.join(thoughts_dir, f) for f in thoughts_files])
+			# List available thoughts files
 			thoughts_file = None
 			if thoughts_files:
 				print("Available thoughts files:")
@@ -58,7 +83,8 @@ def main():
 				if sel.isdigit() and 1 <= int(sel) <= len(thoughts_files):
 					thoughts_file = os.path.join(thoughts_dir, thoughts_files[int(sel)-1])
 			try:
-				result = create_moody_playlist(mood_prompt, thoughts_file)
+				from util.moodyplaylist import create_moody_playlist
+				result = create_moody_playlist(mood_prompt, thoughts_file, api=_api(), prefetch=prefetch)
 				print(f"\n[Moody Playlist Created]")
 				print(f"Name: {result['playlist_name']}")
 				print(f"Tracks added: {result['track_count']}")
@@ -73,12 +99,17 @@ def main():
 			if not track_ids:
 				print("No track IDs provided.")
 				continue
-			api.add_tracks_to_playlist(playlist_id, track_ids)
-			print(f"Added {len(track_ids)} tracks to playlist {playlist_id}.")
+			api = _api()
+			# The index only stands in for the playlist's contents if nothing changed since it was synced
+			existing_ids = _index().current_track_ids(playlist_id, api.get_playlist_snapshot_id(playlist_id))
+			if existing_ids is None:
+				api.forget_playlist_contents(playlist_id)
+			result = api.add_tracks_to_playlist(playlist_id, track_ids, existing_ids=existing_ids)
+			print(f"Added {result['added']} tracks to playlist {playlist_id} ({result['skipped']} already present, {result['failed']} failed).")
 
 		elif choice == '4':
 			query = input("Track search query: ").strip()
-			results = api.search_tracks(query)
+			results = _api().search_tracks(query)
 			print("\nSearch Results:")
 			for idx, track in enumerate(results, 1):
 				artists = ', '.join([a['name'] for a in track['artists']])
@@ -91,7 +122,62 @@ def main():
 		else:
 			print("Invalid option. Please try again.")
 
+def print_history(limit, mood_prompt=None, track_id=None):
+	from src.history import get_history
+	import time
+	history = get_history()
+	if track_id:
+		runs = history.runs_with_track(track_id, limit=limit)
+	else:
+		runs = history.recent(limit=limit, mood_prompt=mood_prompt)
+	if not runs:
+		print("No matching runs in history.")
+	for run in runs:
+		created = time.strftime('%Y-%m-%d %H:%M', time.localtime(run['created_at']))
+		print(f"#{run['id']} {created} {run['playlist_name']} ({run['track_count']} tracks) <- '{run['mood_prompt']}' [{run['playlist_id']}]")
+
+def parse_args():
+	parser = argparse.ArgumentParser(description="Spotify Playlist Worker. Runs the interactive menu unless --batch, --history, --build-catalog, --add-account or --accounts is given.")
+	parser.add_argument('--batch', metavar='JOBS_JSONL', help="Generate moody playlists headlessly from a JSONL job file")
+	parser.add_argument('--output', metavar='RESULTS_JSONL', default='batch_results.jsonl', help="Where per-job results are appended (default: batch_results.jsonl)")
+	parser.add_argument('--workers', type=int, default=4, help="Number of playlists generated concurrently (default: 4)")
+	parser.add_argument('--async', dest='use_async', action='store_true', help="Run batch jobs on the asyncio engine (one event loop) instead of worker threads")
+	parser.add_argument('--processes', type=int, default=0, help="Run batch accounts in parallel worker processes; --workers is then per account (default: 0, threads only)")
+	parser.add_argument('--add-account', metavar='NAME', help="Register a Spotify account for batch jobs (\"account\": NAME) and authorize it, then exit")
+	parser.add_argument('--accounts', action='store_true', help="List registered Spotify accounts and exit")
+	parser.add_argument('--history', metavar='N', type=int, nargs='?', const=20, help="List the last N generated playlists (default: 20) and exit")
+	parser.add_argument('--prompt', help="With --history: only runs for this mood prompt")
+	parser.add_argument('--track', metavar='TRACK_ID', help="With --history: only runs whose playlist contains this track")
+	parser.add_argument('--build-catalog', action='store_true', help="Index your saved and playlist tracks into the local track catalog and exit")
+	verbosity = parser.add_mutually_exclusive_group()
+	verbosity.add_argument('--quiet', dest='output', action='store_const', const='quiet', help="Only print results, warnings and errors (overrides [logging] output)")
+	verbosity.add_argument('--verbose', dest='output', action='store_const', const='verbose', help="Debug output: DEBUG logging and full payloads (overrides [logging] output)")
+	return parser.parse_args()
+
 if __name__ == "__main__":
-	main()
+	args = parse_args()
+	if args.output:
+		from src import output
+		output.set_mode(args.output)
+	if args.history is not None:
+		print_history(args.history, mood_prompt=args.prompt, track_id=args.track)
+	elif args.add_account:
+		from src import accounts
+		entry = accounts.add_account(args.add_account)
+		user = _api(args.add_account).current_user()
+		print(f"Account '{args.add_account}' authorized as {user.get('display_name') or user['id']} (token cache: {entry['token_cache']})")
+	elif args.accounts:
+		from src import accounts
+		names = accounts.list_accounts()
+		print('\n'.join(names) if names else "No accounts registered (use --add-account NAME).")
+	elif args.build_catalog:
+		from src.catalog import get_catalog
+		counts = get_catalog().build(_api(), _index())
+		print(f"Catalog: {counts['total']} tracks ({counts['playlists']} from playlists, {counts['saved']} saved)")
+	elif args.batch:
+		from util.batch import run_batch
+		run_batch(args.batch, args.output, workers=args.workers, use_async=args.use_async, processes=args.processes)
+	else:
+		main()
 
 
@@ -0,0 +1,204 @@
+"""
+Output overhead micro-benchmark
+-------------------------------
+Replays the console and log output of one moody playlist run with realistically sized payloads
+(full Google CSE items, Spotify track and playlist objects, multi-kilobyte prompts) and times it:
+  - eager: the previous behavior (f-strings with whole payloads, printed and logged at INFO)
+  - quiet / normal / verbose: the output policy in src/output.py with lazy %-style formatting
+No network or credentials needed; output goes to --sink (default: a temp file, so bytes per run
+can be reported), so the numbers are formatting plus write cost, without terminal rendering on top.
+Run from the repo root:
+	python scripts/bench_output.py [--runs 200] [--queries 10] [--sink /dev/tty]
+"""
+
+import argparse
+import contextlib
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+_CONFIG = """[logging]
+level = INFO
+file =
+
+[spotify]
+client_id = bench
+client_secret = bench
+redirect_uri = http://127.0.0.1/callback
+scope = playlist-modify-private
+token_cache = {token_cache}
+
+[AIPlayList]
+playlist_prefix =
+
+[SearchAPI]
+GoogleSearchAPIKey = bench
+GoogleCSEID = bench
+"""
+
+# ISO country codes; Spotify lists ~185 of them per track and album
+_MARKETS = [a + b for a in 'ABCDEFGHIJ' for b in 'ABCDEFGHIJKLMNOPQR'][:185]
+
+
+def _track(query, index):
+	track_id = f"{abs(hash((query, index))):022d}"[:22]
+	album = {
+		'album_type': 'album', 'id': track_id[::-1], 'name': f"{query} album", 'release_date': '2019-05-17',
+		'available_markets': _MARKETS, 'artists': [{'id': 'a' + track_id[:21], 'name': 'Artist', 'type': 'artist'}],
+		'images': [{'url': f"https://i.scdn.co/image/{track_id}{size}", 'height': size, 'width': size} for size in (640, 300, 64)],
+		'external_urls': {'spotify': f"https://open.spotify.com/album/{track_id[::-1]}"},
+	}
+	return {
+		'id': track_id, 'name': f"{query} ({index})", 'uri': f"spotify:track:{track_id}", 'popularity': 50,
+		'duration_ms': 215000, 'explicit': False, 'track_number': index + 1, 'disc_number': 1,
+		'artists': album['artists'], 'album': album, 'available_markets': _MARKETS,
+		'external_ids': {'isrc': f"USRC1{index:07d}"}, 'external_urls': {'spotify': f"https://open.spotify.com/track/{track_id}"},
+		'preview_url': f"https://p.scdn.co/mp3-preview/{track_id}",
+	}
+
+
+def _payloads(queries):
+	song_queries = [f"Song {i} Artist {i}" for i in range(queries)]
+	google = {'kind': 'customsearch#search', 'items': [
+		{'title': f"Moody result {i}", 'link': f"https://example.com/{i}", 'snippet': 'Songs for a rainy evening. ' * 6,
+		 'pagemap': {'metatags': [{'og:description': 'A playlist for rainy evenings. ' * 10, 'og:image': f"https://example.com/{i}.jpg"}]}}
+		for i in range(5)
+	]}
+	context = "Mood prompt: rainy evening\n\nGoogle context: " + ' '.join(i['snippet'] for i in google['items']) + "\n\nThoughts: " + 'Thinking about home. ' * 80
+	return {
+		'song_queries': song_queries,
+		'google': google,
+		'thoughts': 'Thinking about home. ' * 80,
+		'context': context,
+		'name_prompt': f"Generate a short, fun, moody playlist name.\n\n{context}",
+		'query_prompt': f"Suggest {queries} songs, one 'title artist' per line.\n\n{context}",
+		'name_response': 'Rain on the Window',
+		'query_response': '\n'.join(song_queries),
+		'search_results': [[_track(q, i) for i in range(10)] for q in song_queries],
+		'playlist': {
+			'id': 'pl' + '0' * 20, 'name': 'Rain on the Window', 'description': 'Moody playlist: rainy evening',
+			'owner': {'id': 'bench-user', 'display_name': 'Bench User', 'external_urls': {'spotify': 'https://open.spotify.com/user/bench-user'}},
+			'tracks': {'href': 'https://api.spotify.com/v1/playlists/x/tracks', 'items': [], 'total': 0, 'limit': 100},
+			'followers': {'total': 0}, 'images': [], 'public': True, 'snapshot_id': 's' * 40,
+		},
+		'found_tracks': [f"{i:022d}" for i in range(queries)],
+		'add_result': {'added': queries, 'skipped': 0, 'failed': 0, 'snapshot_id': 's' * 40},
+	}
+
+
+def _eager_run(p):
+	# The output of create_moody_playlist and SpotifyAPI before the output policy
+	print("[MoodyPlaylist] Step 1: Google search for mood/idea...")
+	print(f"[MoodyPlaylist] Google results: {p['google']}")
+	print("[MoodyPlaylist] Step 2: Select relevant thoughts...")
+	print(f"[MoodyPlaylist] Thoughts context: {p['thoughts']}")
+	print("[MoodyPlaylist] Step 3: Build LLM context...")
+	print(f"[MoodyPlaylist] LLM context:\n{p['context']}")
+	print("[MoodyPlaylist] Step 4+5: Generate playlist name and song search queries via LLM (mode: split)...")
+	print(f"[MoodyPlaylist] Playlist name LLM prompt: {p['name_prompt']}")
+	print(f"[MoodyPlaylist] Song queries LLM prompt: {p['query_prompt']}")
+	print(f"[MoodyPlaylist] Playlist name LLM response: {p['name_response']}")
+	print(f"[MoodyPlaylist] Song queries LLM response: {p['query_response']}")
+	print("[MoodyPlaylist] Step 6: Search Spotify for tracks and create playlist...")
+	for query, tracks in zip(p['song_queries'], p['search_results']):
+		logging.info(f"[SpotifyAPI] Found {len(tracks)} tracks for query='{query}'")
+		print(f"[MoodyPlaylist] Spotify search result for '{query}': {tracks}")
+	playlist = p['playlist']
+	logging.info(f"[SpotifyAPI] Creating playlist for user_id=bench-user, name='{playlist['name']}', description='{playlist['description']}'")
+	logging.info(f"[SpotifyAPI] Created playlist: {playlist}")
+	print(f"[MoodyPlaylist] Created playlist: {playlist}")
+	logging.info(f"[SpotifyAPI] Add tracks result: {p['add_result']}")
+	print(f"[MoodyPlaylist] Added tracks: {p['found_tracks']} ({p['add_result']})")
+
+
+def _policy_run(p):
+	# The same run through src/output.py, as util/moodyplaylist.py and src/api.py now do it
+	from src import output
+	output.say("[MoodyPlaylist] Step 1: Google search for mood/idea...")
+	output.say("[MoodyPlaylist] Google results: %s", output.preview(p['google']))
+	output.say("[MoodyPlaylist] Step 2: Select relevant thoughts...")
+	output.say("[MoodyPlaylist] Thoughts context: %s", output.preview(p['thoughts']))
+	output.say("[MoodyPlaylist] Step 3: Build LLM context...")
+	output.say("[MoodyPlaylist] LLM context:\n%s", output.preview(p['context']))
+	output.say("[MoodyPlaylist] Step 4+5: Generate playlist name and song search queries via LLM (mode: %s)...", 'split')
+	output.say("[MoodyPlaylist] Playlist name LLM prompt: %s", output.preview(p['name_prompt']))
+	output.say("[MoodyPlaylist] Song queries LLM prompt: %s", output.preview(p['query_prompt']))
+	output.say("[MoodyPlaylist] Playlist name LLM response: %s", output.preview(p['name_response']))
+	output.say("[MoodyPlaylist] Song queries LLM response: %s", output.preview(p['query_response']))
+	output.say("[MoodyPlaylist] Step 6: Search Spotify for tracks and create playlist...")
+	for query, tracks in zip(p['song_queries'], p['search_results']):
+		logging.info("[SpotifyAPI] Found %d tracks for query='%s'", len(tracks), query)
+		output.detail("[MoodyPlaylist] Spotify search result for '%s': %s", query, tracks)
+	output.say("[MoodyPlaylist] Matched %d of %d song queries", len(p['found_tracks']), len(p['song_queries']))
+	playlist = p['playlist']
+	logging.info("[SpotifyAPI] Creating playlist for user_id=%s, name='%s', description='%s'", 'bench-user', playlist['name'], output.preview(playlist['description']))
+	logging.info("[SpotifyAPI] Created playlist: id=%s, name='%s'", playlist['id'], playlist.get('name'))
+	logging.debug("[SpotifyAPI] Playlist object: %s", output.preview(playlist))
+	output.say("[MoodyPlaylist] Created playlist '%s' (%s)", playlist['name'], playlist['id'])
+	output.detail("[MoodyPlaylist] Playlist object: %s", playlist)
+	logging.info("[SpotifyAPI] Add tracks result: %s", p['add_result'])
+	output.say("[MoodyPlaylist] Added tracks: %s (%s)", output.preview(p['found_tracks']), p['add_result'])
+
+
+def _measure(run, payloads, runs, sink):
+	"""Per-run seconds and bytes written per run (0 when the sink is not a regular file)."""
+	samples = []
+	with contextlib.redirect_stdout(sink):
+		run(payloads)  # warm up (imports, reprlib setup)
+		sink.flush()
+		written_from = sink.tell() if sink.seekable() else 0
+		for _ in range(runs):
+			t = time.perf_counter()
+			run(payloads)
+			samples.append(time.perf_counter() - t)
+		sink.flush()
+	written = (sink.tell() - written_from) // runs if sink.seekable() else 0
+	return samples, written
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Time console/log output of one playlist run: eager formatting vs the output policy.")
+	parser.add_argument('--runs', type=int, default=200, help="Replayed runs per mode (default: 200)")
+	parser.add_argument('--queries', type=int, default=10, help="Song queries per run (default: 10)")
+	parser.add_argument('--sink', default=None, help="Where stdout and log output go (default: a temp file, so bytes can be counted)")
+	args = parser.parse_args()
+
+	workdir = tempfile.mkdtemp(prefix='bench-output-')
+	config_path = os.path.join(workdir, 'config.ini')
+	with open(config_path, 'w', encoding='utf-8') as f:
+		f.write(_CONFIG.format(token_cache=os.path.join(workdir, 'token_cache.json')))
+	os.environ['SPOTIFY_WORKER_CONFIG'] = config_path
+	from src import output
+
+	sink = open(args.sink or os.path.join(workdir, 'output.log'), 'w', encoding='utf-8')
+	handler = logging.StreamHandler(sink)
+	handler.setFormatter(logging.Formatter('[%(levelname)s] %(message)s'))
+	root = logging.getLogger()
+	root.handlers[:] = [handler]
+	payloads = _payloads(args.queries)
+
+	results = {}
+	root.setLevel(logging.INFO)
+	results['eager'] = _measure(_eager_run, payloads, args.runs, sink)
+	for mode in (output.QUIET, output.NORMAL, output.VERBOSE):
+		output.set_mode(mode)
+		results[mode] = _measure(_policy_run, payloads, args.runs, sink)
+	sink.close()
+
+	baseline = statistics.median(results['eager'][0])
+	print(f"{args.runs} replayed runs, {args.queries} song queries each, output to {sink.name}")
+	print(f"{'mode':<10}{'median us':>12}{'p95 us':>10}{'KB/run':>10}{'vs eager':>10}")
+	for mode, (samples, written) in results.items():
+		median = statistics.median(samples)
+		p95 = sorted(samples)[int(0.95 * (len(samples) - 1))]
+		print(f"{mode:<10}{median * 1e6:>12.0f}{p95 * 1e6:>10.0f}{written / 1024:>10.1f}{baseline / median:>9.1f}x")
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,97 @@
+"""
+Startup benchmark for playlist-worker.py
+----------------------------------------
+Measures, in fresh interpreters so nothing is cached between runs:
+  - import time of the CLI module and of the heavy modules it loads on first use
+  - time from process start until the interactive menu prompt is shown
+Run from the repo root:
+	python scripts/bench_startup.py [--runs 5] [--max-menu-ms 500]
+Exits non-zero if the median time to first menu exceeds --max-menu-ms (for CI gating).
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER = os.path.join(REPO_ROOT, 'playlist-worker.py')
+MENU_PROMPT = b'Select an option: '
+
+# Modules the CLI defers until a menu option needs them
+LAZY_MODULES = ['src.api', 'src.playlistindex', 'util.moodyplaylist', 'llmlocal.llm']
+
+_IMPORT_WORKER = (
+	"import importlib.util, sys, time\n"
+	"t = time.perf_counter()\n"
+	"spec = importlib.util.spec_from_file_location('playlist_worker', {path!r})\n"
+	"module = importlib.util.module_from_spec(spec)\n"
+	"spec.loader.exec_module(module)\n"
+	"print(time.perf_counter() - t)\n"
+)
+
+_IMPORT_MODULE = (
+	"import importlib, time\n"
+	"t = time.perf_counter()\n"
+	"importlib.import_module({name!r})\n"
+	"print(time.perf_counter() - t)\n"
+)
+
+def _timed_snippet(code):
+	out = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, capture_output=True, text=True)
+	if out.returncode != 0:
+		return None
+	return float(out.stdout.strip().splitlines()[-1])
+
+def _time_to_menu():
+	start = time.perf_counter()
+	proc = subprocess.Popen(
+		[sys.executable, WORKER],
+		cwd=REPO_ROOT,
+		stdin=subprocess.PIPE,
+		stdout=subprocess.PIPE,
+		stderr=subprocess.DEVNULL
+	)
+	seen = b''
+	try:
+		while not seen.endswith(MENU_PROMPT):
+			byte = proc.stdout.read(1)
+			if not byte:
+				return None
+			seen += byte
+		return time.perf_counter() - start
+	finally:
+		try:
+			proc.communicate(b'5\n', timeout=10)
+		except subprocess.TimeoutExpired:
+			proc.kill()
+
+def _summary(label, samples):
+	samples = [s for s in samples if s is not None]
+	if not samples:
+		print(f"{label:<38} failed (module raised; check config.ini)")
+		return None
+	median = statistics.median(samples)
+	print(f"{label:<38} median {median * 1000:8.1f} ms   min {min(samples) * 1000:8.1f} ms   max {max(samples) * 1000:8.1f} ms")
+	return median
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark playlist-worker.py startup.")
+	parser.add_argument('--runs', type=int, default=5)
+	parser.add_argument('--max-menu-ms', type=float, default=None, help="Fail if median time to first menu exceeds this")
+	args = parser.parse_args()
+
+	print(f"[bench_startup] {args.runs} runs each, python {sys.version.split()[0]}")
+	_summary('import playlist-worker', [_timed_snippet(_IMPORT_WORKER.format(path=WORKER)) for _ in range(args.runs)])
+	for name in LAZY_MODULES:
+		_summary(f'import {name} (deferred)', [_timed_snippet(_IMPORT_MODULE.format(name=name)) for _ in range(args.runs)])
+	menu = _summary('time to first menu', [_time_to_menu() for _ in range(args.runs)])
+
+	if args.max_menu_ms is not None and (menu is None or menu * 1000 > args.max_menu_ms):
+		print(f"[bench_startup] FAIL: time to first menu above {args.max_menu_ms} ms")
+		sys.exit(1)
+
+if __name__ == "__main__":
+	main()
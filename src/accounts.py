@@ -0,0 +1,84 @@
+"""
+Account Registry Module
+-----------------------
+Spotify accounts this deployment generates playlists for. Each account has its own OAuth
+token cache (data/tokens/<name>.json by default) and optionally its own request budget;
+get_api(account) builds one SpotifyAPI per account on top of them.
+
+The registry is a small JSON file ([accounts] file, default data/accounts.json) rather than a
+table in spotify_db.json, so batch worker processes with their own database files all see it:
+
+    {"alice": {"token_cache": "data/tokens/alice.json", "requests_per_second": 5}}
+"""
+
+import json
+import os
+import re
+import threading
+from . import config
+from . import db as _db
+
+_lock = threading.Lock()
+
+
+def _data_dir():
+	return os.path.dirname(_db.db_path)
+
+
+def registry_path():
+	return config.ACCOUNTS_FILE or os.path.join(_data_dir(), 'accounts.json')
+
+
+def _load():
+	try:
+		with open(registry_path(), 'r', encoding='utf-8') as f:
+			return json.load(f)
+	except FileNotFoundError:
+		return {}
+
+
+def _save(accounts):
+	path = registry_path()
+	directory = os.path.dirname(path)
+	if directory:
+		os.makedirs(directory, exist_ok=True)
+	tmp_path = f"{path}.tmp"
+	with open(tmp_path, 'w', encoding='utf-8') as f:
+		json.dump(accounts, f, indent=2, sort_keys=True)
+	os.replace(tmp_path, path)
+
+
+def list_accounts():
+	"""Registered account names, sorted."""
+	with _lock:
+		return sorted(_load())
+
+
+def get_account(name):
+	"""The registry entry for name; raises KeyError for unknown accounts."""
+	with _lock:
+		accounts = _load()
+	if name not in accounts:
+		raise KeyError(f"Unknown account '{name}' (registered: {', '.join(sorted(accounts)) or 'none'})")
+	return accounts[name]
+
+
+def add_account(name, token_cache=None, requests_per_second=None):
+	"""Register (or update) an account; the token cache defaults to data/tokens/<name>.json."""
+	if not re.fullmatch(r"[\w.-]+", name):
+		raise ValueError(f"Account names may only contain letters, digits, '_', '.' and '-': {name!r}")
+	entry = {'token_cache': token_cache or os.path.join(_data_dir(), 'tokens', f"{name}.json")}
+	if requests_per_second:
+		entry['requests_per_second'] = float(requests_per_second)
+	with _lock:
+		accounts = _load()
+		accounts[name] = entry
+		_save(accounts)
+	return entry
+
+
+def remove_account(name):
+	with _lock:
+		accounts = _load()
+		if accounts.pop(name, None) is not None:
+			_save(accounts)
@@ -7,41 +7,82 @@ All configuration is managed via the project config, with no hardcoded values.
 """
 
 
+import asyncio
+import httpx
+import requests
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib3.util.retry import Retry
 from . import config
+from .ratelimit import TokenBucket
+from .cache import PersistentCache, normalize_query
+from .catalog import get_catalog, compact_track
+from . import accounts
+from .resilience import get_breaker
+from . import metrics
+from . import output
 import os
 import logging
+import threading
+import time
 
-# Setup logging from config
-log_kwargs = {'level': getattr(logging, config.LOG_LEVEL, logging.INFO), 'format': '[%(levelname)s] %(message)s'}
+# Setup logging from config; quiet/verbose output modes (src/output.py) raise or lower the level
+log_kwargs = {'level': output.log_level(), 'format': '[%(levelname)s] %(message)s'}
 if config.LOG_FILE:
 	log_kwargs['filename'] = config.LOG_FILE
 logging.basicConfig(**log_kwargs)
 
+# Spotify accepts at most 100 items per playlist add request
+PLAYLIST_ADD_CHUNK = 100
+# ... and at most 100 ids per audio-features request
+AUDIO_FEATURES_CHUNK = 100
+# A 403 from the audio features endpoint is remembered (in the catalog database) this long before it is tried again
+AUDIO_FEATURES_RECHECK_SECONDS = 7 * 86400
+# Known playlist contents are re-fetched after this long, in case the playlist was edited elsewhere
+PLAYLIST_CONTENTS_TTL_SECONDS = 300
+
+# 429 is left out so it surfaces with its Retry-After header to SpotifyAPI._call
+_RETRY_STATUSES = (500, 502, 503, 504)
+# The asyncio requests refresh their cached bearer token this long before it expires
+_TOKEN_REFRESH_MARGIN_SECONDS = 60
+
 
 class SpotifyAPI:
-	def __init__(self):
-		logging.info(f"Spotify token cache path: {config.SPOTIFY_TOKEN_CACHE}")
-		if os.path.exists(config.SPOTIFY_TOKEN_CACHE):
+	def __init__(self, account=None, interactive=True):
+		"""
+		account: a name from the account registry (src/accounts.py); None uses [spotify] token_cache.
+		interactive: run the paste-the-redirect-URL auth flow when there is no valid cached token;
+		otherwise fail (batch worker processes have no terminal).
+		"""
+		self.account = account
+		entry = accounts.get_account(account) if account else {}
+		token_cache = entry.get('token_cache') or config.SPOTIFY_TOKEN_CACHE
+		logging.info("Spotify token cache path: %s", token_cache)
+		if os.path.exists(token_cache):
 			logging.info("Token cache file exists.")
 		else:
 			logging.info("Token cache file does NOT exist.")
+			os.makedirs(os.path.dirname(token_cache) or '.', exist_ok=True)
 
 		self.oauth = SpotifyOAuth(
 			client_id=config.SPOTIFY_CLIENT_ID,
 			client_secret=config.SPOTIFY_CLIENT_SECRET,
 			redirect_uri=config.SPOTIFY_REDIRECT_URI,
 			scope=config.SPOTIFY_SCOPE,
-			cache_path=config.SPOTIFY_TOKEN_CACHE,
+			cache_path=token_cache,
 			open_browser=False
 		)
 		try:
 			token_info = self.oauth.get_cached_token()
 			if token_info:
 				logging.info("Loaded cached Spotify token.")
+			elif not interactive:
+				raise Exception(f"No valid cached Spotify token in {token_cache}; authorize it first (playlist-worker.py --add-account)")
 			else:
 				logging.info("No valid cached token found. Starting auth flow.")
+				if account:
+					print(f"\n[Spotify Auth] Authorizing account '{account}': log in to Spotify as that user.")
 				auth_url = self.oauth.get_authorize_url()
 				print("\n[Spotify Auth] Please open the following URL in your browser to authorize the app:")
 				print(auth_url)
@@ -56,35 +97,540 @@ class SpotifyAPI:
 				access_token = token_info
 			if not access_token:
 				raise Exception("Failed to obtain Spotify access token.")
-			self.sp = spotipy.Spotify(auth=access_token)
+			# auth_manager (not a raw token) lets spotipy refresh the token from the cache before it expires
+			self.sp = spotipy.Spotify(
+				auth_manager=self.oauth,
+				requests_session=_pooled_session()
+			)
 		except Exception as e:
-			logging.error(f"Spotify authentication failed: {e}")
+			logging.error("Spotify authentication failed: %s", e)
 			raise
+		# Request budget per account; the search cache, catalog and breaker are shared by every account in the process
+		self.limiter = TokenBucket(entry.get('requests_per_second') or config.SPOTIFY_REQUESTS_PER_SECOND)
+		self.breaker = get_breaker('spotify')
+		self.track_cache = _get_track_cache()
+		self.catalog = get_catalog() if config.CATALOG_ENABLED else None
+		self._executor = None
+		self._executor_lock = threading.Lock()
+		self._playlist_contents = {}  # playlist_id -> (set of track ids known to be in it, monotonic time fetched)
+		self._contents_lock = threading.Lock()
+		self._user = None
+		self._token_info = None  # bearer token for the asyncio requests, see _access_token_async
+
+	def current_user(self):
+		"""The authenticated user's profile, fetched once per client."""
+		if self._user is None:
+			self._user = self._call(self.sp.current_user)
+		return self._user
+
+	@property
+	def user_id(self):
+		return self.current_user()['id']
+
+	def _call(self, fn, *args, **kwargs):
+		"""
+		Run a spotipy call through the shared rate limiter and the Spotify circuit breaker.
+		On 429, pauses the limiter for Retry-After seconds and retries.
+		"""
+		attempt = 0
+		while True:
+			self.limiter.acquire()
+			try:
+				with self.breaker.guard(_is_outage), metrics.span(f"spotify.{getattr(fn, '__name__', 'call')}"):
+					return fn(*args, **kwargs)
+			except spotipy.SpotifyException as e:
+				if not _is_rate_limited(e) or attempt >= config.SPOTIFY_MAX_RETRIES:
+					raise
+				attempt += 1
+				metrics.incr('retries_total', service='spotify')
+				retry_after = _retry_after_seconds(getattr(e, 'headers', None))
+				logging.warning("[SpotifyAPI] Rate limited (429), retry %s/%s in %ss", attempt, config.SPOTIFY_MAX_RETRIES, retry_after)
+				self.limiter.pause(retry_after)
+
+	def _get_executor(self):
+		with self._executor_lock:
+			if self._executor is None:
+				self._executor = ThreadPoolExecutor(
+					max_workers=config.SPOTIFY_MAX_CONCURRENCY,
+					thread_name_prefix='spotify'
+				)
+			return self._executor
 
 
 	def create_playlist(self, user_id, name, description=""):
-		logging.info(f"[SpotifyAPI] Creating playlist for user_id={user_id}, name='{name}', description='{description}'")
-		playlist = self.sp.user_playlist_create(user=user_id, name=name, description=description)
-		logging.info(f"[SpotifyAPI] Created playlist: {playlist}")
+		logging.info("[SpotifyAPI] Creating playlist for user_id=%s, name='%s', description='%s'", user_id, name, output.preview(description))
+		playlist = self._call(self.sp.user_playlist_create, user=user_id, name=name, description=description)
+		logging.info("[SpotifyAPI] Created playlist: id=%s, name='%s'", playlist['id'], playlist.get('name'))
+		logging.debug("[SpotifyAPI] Playlist object: %s", output.preview(playlist))
+		self._remember_contents(playlist['id'], ())
 		return playlist
 
-	def add_tracks_to_playlist(self, playlist_id, track_ids):
-		logging.info(f"[SpotifyAPI] Adding tracks to playlist_id={playlist_id}, track_ids={track_ids}")
-		result = self.sp.playlist_add_items(playlist_id, track_ids)
-		logging.info(f"[SpotifyAPI] Add tracks result: {result}")
+	def _known_contents(self, playlist_id):
+		"""Track ids known to be in the playlist, or None if unknown or older than PLAYLIST_CONTENTS_TTL_SECONDS."""
+		with self._contents_lock:
+			entry = self._playlist_contents.get(playlist_id)
+		if entry is None or time.monotonic() - entry[1] > PLAYLIST_CONTENTS_TTL_SECONDS:
+			return None
+		return entry[0]
+
+	def _remember_contents(self, playlist_id, track_ids):
+		with self._contents_lock:
+			self._playlist_contents[playlist_id] = (set(track_ids), time.monotonic())
+
+	def _contents_added(self, playlist_id, track_ids):
+		"""Record a successful add; contents that were never fetched stay unknown."""
+		with self._contents_lock:
+			entry = self._playlist_contents.get(playlist_id)
+			if entry is not None:
+				entry[0].update(track_ids)
+
+	def forget_playlist_contents(self, playlist_id):
+		"""Drop the known contents of a playlist, so the next add fetches them again."""
+		with self._contents_lock:
+			self._playlist_contents.pop(playlist_id, None)
+
+	def _existing_track_ids(self, playlist_id):
+		known = self._known_contents(playlist_id)
+		if known is None:
+			known = {t['id'] for t in self.get_playlist_tracks(playlist_id)}
+			self._remember_contents(playlist_id, known)
+		return known
+
+	def add_tracks_to_playlist(self, playlist_id, track_ids, skip_existing=True, existing_ids=None):
+		"""
+		Add tracks in order, in chunks of 100 (Spotify's per-request limit).
+		Duplicates within track_ids and, with skip_existing, tracks already in the playlist are
+		skipped. Playlist contents are fetched once and cached per process for
+		PLAYLIST_CONTENTS_TTL_SECONDS; pass existing_ids (e.g. from an up-to-date PlaylistIndex)
+		to skip that fetch. A failed add forgets the cached contents, since the chunk may have
+		been partly applied.
+		Returns counts: added, skipped, failed, plus the last snapshot_id.
+		"""
+		logging.info("[SpotifyAPI] Adding %d tracks to playlist_id=%s", len(track_ids), playlist_id)
+		if existing_ids is not None:
+			self._remember_contents(playlist_id, existing_ids)
+		existing = self._existing_track_ids(playlist_id) if skip_existing else set()
+		to_add = _new_track_ids(track_ids, existing)
+		result = {'added': 0, 'skipped': len(track_ids) - len(to_add), 'failed': 0, 'snapshot_id': None}
+		for start in range(0, len(to_add), PLAYLIST_ADD_CHUNK):
+			chunk = to_add[start:start + PLAYLIST_ADD_CHUNK]
+			try:
+				response = self._call(self.sp.playlist_add_items, playlist_id, chunk)
+			except Exception as e:
+				logging.error("[SpotifyAPI] Failed to add %d tracks to playlist_id=%s: %s", len(chunk), playlist_id, e)
+				result['failed'] += len(chunk)
+				self.forget_playlist_contents(playlist_id)
+				continue
+			result['added'] += len(chunk)
+			result['snapshot_id'] = response.get('snapshot_id')
+			self._contents_added(playlist_id, chunk)
+		logging.info("[SpotifyAPI] Add tracks result: %s", result)
 		return result
 
-	def search_tracks(self, query, limit=10):
-		logging.info(f"[SpotifyAPI] Searching tracks with query='{query}', limit={limit}")
-		results = self.sp.search(q=query, type='track', limit=limit)
-		items = results['tracks']['items']
-		logging.info(f"[SpotifyAPI] Found {len(items)} tracks for query='{query}'")
+	def search_tracks(self, query, limit=10, use_cache=True):
+		cache_key = f"{limit}|{normalize_query(query)}"
+		if use_cache:
+			items = self.track_cache.get(cache_key)
+			if items is not None:
+				logging.info("[SpotifyAPI] Cache hit for query='%s' (%d tracks)", query, len(items))
+				return items
+			items = self._catalog_lookup(query, limit)
+			if items:
+				return items
+		logging.info("[SpotifyAPI] Searching tracks with query='%s', limit=%s", query, limit)
+		results = self._call(self.sp.search, q=query, type='track', limit=limit)
+		items = _compact_items(results['tracks']['items'])
+		logging.info("[SpotifyAPI] Found %d tracks for query='%s'", len(items), query)
+		# An empty result may be a transient search miss (new release, indexing lag); ask again next time
+		if items:
+			self.track_cache.set(cache_key, items)
+		self._catalog_add(items)
+		return items
+
+	def _catalog_lookup(self, query, limit):
+		if self.catalog is None:
+			return []
+		try:
+			items = self.catalog.lookup(query, limit=limit)
+		except Exception as e:
+			logging.error("[SpotifyAPI] Catalog lookup failed for query='%s': %s", query, e)
+			return []
+		if items:
+			logging.info("[SpotifyAPI] Catalog hit for query='%s' (%d tracks)", query, len(items))
+		return items
+
+	def _catalog_add(self, items):
+		if self.catalog is None:
+			return
+		try:
+			self.catalog.add_tracks(items, 'search')
+		except Exception as e:
+			logging.error("[SpotifyAPI] Could not add search results to catalog: %s", e)
+
+	def get_saved_tracks(self):
+		"""Every track in the user's library (Liked Songs), as full track objects; needs the user-library-read scope."""
+		logging.info("[SpotifyAPI] Getting saved tracks")
+		first_page = self._call(self.sp.current_user_saved_tracks, limit=50)
+		tracks = [item['track'] for item in self._all_pages(first_page) if item.get('track')]
+		logging.info("[SpotifyAPI] Retrieved %d saved tracks", len(tracks))
+		return tracks
+
+	def get_audio_features(self, track_ids):
+		"""
+		Audio features (energy, valence, tempo, ...) per track id, requested 100 ids at a time and
+		cached by id in the catalog database. Returns {id: features or None (Spotify has none)};
+		ids are left out when they could not be fetched. Spotify answers 403 for apps registered
+		after the endpoint was deprecated (November 2024); the endpoint is then not tried again
+		for AUDIO_FEATURES_RECHECK_SECONDS, by this or any later process.
+		"""
+		global _audio_features_unavailable
+		store = get_catalog()
+		ids = list(dict.fromkeys(tid for tid in track_ids if tid))
+		features = store.get_audio_features(ids)
+		missing = [tid for tid in ids if tid not in features]
+		metrics.incr('cache_hits_total', len(ids) - len(missing), cache='audio_features')
+		metrics.incr('cache_misses_total', len(missing), cache='audio_features')
+		for start in range(0, len(missing), AUDIO_FEATURES_CHUNK):
+			if not audio_features_available():
+				break
+			chunk = missing[start:start + AUDIO_FEATURES_CHUNK]
+			try:
+				items = self._call(self.sp.audio_features, chunk) or []
+			except spotipy.SpotifyException as e:
+				if e.http_status == 403:
+					_audio_features_unavailable = True
+					logging.warning("[SpotifyAPI] Audio features endpoint not available to this app (403); mood-fit scoring is off")
+					_remember_audio_features_forbidden(store)
+				else:
+					logging.error("[SpotifyAPI] Audio features request for %d tracks failed: %s", len(chunk), e)
+				break
+			features.update(store.add_audio_features(dict(zip(chunk, items))))
+		logging.info("[SpotifyAPI] Audio features for %d of %d tracks (%d not cached)", sum(1 for v in features.values() if v), len(ids), len(missing))
+		return features
+
+	def _all_pages(self, page):
+		"""Follow a paging object's `next` links and return every item."""
+		items = list(page['items'])
+		while page.get('next'):
+			page = self._call(self.sp.next, page)
+			items.extend(page['items'])
 		return items
 
 	def get_user_playlists(self, user_id):
-		logging.info(f"[SpotifyAPI] Getting playlists for user_id={user_id}")
-		playlists = self.sp.user_playlists(user_id)
-		logging.info(f"[SpotifyAPI] Retrieved playlists: {playlists}")
-		return playlists
+		logging.info("[SpotifyAPI] Getting playlists for user_id=%s", user_id)
+		first_page = self._call(self.sp.user_playlists, user_id, limit=50)
+		items = self._all_pages(first_page)
+		logging.info("[SpotifyAPI] Retrieved %d playlists across all pages", len(items))
+		return {'items': items, 'total': first_page.get('total', len(items))}
+
+	def get_playlist_snapshot_id(self, playlist_id):
+		"""The playlist's current snapshot_id (changes whenever its tracks do)."""
+		return self._call(self.sp.playlist, playlist_id, fields='snapshot_id')['snapshot_id']
+
+	def get_playlist_tracks(self, playlist_id):
+		"""Return every track in a playlist as compact dicts (id, name, artists), following pagination."""
+		logging.info("[SpotifyAPI] Getting tracks for playlist_id=%s", playlist_id)
+		first_page = self._call(
+			self.sp.playlist_items,
+			playlist_id,
+			fields='items(track(id,name,artists(name))),next',
+			limit=100,
+			additional_types=('track',)
+		)
+		tracks = []
+		for item in self._all_pages(first_page):
+			track = item.get('track')
+			if track and track.get('id'):
+				tracks.append({
+					'id': track['id'],
+					'name': track.get('name', ''),
+					'artists': [a['name'] for a in track.get('artists', [])]
+				})
+		logging.info("[SpotifyAPI] Retrieved %d tracks for playlist_id=%s", len(tracks), playlist_id)
+		return tracks
+
+	def submit(self, fn, *args, **kwargs):
+		"""Run fn on the bounded Spotify worker pool and return its Future."""
+		return metrics.submit(self._get_executor(), fn, *args, **kwargs)
+
+	def _search_or_empty(self, query, limit):
+		try:
+			return self.search_tracks(query, limit=limit)
+		except Exception as e:
+			logging.error("[SpotifyAPI] Search failed for query='%s': %s", query, e)
+			return []
+
+	def submit_search(self, query, limit=10):
+		"""
+		Queue a track search on the bounded worker pool and return its Future.
+		Failed searches resolve to an empty list instead of raising.
+		"""
+		return self.submit(self._search_or_empty, query, limit)
+
+	def collect_searches(self, futures, timeout=None):
+		"""
+		Results of submit_search futures, in order. Searches not finished after timeout seconds
+		are cancelled and count as empty, so the caller keeps whatever was found so far.
+		"""
+		done, pending = wait(futures, timeout=timeout)
+		if pending:
+			for future in pending:
+				future.cancel()
+			logging.warning("[SpotifyAPI] %d of %d searches still pending after %.1fs; continuing without them", len(pending), len(futures), timeout)
+			metrics.incr('searches_abandoned_total', len(pending))
+		results = [future.result() if future in done else [] for future in futures]
+		self.track_cache.flush()
+		return results
+
+	def resolve_tracks(self, queries, limit=1, timeout=None):
+		"""
+		Search many queries concurrently (at most max_concurrency in flight).
+		Returns one result list per query, in the original query order; with timeout, see collect_searches.
+		"""
+		futures = [self.submit_search(query, limit=limit) for query in queries]
+		results = self.collect_searches(futures, timeout)
+		logging.info("[SpotifyAPI] Track cache stats: %s", self.track_cache.stats())
+		return results
+
+	# --- Asyncio counterparts (used by util/moodyasync.py) ---
+	# Raw Web API requests over a caller-owned httpx.AsyncClient. They share this client's
+	# token, rate limiter, track cache and playlist contents with the blocking methods above.
+
+	async def _access_token_async(self):
+		"""
+		Bearer token for the asyncio requests. Reading (and refreshing) it goes through spotipy's
+		token cache file, so that only happens in a worker thread, once the token is about to expire.
+		"""
+		info = self._token_info
+		if info is None or info['expires_at'] - time.time() < _TOKEN_REFRESH_MARGIN_SECONDS:
+			info = await asyncio.to_thread(lambda: self.oauth.validate_token(self.oauth.cache_handler.get_cached_token()))
+			if not info or not info.get('access_token'):
+				raise Exception("No valid Spotify access token; authorize the account again.")
+			self._token_info = info
+		return info['access_token']
+
+	async def _call_async(self, client, method, path, name, params=None, payload=None):
+		"""
+		Send one Web API request through the shared rate limiter and the Spotify circuit breaker.
+		429s pause the limiter for Retry-After seconds; 5xx responses and transport errors
+		(connection failures, timeouts) are retried with backoff.
+		"""
+		url = self.sp.prefix + path
+		rate_limited = 0
+		server_errors = 0
+		while True:
+			await self.limiter.acquire_async()
+			headers = {'Authorization': f"Bearer {await self._access_token_async()}"}
+			# Like the blocking session, a retried error only counts against the breaker once retries are used up
+			final_attempt = server_errors >= spotipy.Spotify.max_retries
+			try:
+				with self.breaker.guard(lambda e: _is_outage(e) and (final_attempt or not _is_retryable_async(e))), metrics.span(f"spotify.{name}"):
+					resp = await client.request(method, url, params=params, json=payload, headers=headers)
+					if resp.status_code in _RETRY_STATUSES:
+						raise spotipy.SpotifyException(resp.status_code, -1, f"{method} {url}: {resp.text}", headers=resp.headers)
+			except (spotipy.SpotifyException, httpx.TransportError):
+				if final_attempt:
+					raise
+				server_errors += 1
+				await asyncio.sleep(0.3 * 2 ** (server_errors - 1))
+				continue
+			if resp.status_code == 429 and rate_limited < config.SPOTIFY_MAX_RETRIES:
+				rate_limited += 1
+				metrics.incr('retries_total', service='spotify')
+				retry_after = _retry_after_seconds(resp.headers)
+				logging.warning("[SpotifyAPI] Rate limited (429), retry %s/%s in %ss", rate_limited, config.SPOTIFY_MAX_RETRIES, retry_after)
+				self.limiter.pause(retry_after)
+				continue
+			if resp.status_code >= 400:
+				raise spotipy.SpotifyException(resp.status_code, -1, f"{method} {url}: {resp.text}", headers=resp.headers)
+			return resp.json() if resp.content else None
+
+	async def search_tracks_async(self, client, query, limit=10, use_cache=True):
+		cache_key = f"{limit}|{normalize_query(query)}"
+		# The SQLite-backed cache and catalog do blocking file I/O, so they run off the event loop
+		if use_cache:
+			items = await asyncio.to_thread(self.track_cache.get, cache_key)
+			if items is not None:
+				logging.info("[SpotifyAPI] Cache hit for query='%s' (%d tracks)", query, len(items))
+				return items
+			items = await asyncio.to_thread(self._catalog_lookup, query, limit)
+			if items:
+				return items
+		logging.info("[SpotifyAPI] Async search for tracks with query='%s', limit=%s", query, limit)
+		results = await self._call_async(client, 'GET', 'search', 'search', params={'q': query, 'type': 'track', 'limit': limit})
+		items = _compact_items(results['tracks']['items'])
+		logging.info("[SpotifyAPI] Found %d tracks for query='%s'", len(items), query)
+		if items:
+			await asyncio.to_thread(self.track_cache.set, cache_key, items)
+		await asyncio.to_thread(self._catalog_add, items)
+		return items
+
+	async def search_tracks_or_empty_async(self, client, query, limit=10):
+		"""search_tracks_async that logs failures and returns an empty list instead of raising."""
+		try:
+			return await self.search_tracks_async(client, query, limit=limit)
+		except Exception as e:
+			logging.error("[SpotifyAPI] Search failed for query='%s': %s", query, e)
+			return []
+
+	async def create_playlist_async(self, client, user_id, name, description=""):
+		logging.info("[SpotifyAPI] Creating playlist (async) for user_id=%s, name='%s'", user_id, name)
+		playlist = await self._call_async(
+			client, 'POST', f"users/{user_id}/playlists", 'user_playlist_create',
+			payload={'name': name, 'public': True, 'collaborative': False, 'description': description}
+		)
+		self._remember_contents(playlist['id'], ())
+		return playlist
+
+	async def add_tracks_to_playlist_async(self, client, playlist_id, track_ids):
+		"""Async add_tracks_to_playlist (skip_existing=True): same chunking, de-duplication and result counts."""
+		logging.info("[SpotifyAPI] Adding %d tracks (async) to playlist_id=%s", len(track_ids), playlist_id)
+		known = self._known_contents(playlist_id)
+		existing = known if known is not None else await asyncio.to_thread(self._existing_track_ids, playlist_id)
+		to_add = _new_track_ids(track_ids, existing)
+		result = {'added': 0, 'skipped': len(track_ids) - len(to_add), 'failed': 0, 'snapshot_id': None}
+		for start in range(0, len(to_add), PLAYLIST_ADD_CHUNK):
+			chunk = to_add[start:start + PLAYLIST_ADD_CHUNK]
+			try:
+				response = await self._call_async(
+					client, 'POST', f"playlists/{playlist_id}/items", 'playlist_add_items',
+					payload={'uris': [f"spotify:track:{track_id}" for track_id in chunk]}
+				)
+			except Exception as e:
+				logging.error("[SpotifyAPI] Failed to add %d tracks to playlist_id=%s: %s", len(chunk), playlist_id, e)
+				result['failed'] += len(chunk)
+				self.forget_playlist_contents(playlist_id)
+				continue
+			result['added'] += len(chunk)
+			result['snapshot_id'] = (response or {}).get('snapshot_id')
+			self._contents_added(playlist_id, chunk)
+		logging.info("[SpotifyAPI] Add tracks result: %s", result)
+		return result
 
 	# Add more methods as needed for your use case
+
+
+_shared_apis = {}  # account name (None = [spotify] token_cache) -> SpotifyAPI
+_track_cache = None
+_track_cache_lock = threading.Lock()
+_shared_lock = threading.Lock()
+
+def get_api(account=None, interactive=True):
+	"""
+	Process-wide SpotifyAPI per account: auth, the HTTP pool and the user profile are set up once
+	and reused by the CLI, the moody pipeline and batch workers.
+	"""
+	with _shared_lock:
+		api = _shared_apis.get(account)
+		if api is None:
+			api = SpotifyAPI(account, interactive=interactive)
+			_shared_apis[account] = api
+		return api
+
+
+# Set when Spotify refuses the audio-features endpoint (403), shared by every client in the process
+_audio_features_unavailable = None  # None: not yet checked against the catalog database
+_AUDIO_FEATURES_NOTE = 'audio_features_forbidden'
+
+def audio_features_available():
+	"""False once Spotify refused audio features to this app (403), in this or a recent earlier process."""
+	global _audio_features_unavailable
+	if _audio_features_unavailable is None:
+		try:
+			_audio_features_unavailable = get_catalog().get_note(_AUDIO_FEATURES_NOTE, max_age=AUDIO_FEATURES_RECHECK_SECONDS) is not None
+		except Exception as e:
+			logging.warning("[SpotifyAPI] Could not read the audio features note from the catalog: %s", e)
+			_audio_features_unavailable = False
+	return not _audio_features_unavailable
+
+def _remember_audio_features_forbidden(store):
+	try:
+		store.set_note(_AUDIO_FEATURES_NOTE, '403')
+	except Exception as e:
+		logging.warning("[SpotifyAPI] Could not record the audio features 403 in the catalog: %s", e)
+
+def _compact_items(items):
+	# Full track objects carry markets, images and URLs that matching and playlists never read; cache and return only the used fields
+	return [compact_track(item) for item in items if item and item.get('id')]
+
+def _get_track_cache():
+	# One PersistentCache per process: one connection and one batch of pending recency updates for every client
+	global _track_cache
+	with _track_cache_lock:
+		if _track_cache is None:
+			_track_cache = PersistentCache(
+				'track_search_cache',
+				ttl_seconds=config.TRACK_CACHE_TTL_DAYS * 86400,
+				max_entries=config.TRACK_CACHE_MAX_ENTRIES
+			)
+		return _track_cache
+
+
+def _pooled_session():
+	"""
+	Keep-alive session sized so every worker thread gets its own pooled connection.
+	Mirrors spotipy's own session retry policy (5xx only; 429 is handled by SpotifyAPI._call).
+	urllib3 would otherwise sleep through a 429's Retry-After itself, per thread, and the
+	shared limiter would never be paused.
+	"""
+	session = requests.Session()
+	pool_size = max(10, config.SPOTIFY_MAX_CONCURRENCY)
+	retry = Retry(
+		total=spotipy.Spotify.max_retries,
+		connect=None,
+		read=False,
+		allowed_methods=frozenset(['GET', 'POST', 'PUT', 'DELETE']),
+		status=spotipy.Spotify.max_retries,
+		backoff_factor=0.3,
+		status_forcelist=_RETRY_STATUSES,
+		respect_retry_after_header=False,
+		# Return the last 5xx once retries are used up, so spotipy raises it with its real status
+		raise_on_status=False
+	)
+	adapter = requests.adapters.HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+	session.mount('https://', adapter)
+	session.mount('http://', adapter)
+	return session
+
+
+def _new_track_ids(track_ids, existing):
+	"""track_ids in order, without duplicates and without ids in existing."""
+	seen = set()
+	to_add = []
+	for track_id in track_ids:
+		if track_id in seen or track_id in existing:
+			continue
+		seen.add(track_id)
+		to_add.append(track_id)
+	return to_add
+
+
+def _is_outage(e):
+	"""Errors that say Spotify is unavailable (5xx, connection errors, timeouts) rather than that the request was wrong."""
+	if isinstance(e, spotipy.SpotifyException):
+		return e.http_status is None or e.http_status >= 500 or _retries_exhausted(e)
+	return True
+
+
+def _is_retryable_async(e):
+	"""Errors _call_async retries with backoff: 5xx responses and transport errors."""
+	if isinstance(e, spotipy.SpotifyException):
+		return e.http_status in _RETRY_STATUSES
+	return isinstance(e, httpx.TransportError)
+
+
+def _retries_exhausted(e):
+	# spotipy reports a session RetryError as 429 "Max Retries"; it is an outage, not a rate limit
+	return e.http_status == 429 and 'Max Retries' in str(e.msg)
+
+
+def _is_rate_limited(e):
+	return e.http_status == 429 and not _retries_exhausted(e)
+
+
+def _retry_after_seconds(headers, default=1.0):
+	headers = headers or {}
+	try:
+		return max(float(headers.get('Retry-After', default)), 0.0)
+	except (TypeError, ValueError):
+		return default
@@ -0,0 +1,165 @@
+"""
+Persistent Cache Utility Module
+-------------------------------
+Small key/value caches stored in SQLite (data/cache.sqlite3 next to spotify_db.json), one table
+per cache, in WAL mode so batch worker processes can share the file. Entries expire after a TTL
+and each table is capped by least-recently-used eviction. A miss writes one row (not the whole
+database file); recency from cache hits is written back in batches.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from . import db as _db
+from . import metrics
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+	key TEXT PRIMARY KEY,
+	value_json TEXT NOT NULL,
+	stored_at REAL NOT NULL,
+	last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS {table}_last_used ON {table} (last_used);
+"""
+
+
+def normalize_query(query):
+	"""Canonical cache key for a search query: casefolded, punctuation-free, single-spaced."""
+	return ' '.join(re.sub(r"[^\w\s:]", ' ', query.casefold()).split())
+
+
+def default_path():
+	return os.path.join(os.path.dirname(_db.db_path), 'cache.sqlite3')
+
+
+class PersistentCache:
+	def __init__(self, table_name, ttl_seconds, max_entries, path=None):
+		if not table_name.isidentifier():
+			raise ValueError(f"Invalid cache table name: {table_name!r}")
+		self.table_name = table_name
+		self.path = path
+		self.ttl_seconds = ttl_seconds
+		self.max_entries = max_entries
+		self.hits = 0
+		self.misses = 0
+		self.expirations = 0
+		self.evictions = 0
+		self._conn = None
+		self._lock = threading.Lock()
+		self._touched = {}  # key -> last_used from hits not yet written back
+
+	def _connection(self):
+		# Opened on first use so constructing a cache does not touch the disk; one connection shared by all threads, serialized by self._lock
+		if self._conn is None:
+			path = self.path or default_path()
+			directory = os.path.dirname(path)
+			if directory:
+				os.makedirs(directory, exist_ok=True)
+			conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.execute("PRAGMA synchronous=NORMAL")
+			conn.executescript(_SCHEMA.format(table=self.table_name))
+			self._conn = conn
+			self._drop_legacy_table()
+		return self._conn
+
+	def _drop_legacy_table(self):
+		# Earlier versions kept this cache in a TinyDB table of spotify_db.json; dropping it stops
+		# every playlist-index write from rewriting the cached payloads along with it
+		if not os.path.exists(_db.db_path):
+			return
+		try:
+			with _db.lock:
+				legacy = _db.get_db()
+				if self.table_name in legacy.tables():
+					legacy.drop_table(self.table_name)
+					logging.info(f"[Cache:{self.table_name}] Dropped the old cache table from {_db.db_path}")
+		except Exception as e:
+			logging.warning(f"[Cache:{self.table_name}] Could not drop the old cache table from {_db.db_path}: {e}")
+
+	def _expired(self, stored_at, now):
+		return self.ttl_seconds and now - stored_at > self.ttl_seconds
+
+	def get(self, key, default=None):
+		with self._lock:
+			conn = self._connection()
+			row = conn.execute(f"SELECT value_json, stored_at FROM {self.table_name} WHERE key = ?", (key,)).fetchone()
+			now = time.time()
+			if row is not None and self._expired(row[1], now):
+				with conn:
+					conn.execute(f"DELETE FROM {self.table_name} WHERE key = ?", (key,))
+				self._touched.pop(key, None)
+				self.expirations += 1
+				row = None
+			if row is None:
+				self.misses += 1
+				metrics.incr('cache_misses_total', cache=self.table_name)
+				return default
+			self.hits += 1
+			metrics.incr('cache_hits_total', cache=self.table_name)
+			self._touched[key] = now
+		return json.loads(row[0])
+
+	def set(self, key, value):
+		value_json = json.dumps(value, ensure_ascii=False)
+		with self._lock:
+			conn = self._connection()
+			now = time.time()
+			with conn:
+				# Recency first, so eviction below sees which entries were used
+				self._flush_touched(conn)
+				conn.execute(
+					f"INSERT OR REPLACE INTO {self.table_name} (key, value_json, stored_at, last_used) VALUES (?, ?, ?, ?)",
+					(key, value_json, now, now)
+				)
+				if self.max_entries:
+					overflow = conn.execute(f"SELECT COUNT(*) FROM {self.table_name}").fetchone()[0] - self.max_entries
+					if overflow > 0:
+						conn.execute(
+							f"DELETE FROM {self.table_name} WHERE key IN (SELECT key FROM {self.table_name} ORDER BY last_used LIMIT ?)",
+							(overflow,)
+						)
+						self.evictions += overflow
+
+	def _flush_touched(self, conn):
+		if not self._touched:
+			return
+		conn.executemany(
+			f"UPDATE {self.table_name} SET last_used = ? WHERE key = ?",
+			[(last_used, key) for key, last_used in self._touched.items()]
+		)
+		self._touched.clear()
+
+	def flush(self):
+		"""Persist recency updates from cache hits."""
+		with self._lock:
+			if self._conn is not None and self._touched:
+				with self._conn:
+					self._flush_touched(self._conn)
+
+	def stats(self):
+		with self._lock:
+			entries = self._connection().execute(f"SELECT COUNT(*) FROM {self.table_name}").fetchone()[0]
+		lookups = self.hits + self.misses
+		return {
+			'entries': entries,
+			'hits': self.hits,
+			'misses': self.misses,
+			'hit_rate': self.hits / lookups if lookups else 0.0,
+			'expirations': self.expirations,
+			'evictions': self.evictions,
+		}
+
+	def close(self):
+		with self._lock:
+			if self._conn is not None:
+				if self._touched:
+					with self._conn:
+						self._flush_touched(self._conn)
+				self._conn.close()
+				self._conn = None
@@ -0,0 +1,261 @@
+"""
+Track Catalog Module
+--------------------
+Local catalog of tracks the user already has (saved tracks, tracks in their playlists) plus
+tracks seen in earlier searches, so a suggested song can often be resolved without a Spotify
+search call.
+
+Stored in SQLite (data/catalog.sqlite3 next to spotify_db.json) with an inverted index from
+normalized title and artist tokens to track ids. A lookup only answers when it is confident:
+every title token must appear in the query, at least one distinctive artist token must match,
+and most of the query must be explained by the track. Anything else falls through to the network.
+
+The same database caches Spotify audio features by track id (they never change for an id), so
+mood-fit scoring only requests features for tracks it has not seen before, and keeps small notes
+that should outlive a process (e.g. that this app is refused audio features).
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from . import config
+from . import db as _db
+from . import metrics
+
+# Share of query tokens a catalog track must account for (title + artist) to be used
+MIN_COVERAGE = 0.6
+# Audio feature fields kept per track (the rest of Spotify's object is ids and URLs)
+AUDIO_FEATURE_FIELDS = ('danceability', 'energy', 'valence', 'tempo', 'acousticness', 'instrumentalness', 'speechiness', 'loudness', 'mode')
+# Artist tokens too common to count as an artist match on their own
+_ARTIST_STOPWORDS = {'the', 'a', 'an', 'and', 'of', 'feat', 'ft', 'featuring', 'with', 'x'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+	id TEXT PRIMARY KEY,
+	track_json TEXT NOT NULL,
+	title_tokens INTEGER NOT NULL,
+	source TEXT,
+	updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+	token TEXT NOT NULL,
+	field TEXT NOT NULL,
+	track_id TEXT NOT NULL,
+	PRIMARY KEY (token, field, track_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS audio_features (
+	id TEXT PRIMARY KEY,
+	features_json TEXT NOT NULL,
+	updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS notes (
+	key TEXT PRIMARY KEY,
+	value TEXT NOT NULL,
+	updated_at REAL NOT NULL
+);
+"""
+
+
+def tokenize(text):
+	return re.findall(r"\w+", text.casefold())
+
+
+def _title_tokens(title):
+	"""Tokens of the core title: ' - Remastered 2009' style suffixes and (feat. ...) brackets are dropped."""
+	core = re.sub(r"\s[-–]\s.*$", '', title)
+	core = re.sub(r"[\(\[].*?[\)\]]", ' ', core)
+	return set(tokenize(core)) or set(tokenize(title))
+
+
+def compact_track(track):
+	"""The subset of a Spotify track object the pipeline uses: id, uri, name, artist names, album name, popularity."""
+	artists = track.get('artists') or []
+	return {
+		'id': track['id'],
+		'name': track.get('name', ''),
+		'artists': [{'name': a['name']} if isinstance(a, dict) else {'name': a} for a in artists],
+		'album': {'name': (track.get('album') or {}).get('name', '')},
+		'popularity': track.get('popularity') or 0,
+		'uri': track.get('uri') or f"spotify:track:{track['id']}",
+	}
+
+
+def default_path():
+	return os.path.join(os.path.dirname(_db.db_path), 'catalog.sqlite3')
+
+
+class TrackCatalog:
+	def __init__(self, path=None):
+		self.path = path or default_path()
+		self._conn = None
+		self._lock = threading.Lock()
+
+	def _connection(self):
+		# Opened on first use; one connection shared by all threads, serialized by self._lock
+		if self._conn is None:
+			directory = os.path.dirname(self.path)
+			if directory:
+				os.makedirs(directory, exist_ok=True)
+			conn = sqlite3.connect(self.path, check_same_thread=False)
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.execute("PRAGMA synchronous=NORMAL")
+			conn.executescript(_SCHEMA)
+			self._conn = conn
+		return self._conn
+
+	def add_tracks(self, tracks, source):
+		"""Insert or refresh tracks (Spotify track objects or PlaylistIndex entries); returns how many were written."""
+		# A track id's title and artists never change, so refreshing only rewrites the stored JSON
+		rows, postings = [], []
+		now = time.time()
+		for track in tracks:
+			if not track or not track.get('id'):
+				continue
+			compact = compact_track(track)
+			title = _title_tokens(compact['name'])
+			artist = {token for a in compact['artists'] for token in tokenize(a['name'])}
+			rows.append((compact['id'], json.dumps(compact, ensure_ascii=False), len(title), source, now))
+			postings.extend((token, 't', compact['id']) for token in title)
+			postings.extend((token, 'a', compact['id']) for token in artist)
+		if not rows:
+			return 0
+		with self._lock:
+			conn = self._connection()
+			with conn:
+				conn.executemany("INSERT OR REPLACE INTO tracks (id, track_json, title_tokens, source, updated_at) VALUES (?, ?, ?, ?, ?)", rows)
+				conn.executemany("INSERT OR IGNORE INTO postings (token, field, track_id) VALUES (?, ?, ?)", postings)
+		return len(rows)
+
+	def lookup(self, query, limit=10):
+		"""
+		Tracks confidently matching a 'title artist' style query, best first (at most limit).
+		Returns an empty list when nothing qualifies.
+		"""
+		query_tokens = set(tokenize(query))
+		if not query_tokens:
+			return []
+		placeholders = ','.join('?' * len(query_tokens))
+		with self._lock:
+			conn = self._connection()
+			rows = conn.execute(
+				f"SELECT track_id, field, token FROM postings WHERE token IN ({placeholders})",
+				tuple(query_tokens)
+			).fetchall()
+			title_hits, artist_hits = {}, {}
+			for track_id, field, token in rows:
+				(title_hits if field == 't' else artist_hits).setdefault(track_id, set()).add(token)
+			candidates = [tid for tid in title_hits if any(t not in _ARTIST_STOPWORDS for t in artist_hits.get(tid, ()))]
+			if candidates:
+				found = conn.execute(
+					f"SELECT id, track_json, title_tokens FROM tracks WHERE id IN ({','.join('?' * len(candidates))})",
+					candidates
+				).fetchall()
+			else:
+				found = []
+		scored = []
+		for track_id, track_json, title_count in found:
+			title_matched = title_hits[track_id]
+			if len(title_matched) < title_count:
+				continue
+			coverage = len(title_matched | artist_hits[track_id]) / len(query_tokens)
+			if coverage < MIN_COVERAGE:
+				continue
+			track = json.loads(track_json)
+			scored.append((coverage, track.get('popularity') or 0, track))
+		scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+		metrics.incr('cache_hits_total' if scored else 'cache_misses_total', cache='catalog')
+		return [track for _, _, track in scored[:limit]]
+
+	def get_audio_features(self, track_ids):
+		"""Cached audio features for the given ids: {id: features or None}; ids never stored are left out."""
+		ids = list(dict.fromkeys(track_ids))
+		found = {}
+		with self._lock:
+			conn = self._connection()
+			# Stay well under SQLite's bound-parameter limit
+			for start in range(0, len(ids), 500):
+				chunk = ids[start:start + 500]
+				rows = conn.execute(
+					f"SELECT id, features_json FROM audio_features WHERE id IN ({','.join('?' * len(chunk))})", chunk
+				).fetchall()
+				found.update((track_id, json.loads(features_json)) for track_id, features_json in rows)
+		return found
+
+	def add_audio_features(self, features):
+		"""
+		Store {track_id: Spotify audio features object or None}; None records that Spotify has none
+		for the track. Returns the stored values ({id: AUDIO_FEATURE_FIELDS subset or None}).
+		"""
+		compact = {track_id: {k: item.get(k) for k in AUDIO_FEATURE_FIELDS} if item else None for track_id, item in features.items()}
+		if not compact:
+			return compact
+		now = time.time()
+		rows = [(track_id, json.dumps(value), now) for track_id, value in compact.items()]
+		with self._lock:
+			conn = self._connection()
+			with conn:
+				conn.executemany("INSERT OR REPLACE INTO audio_features (id, features_json, updated_at) VALUES (?, ?, ?)", rows)
+		return compact
+
+	def get_note(self, key, max_age=None):
+		"""A stored note's value, or None if there is none or it is older than max_age seconds."""
+		with self._lock:
+			row = self._connection().execute("SELECT value, updated_at FROM notes WHERE key = ?", (key,)).fetchone()
+		if row is None or (max_age is not None and time.time() - row[1] > max_age):
+			return None
+		return row[0]
+
+	def set_note(self, key, value):
+		with self._lock:
+			conn = self._connection()
+			with conn:
+				conn.execute("INSERT OR REPLACE INTO notes (key, value, updated_at) VALUES (?, ?, ?)", (key, value, time.time()))
+
+	def count(self):
+		with self._lock:
+			return self._connection().execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+
+	def add_playlist_index(self, index):
+		"""Add every track stored in a (synced) PlaylistIndex; no API calls."""
+		return self.add_tracks((t for pl in index.list_playlists() for t in (index.get_tracks(pl['id']) or [])), 'playlist')
+
+	def build(self, api, index=None):
+		"""
+		(Re)fill the catalog from the user's saved tracks and every playlist in the PlaylistIndex
+		(synced first). Returns counts per source.
+		"""
+		from .playlistindex import PlaylistIndex
+		index = index or PlaylistIndex()
+		index.sync(api, api.user_id)
+		counts = {'playlists': self.add_playlist_index(index)}
+		try:
+			counts['saved'] = self.add_tracks(api.get_saved_tracks(), 'saved')
+		except Exception as e:
+			# Needs the user-library-read scope; playlists alone still make a useful catalog
+			logging.warning(f"[TrackCatalog] Could not read saved tracks: {e}")
+			counts['saved'] = 0
+		counts['total'] = self.count()
+		logging.info(f"[TrackCatalog] Built catalog: {counts}")
+		return counts
+
+	def close(self):
+		with self._lock:
+			if self._conn is not None:
+				self._conn.close()
+				self._conn = None
+
+
+_shared_catalog = None
+_shared_lock = threading.Lock()
+
+def get_catalog():
+	"""Process-wide TrackCatalog ([catalog] file, or data/catalog.sqlite3 by default)."""
+	global _shared_catalog
+	with _shared_lock:
+		if _shared_catalog is None:
+			_shared_catalog = TrackCatalog(config.CATALOG_FILE or None)
+		return _shared_catalog
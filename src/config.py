@@ -3,8 +3,8 @@
 import configparser
 import os
 
-# Canonical config.ini path (project root)
-CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config.ini')
+# Canonical config.ini path (project root); SPOTIFY_WORKER_CONFIG points elsewhere (e.g. benchmarks)
+CONFIG_PATH = os.environ.get('SPOTIFY_WORKER_CONFIG') or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config.ini')
 
 config = configparser.ConfigParser()
 config.read(CONFIG_PATH)
@@ -20,6 +20,15 @@ try:
 except Exception as e:
 	raise RuntimeError(f"Missing required Spotify config: {e}")
 
+# Spotify request throttling (optional, sensible defaults)
+SPOTIFY_MAX_CONCURRENCY = config.getint('spotify', 'max_concurrency', fallback=8)
+SPOTIFY_REQUESTS_PER_SECOND = config.getfloat('spotify', 'requests_per_second', fallback=10.0)
+SPOTIFY_MAX_RETRIES = config.getint('spotify', 'max_retries', fallback=3)
+
+# Local caches in data/cache.sqlite3 (optional, sensible defaults)
+TRACK_CACHE_TTL_DAYS = config.getfloat('cache', 'track_ttl_days', fallback=30.0)
+TRACK_CACHE_MAX_ENTRIES = config.getint('cache', 'track_max_entries', fallback=5000)
+
 
 # Logging configuration (no fallbacks, fail if missing)
 try:
@@ -27,10 +36,46 @@ try:
 	LOG_FILE = config.get('logging', 'file')
 except Exception as e:
 	raise RuntimeError(f"Missing required logging config: {e}")
+# Console/log output policy (optional): quiet | normal | verbose; payloads in progress lines and logs are cut to max_payload_chars (0 = no limit)
+OUTPUT_MODE = config.get('logging', 'output', fallback='normal').strip().lower()
+OUTPUT_MAX_PAYLOAD_CHARS = config.getint('logging', 'max_payload_chars', fallback=300)
 
 # AI Playlist config (optional, but load if present)
 AI_PLAYLIST_PREFIX = config.get('AIPlayList', 'playlist_prefix')
+AI_PLAYLIST_SONG_COUNT = config.getint('AIPlayList', 'song_count', fallback=10)
+# 'single': one JSON completion for name + queries (falls back to 'split'); 'split': two parallel completions;
+# 'stream': queries are streamed line by line and searched on Spotify while the LLM is still generating
+AI_PLAYLIST_LLM_MODE = config.get('AIPlayList', 'llm_mode', fallback='single').strip().lower()
+# Approximate LLM tokens of thoughts-file context; the most relevant passages are kept (0 = whole file)
+AI_PLAYLIST_THOUGHTS_TOKEN_BUDGET = config.getint('AIPlayList', 'thoughts_token_budget', fallback=600)
+# Spotify search candidates fetched per song query and reranked locally (1 = take the first hit; max 50)
+AI_PLAYLIST_SEARCH_CANDIDATES = min(max(config.getint('AIPlayList', 'search_candidates', fallback=10), 1), 50)
+# Mood fit: ask for extra song queries (share of song_count), then keep the tracks whose audio features best fit the mood
+AI_PLAYLIST_MOOD_FIT = config.getboolean('AIPlayList', 'mood_fit', fallback=False)
+AI_PLAYLIST_MOOD_FIT_EXTRA = max(config.getfloat('AIPlayList', 'mood_fit_extra_queries', fallback=0.5), 0.0)
+
+
+# Per-run metrics export (optional): .prom/.txt writes Prometheus text, anything else JSON
+METRICS_EXPORT_FILE = config.get('metrics', 'export_file', fallback='')
 
+# Run history (optional): every generated playlist is appended to an indexed SQLite store
+HISTORY_ENABLED = config.getboolean('history', 'enabled', fallback=True)
+HISTORY_FILE = config.get('history', 'file', fallback='')
+
+# Deadlines and circuit breakers (optional): stage budgets are capped by what is left of the job deadline (0 = none)
+JOB_DEADLINE_SECONDS = config.getfloat('resilience', 'job_deadline_seconds', fallback=180.0)
+GOOGLE_TIMEOUT_SECONDS = config.getfloat('resilience', 'google_timeout_seconds', fallback=8.0)
+LLM_STAGE_SECONDS = config.getfloat('resilience', 'llm_stage_seconds', fallback=120.0)
+SPOTIFY_RESOLVE_SECONDS = config.getfloat('resilience', 'spotify_resolve_seconds', fallback=30.0)
+BREAKER_FAILURE_THRESHOLD = config.getint('resilience', 'breaker_failures', fallback=5)
+BREAKER_RESET_SECONDS = config.getfloat('resilience', 'breaker_reset_seconds', fallback=30.0)
+
+# Account registry (optional): named Spotify accounts with their own token caches, for multi-account batches
+ACCOUNTS_FILE = config.get('accounts', 'file', fallback='')
+
+# Local track catalog (optional): song queries are answered from known tracks before searching Spotify
+CATALOG_ENABLED = config.getboolean('catalog', 'enabled', fallback=True)
+CATALOG_FILE = config.get('catalog', 'file', fallback='')
 
 # Google Search API config (no fallbacks, fail if missing)
 try:
@@ -38,3 +83,8 @@ try:
 	GOOGLE_CSE_ID = config.get('SearchAPI', 'GoogleCSEID')
 except Exception as e:
 	raise RuntimeError(f"Missing required Google Search API config: {e}")
+
+# Google Search caching and bulk concurrency (optional, sensible defaults)
+GOOGLE_CACHE_TTL_HOURS = config.getfloat('SearchAPI', 'cache_ttl_hours', fallback=24.0)
+GOOGLE_CACHE_MAX_ENTRIES = config.getint('SearchAPI', 'cache_max_entries', fallback=1000)
+GOOGLE_MAX_CONCURRENCY = config.getint('SearchAPI', 'max_concurrency', fallback=4)
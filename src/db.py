@@ -1,5 +1,22 @@
 from tinydb import TinyDB, Query
 import os
+import threading
 
 db_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'spotify_db.json')
-db = TinyDB(db_path)
+# TinyDB is not thread-safe; every writer shares this lock since all tables live in one file.
+lock = threading.RLock()
+_db = None
+
+def get_db():
+	"""Open the project database on first use (importing this module does not touch the file)."""
+	global _db
+	with lock:
+		if _db is None:
+			_db = TinyDB(db_path, create_dirs=True)
+		return _db
+
+def __getattr__(name):
+	# Keeps `db.db` working for existing callers while deferring the open
+	if name == 'db':
+		return get_db()
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
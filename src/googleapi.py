@@ -1,36 +1,121 @@
 # Google Search API utility
+import asyncio
+import httpx
 import requests
 import logging
-from src.config import GOOGLE_SEARCH_API_KEY, GOOGLE_CSE_ID
+from concurrent.futures import ThreadPoolExecutor
+from src.config import GOOGLE_SEARCH_API_KEY, GOOGLE_CSE_ID, GOOGLE_CACHE_TTL_HOURS, GOOGLE_CACHE_MAX_ENTRIES, GOOGLE_MAX_CONCURRENCY, GOOGLE_TIMEOUT_SECONDS
+from src.cache import PersistentCache, normalize_query
+from src.resilience import get_breaker
+from src import metrics
+
+SEARCH_URL = "https://www.googleapis.com/customsearch/v1"
 
 class GoogleSearch:
 	def __init__(self, api_key=None, cse_id=None):
 		self.api_key = api_key or GOOGLE_SEARCH_API_KEY
 		self.cse_id = cse_id or GOOGLE_CSE_ID
+		# Keep-alive session: repeated searches reuse the TLS connection
+		self.session = requests.Session()
+		self.cache = PersistentCache(
+			'google_search_cache',
+			ttl_seconds=GOOGLE_CACHE_TTL_HOURS * 3600,
+			max_entries=GOOGLE_CACHE_MAX_ENTRIES
+		)
+		# Shared by every GoogleSearch in the process; cache hits are served even while it is open
+		self.breaker = get_breaker('google')
 		logging.info(f"[GoogleSearch] Initialized with API key set: {bool(self.api_key)}, CSE ID set: {bool(self.cse_id)}")
 
-	def search(self, query, num=5):
-		"""
-		Send a prompt to Google Custom Search API and return results.
-		"""
+	def _check_credentials(self):
 		if not self.api_key or not self.cse_id:
 			logging.error("[GoogleSearch] Google API key and CSE ID must be set.")
 			raise ValueError("Google API key and CSE ID must be set.")
-		url = "https://www.googleapis.com/customsearch/v1"
-		params = {
+
+	def _cached(self, cache_key, query):
+		items = self.cache.get(cache_key)
+		if items is not None:
+			logging.info(f"[GoogleSearch] Cache hit for query '{query}' ({len(items)} results)")
+		return items
+
+	def _params(self, query, num):
+		return {
 			'key': self.api_key,
 			'cx': self.cse_id,
 			'q': query,
 			'num': num
 		}
-		logging.info(f"[GoogleSearch] Query: '{query}', Params: {params}")
+
+	def search(self, query, num=5, use_cache=True, timeout=None):
+		"""
+		Send a prompt to Google Custom Search API and return results.
+		Results are served from the local cache when the same (query, num) was seen within the TTL.
+		timeout: seconds for the request (default [resilience] google_timeout_seconds).
+		Raises CircuitOpenError without a request while Google keeps failing.
+		"""
+		self._check_credentials()
+		cache_key = f"{num}|{normalize_query(query)}"
+		if use_cache:
+			items = self._cached(cache_key, query)
+			if items is not None:
+				return items
+		logging.info(f"[GoogleSearch] Query: '{query}', num: {num}")
 		try:
-			resp = requests.get(url, params=params)
-			resp.raise_for_status()
+			with self.breaker.guard(_is_outage), metrics.span('google.search'):
+				resp = self.session.get(SEARCH_URL, params=self._params(query, num), timeout=timeout or GOOGLE_TIMEOUT_SECONDS or None)
+				resp.raise_for_status()
 			items = resp.json().get('items', [])
 			logging.info(f"[GoogleSearch] Got {len(items)} results for query '{query}'")
-			return items
 		except Exception as e:
 			logging.error(f"[GoogleSearch] Error during search: {e}")
 			raise
+		self.cache.set(cache_key, items)
+		return items
+
+	async def search_async(self, query, client, num=5, use_cache=True, timeout=None):
+		"""
+		Asyncio counterpart of search() over a caller-owned httpx.AsyncClient; shares the same cache.
+		"""
+		self._check_credentials()
+		cache_key = f"{num}|{normalize_query(query)}"
+		# The SQLite-backed cache does blocking file I/O, so it runs off the event loop
+		if use_cache:
+			items = await asyncio.to_thread(self._cached, cache_key, query)
+			if items is not None:
+				return items
+		logging.info(f"[GoogleSearch] Async query: '{query}', num: {num}")
+		try:
+			with self.breaker.guard(_is_outage), metrics.span('google.search'):
+				resp = await client.get(SEARCH_URL, params=self._params(query, num), timeout=timeout or GOOGLE_TIMEOUT_SECONDS or None)
+				resp.raise_for_status()
+			items = resp.json().get('items', [])
+			logging.info(f"[GoogleSearch] Got {len(items)} results for query '{query}'")
+		except Exception as e:
+			logging.error(f"[GoogleSearch] Error during async search: {e}")
+			raise
+		await asyncio.to_thread(self.cache.set, cache_key, items)
+		return items
+
+	def search_many(self, queries, num=5, max_workers=None):
+		"""
+		Run several searches with limited concurrency.
+		Returns one result list per query, in the original order.
+		"""
+		workers = max(1, min(max_workers or GOOGLE_MAX_CONCURRENCY, len(queries)))
+		with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='google') as pool:
+			futures = [metrics.submit(pool, self.search, query, num=num) for query in queries]
+			results = [future.result() for future in futures]
+		self.cache.flush()
+		return results
+
+	def close(self):
+		self.session.close()
+
+
+def _is_outage(e):
+	"""Errors that say Google is unavailable (connection errors, timeouts, 5xx) rather than that the request was wrong (bad key, quota, 4xx)."""
+	if isinstance(e, (requests.ConnectionError, requests.Timeout, httpx.TransportError)):
+		return True
+	if isinstance(e, (requests.HTTPError, httpx.HTTPStatusError)):
+		return e.response is not None and e.response.status_code >= 500
+	return False
 # this is a self-initializing, self contained helper module for interacting with the Google Search API
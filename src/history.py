@@ -0,0 +1,162 @@
+"""
+Run History Module
+------------------
+Append-only record of every generated playlist: the full create_moody_playlist result
+(prompts, LLM responses, context, track ids, metrics) plus indexed columns for lookups.
+
+Stored in SQLite (data/history.sqlite3 next to spotify_db.json) in WAL mode, so an append
+is one small transaction regardless of how many runs exist, and queries use indexes on
+mood prompt, date and track id. Query helpers return summary columns under a LIMIT (the full
+result is loaded per run with get()), so memory stays bounded as history grows.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from . import config
+from . import db as _db
+from .cache import normalize_query
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+	id INTEGER PRIMARY KEY,
+	created_at REAL NOT NULL,
+	mood_prompt TEXT NOT NULL,
+	mood_key TEXT NOT NULL,
+	playlist_id TEXT,
+	playlist_name TEXT,
+	thoughts_file TEXT,
+	track_count INTEGER,
+	result_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_created_at ON runs (created_at);
+CREATE INDEX IF NOT EXISTS runs_mood_key_created_at ON runs (mood_key, created_at);
+CREATE TABLE IF NOT EXISTS run_tracks (
+	run_id INTEGER NOT NULL REFERENCES runs (id),
+	position INTEGER NOT NULL,
+	track_id TEXT NOT NULL,
+	PRIMARY KEY (run_id, position)
+);
+CREATE INDEX IF NOT EXISTS run_tracks_track_id ON run_tracks (track_id, run_id);
+"""
+
+_SUMMARY_COLUMNS = ('id', 'created_at', 'mood_prompt', 'playlist_id', 'playlist_name', 'thoughts_file', 'track_count')
+
+
+def _columns(table=''):
+	return ', '.join(f"{table}{column}" for column in _SUMMARY_COLUMNS)
+
+
+def default_path():
+	return os.path.join(os.path.dirname(_db.db_path), 'history.sqlite3')
+
+
+class HistoryStore:
+	def __init__(self, path=None):
+		self.path = path or default_path()
+		self._conn = None
+		self._lock = threading.Lock()
+
+	def _connection(self):
+		# Opened on first use; one connection shared by all threads, serialized by self._lock
+		if self._conn is None:
+			directory = os.path.dirname(self.path)
+			if directory:
+				os.makedirs(directory, exist_ok=True)
+			conn = sqlite3.connect(self.path, check_same_thread=False)
+			conn.row_factory = sqlite3.Row
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.execute("PRAGMA synchronous=NORMAL")
+			conn.executescript(_SCHEMA)
+			self._conn = conn
+		return self._conn
+
+	def record(self, result, created_at=None):
+		"""Append one create_moody_playlist result; returns the new run id."""
+		track_ids = result.get('spotify_track_ids') or []
+		with self._lock:
+			conn = self._connection()
+			with conn:
+				cursor = conn.execute(
+					"INSERT INTO runs (created_at, mood_prompt, mood_key, playlist_id, playlist_name, thoughts_file, track_count, result_json)"
+					" VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+					(
+						created_at or time.time(),
+						result.get('mood_prompt') or '',
+						normalize_query(result.get('mood_prompt') or ''),
+						result.get('playlist_id'),
+						result.get('playlist_name'),
+						result.get('thoughts_file'),
+						result.get('track_count'),
+						json.dumps(result, ensure_ascii=False, default=str),
+					)
+				)
+				run_id = cursor.lastrowid
+				conn.executemany(
+					"INSERT INTO run_tracks (run_id, position, track_id) VALUES (?, ?, ?)",
+					[(run_id, position, track_id) for position, track_id in enumerate(track_ids)]
+				)
+		return run_id
+
+	def _query(self, sql, params):
+		with self._lock:
+			rows = self._connection().execute(sql, params).fetchall()
+		return [dict(row) for row in rows]
+
+	def recent(self, limit=100, mood_prompt=None, since=None):
+		"""Newest runs first (summary columns only), optionally for one mood prompt (normalized) and/or since a timestamp."""
+		clauses, params = [], []
+		if mood_prompt is not None:
+			clauses.append("mood_key = ?")
+			params.append(normalize_query(mood_prompt))
+		if since is not None:
+			clauses.append("created_at >= ?")
+			params.append(since)
+		where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+		return self._query(f"SELECT {_columns()} FROM runs {where}ORDER BY created_at DESC LIMIT ?", params + [limit])
+
+	def runs_with_track(self, track_id, limit=100):
+		"""Newest runs whose playlist contains track_id (summary columns only)."""
+		return self._query(
+			f"SELECT DISTINCT {_columns('runs.')} FROM run_tracks"
+			" JOIN runs ON runs.id = run_tracks.run_id WHERE run_tracks.track_id = ? ORDER BY runs.created_at DESC LIMIT ?",
+			(track_id, limit)
+		)
+
+	def get(self, run_id):
+		"""The full stored result dict for a run, or None."""
+		rows = self._query("SELECT result_json FROM runs WHERE id = ?", (run_id,))
+		return json.loads(rows[0]['result_json']) if rows else None
+
+	def count(self):
+		return self._query("SELECT COUNT(*) AS n FROM runs", ())[0]['n']
+
+	def close(self):
+		with self._lock:
+			if self._conn is not None:
+				self._conn.close()
+				self._conn = None
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+def get_history(path=None):
+	"""Process-wide HistoryStore ([history] file, or data/history.sqlite3 by default)."""
+	global _shared_store
+	with _shared_lock:
+		if _shared_store is None:
+			_shared_store = HistoryStore(path or config.HISTORY_FILE or None)
+		return _shared_store
+
+
+def record_run(result):
+	"""Append a run to the shared history; failures are logged, never raised into the pipeline."""
+	try:
+		return get_history().record(result)
+	except Exception as e:
+		logging.error(f"[History] Failed to record run for '{result.get('mood_prompt')}': {e}")
+		return None
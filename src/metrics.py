@@ -0,0 +1,153 @@
+"""
+Run Metrics Module
+------------------
+Lightweight timing spans and counters for one pipeline run.
+The active RunMetrics is held in a context variable, so API wrappers can record
+spans and counters without it being passed around. Everything is a no-op when no run is active.
+Exports as a JSON-friendly dict or Prometheus text exposition format.
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager, suppress
+import contextvars
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+_current = contextvars.ContextVar('run_metrics', default=None)
+
+
+class RunMetrics:
+	def __init__(self):
+		self.spans = []
+		self.counters = defaultdict(float)  # (name, ((label, value), ...)) -> total
+		self._lock = threading.Lock()
+
+	@contextmanager
+	def span(self, name, **attrs):
+		started = time.time()
+		t0 = time.perf_counter()
+		error = None
+		try:
+			yield
+		except BaseException as e:
+			error = type(e).__name__
+			raise
+		finally:
+			record = {
+				'name': name,
+				'start': round(started, 6),
+				'seconds': round(time.perf_counter() - t0, 6),
+				'thread': threading.current_thread().name,
+			}
+			if attrs:
+				record['attrs'] = attrs
+			if error:
+				record['error'] = error
+			with self._lock:
+				self.spans.append(record)
+
+	def incr(self, name, value=1, **labels):
+		key = (name, tuple(sorted(labels.items())))
+		with self._lock:
+			self.counters[key] += value
+
+	def to_dict(self):
+		with self._lock:
+			spans = list(self.spans)
+			counters = [
+				{'name': name, 'labels': dict(labels), 'value': value}
+				for (name, labels), value in sorted(self.counters.items())
+			]
+		totals = defaultdict(lambda: {'count': 0, 'seconds': 0.0})
+		for record in spans:
+			totals[record['name']]['count'] += 1
+			totals[record['name']]['seconds'] = round(totals[record['name']]['seconds'] + record['seconds'], 6)
+		return {'spans': spans, 'span_totals': dict(totals), 'counters': counters}
+
+
+def to_prometheus(data, prefix='moody_'):
+	"""Render a RunMetrics.to_dict() result in Prometheus text exposition format."""
+	lines = [
+		f"# HELP {prefix}span_seconds Time spent per pipeline stage or external call.",
+		f"# TYPE {prefix}span_seconds summary",
+	]
+	for name, total in sorted(data['span_totals'].items()):
+		lines.append(f'{prefix}span_seconds_sum{{span="{name}"}} {total["seconds"]}')
+		lines.append(f'{prefix}span_seconds_count{{span="{name}"}} {total["count"]}')
+	seen = set()
+	for counter in data['counters']:
+		metric = f"{prefix}{counter['name']}"
+		if metric not in seen:
+			lines.append(f"# TYPE {metric} counter")
+			seen.add(metric)
+		labels = ','.join(f'{k}="{v}"' for k, v in counter['labels'].items())
+		lines.append(f"{metric}{{{labels}}} {counter['value']}" if labels else f"{metric} {counter['value']}")
+	return '\n'.join(lines) + '\n'
+
+
+def export(data, path):
+	"""Write metrics to path: Prometheus text for .prom/.txt files, JSON otherwise. Written atomically."""
+	directory = os.path.dirname(path)
+	if directory:
+		os.makedirs(directory, exist_ok=True)
+	# A temp file per writer: concurrent jobs export to the same path
+	fd, tmp_path = tempfile.mkstemp(dir=directory or '.', prefix=os.path.basename(path) + '.', suffix='.tmp')
+	try:
+		with os.fdopen(fd, 'w', encoding='utf-8') as f:
+			if path.endswith(('.prom', '.txt')):
+				f.write(to_prometheus(data))
+			else:
+				json.dump(data, f, indent=2)
+		os.replace(tmp_path, path)
+	except BaseException:
+		with suppress(OSError):
+			os.remove(tmp_path)
+		raise
+
+
+def export_run(data, path):
+	"""export() for the end of a pipeline run; failures are logged, never raised into the run."""
+	try:
+		export(data, path)
+	except Exception as e:
+		logging.error(f"[Metrics] Failed to export run metrics to {path}: {e}")
+
+
+@contextmanager
+def activate(metrics):
+	"""Make `metrics` the active run for this context (and tasks submitted via submit())."""
+	token = _current.set(metrics)
+	try:
+		yield metrics
+	finally:
+		_current.reset(token)
+
+
+def current():
+	return _current.get()
+
+
+@contextmanager
+def span(name, **attrs):
+	metrics = _current.get()
+	if metrics is None:
+		yield
+		return
+	with metrics.span(name, **attrs):
+		yield
+
+
+def incr(name, value=1, **labels):
+	metrics = _current.get()
+	if metrics is not None:
+		metrics.incr(name, value, **labels)
+
+
+def submit(executor, fn, *args, **kwargs):
+	"""executor.submit that carries the active run into the worker thread."""
+	ctx = contextvars.copy_context()
+	return executor.submit(ctx.run, fn, *args, **kwargs)
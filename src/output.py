@@ -0,0 +1,102 @@
+"""
+Output Policy Module
+--------------------
+How much the pipeline writes to the console and the log, set in one place ([logging] output):
+
+  quiet    no progress lines; only warnings and errors are logged (batch runs, benchmarks)
+  normal   step progress and summaries; payloads (search results, prompts, playlist objects)
+           are cut to [logging] max_payload_chars
+  verbose  for debugging: DEBUG logging, full payloads and per-query detail lines
+
+Messages take %-style arguments and are only formatted when they will be shown. Payload arguments
+are wrapped in preview(), which renders lazily and never walks more of a large object than fits.
+"""
+
+import logging
+import reprlib
+from . import config
+
+QUIET, NORMAL, VERBOSE = 'quiet', 'normal', 'verbose'
+MODES = (QUIET, NORMAL, VERBOSE)
+
+_mode = config.OUTPUT_MODE if config.OUTPUT_MODE in MODES else NORMAL
+
+
+def mode():
+	return _mode
+
+
+def verbose():
+	return _mode == VERBOSE
+
+
+def quiet():
+	return _mode == QUIET
+
+
+def log_level():
+	"""Root logging level for the current mode; normal mode keeps [logging] level."""
+	if _mode == QUIET:
+		return max(getattr(logging, config.LOG_LEVEL, logging.INFO), logging.WARNING)
+	if _mode == VERBOSE:
+		return logging.DEBUG
+	return getattr(logging, config.LOG_LEVEL, logging.INFO)
+
+
+def set_mode(new_mode):
+	"""Switch mode at runtime (e.g. from --quiet/--verbose) and adjust the root logger to match."""
+	global _mode
+	if new_mode not in MODES:
+		raise ValueError(f"Unknown output mode {new_mode!r} (expected one of {', '.join(MODES)})")
+	_mode = new_mode
+	logging.getLogger().setLevel(log_level())
+
+
+def truncate(value, limit=None):
+	"""
+	str(value) cut to limit characters (default [logging] max_payload_chars; 0 = no limit).
+	Containers are rendered with reprlib, so only the part that can be shown is visited.
+	"""
+	limit = config.OUTPUT_MAX_PAYLOAD_CHARS if limit is None else limit
+	if not limit:
+		return str(value)
+	if isinstance(value, str):
+		return value if len(value) <= limit else f"{value[:limit]}... (+{len(value) - limit} chars)"
+	text = _repr.repr(value)
+	return text if len(text) <= limit else f"{text[:limit]}..."
+
+
+class preview:
+	"""Lazy payload argument for say()/logging: rendered only if emitted, truncated unless verbose."""
+	__slots__ = ('value',)
+
+	def __init__(self, value):
+		self.value = value
+
+	def __str__(self):
+		return str(self.value) if _mode == VERBOSE else truncate(self.value)
+
+	__repr__ = __str__
+
+
+def say(msg, *args):
+	"""Progress line on stdout, suppressed in quiet mode."""
+	if _mode != QUIET:
+		print(msg % args if args else msg)
+
+
+def detail(msg, *args):
+	"""Debugging line on stdout, only in verbose mode."""
+	if _mode == VERBOSE:
+		print(msg % args if args else msg)
+
+
+def _make_repr():
+	r = reprlib.Repr()
+	limit = config.OUTPUT_MAX_PAYLOAD_CHARS or 300
+	r.maxlevel = 4
+	r.maxdict = r.maxlist = r.maxtuple = r.maxset = 8
+	r.maxstring = r.maxother = limit
+	return r
+
+_repr = _make_repr()
@@ -0,0 +1,102 @@
+"""
+Playlist Index Module
+---------------------
+Local copy of the user's playlists and their tracks, stored in data/spotify_db.json.
+sync() lists playlists (all pages) and only downloads tracks for playlists whose
+snapshot_id changed, so unchanged playlists are never fetched again.
+Lookups are served from memory once the index is loaded.
+"""
+
+import logging
+from . import db as _db
+
+
+class PlaylistIndex:
+	def __init__(self):
+		self.playlists_table = _db.get_db().table('playlist_index')
+		self.tracks_table = _db.get_db().table('playlist_tracks')
+		self._playlists = None  # playlist_id -> playlist doc (id, name, snapshot_id, owner, position, track_total)
+		self._tracks = None  # playlist_id -> list of {'id', 'name', 'artists'}
+
+	def _load(self):
+		if self._playlists is not None:
+			return
+		with _db.lock:
+			self._playlists = {doc['id']: dict(doc) for doc in self.playlists_table.all()}
+			self._tracks = {doc['playlist_id']: doc['tracks'] for doc in self.tracks_table.all()}
+
+	def sync(self, api, user_id):
+		"""
+		Bring the index up to date with Spotify.
+		Returns counts: total, fetched (new or changed), unchanged, removed.
+		"""
+		self._load()
+		remote = api.get_user_playlists(user_id)['items']
+		remote_ids = {pl['id'] for pl in remote}
+		changed = [pl for pl in remote if self._playlists.get(pl['id'], {}).get('snapshot_id') != pl.get('snapshot_id')]
+		removed = [pid for pid in self._playlists if pid not in remote_ids]
+		futures = {pl['id']: api.submit(api.get_playlist_tracks, pl['id']) for pl in changed}
+		fetched_tracks = {pid: future.result() for pid, future in futures.items()}
+
+		playlists = {}
+		for position, pl in enumerate(remote):
+			playlists[pl['id']] = {
+				'id': pl['id'],
+				'name': pl.get('name', ''),
+				'snapshot_id': pl.get('snapshot_id'),
+				'owner_id': (pl.get('owner') or {}).get('id'),
+				'track_total': (pl.get('tracks') or {}).get('total', 0),
+				'position': position,
+			}
+		stale = set(fetched_tracks) | set(removed)
+		with _db.lock:
+			self.playlists_table.truncate()
+			self.playlists_table.insert_multiple(playlists.values())
+			if stale:
+				self.tracks_table.remove(lambda doc: doc['playlist_id'] in stale)
+			if fetched_tracks:
+				self.tracks_table.insert_multiple(
+					{'playlist_id': pid, 'tracks': tracks} for pid, tracks in fetched_tracks.items()
+				)
+		for pid in removed:
+			self._tracks.pop(pid, None)
+		self._tracks.update(fetched_tracks)
+		self._playlists = playlists
+		stats = {
+			'total': len(remote),
+			'fetched': len(fetched_tracks),
+			'unchanged': len(remote) - len(fetched_tracks),
+			'removed': len(removed),
+		}
+		logging.info(f"[PlaylistIndex] Sync complete: {stats}")
+		return stats
+
+	def list_playlists(self):
+		"""Indexed playlists in Spotify's order."""
+		self._load()
+		return sorted(self._playlists.values(), key=lambda pl: pl.get('position', 0))
+
+	def get_playlist(self, playlist_id):
+		self._load()
+		return self._playlists.get(playlist_id)
+
+	def get_tracks(self, playlist_id):
+		"""Indexed tracks of a playlist, or None if the playlist has not been synced."""
+		self._load()
+		return self._tracks.get(playlist_id)
+
+	def track_ids(self, playlist_id):
+		tracks = self.get_tracks(playlist_id)
+		return None if tracks is None else {t['id'] for t in tracks}
+
+	def current_track_ids(self, playlist_id, snapshot_id):
+		"""Indexed track ids, but only if the index is at snapshot_id (None if it is stale or missing)."""
+		playlist = self.get_playlist(playlist_id)
+		if playlist is None or playlist.get('snapshot_id') != snapshot_id:
+			return None
+		return self.track_ids(playlist_id)
+
+	def playlists_with_track(self, track_id):
+		self._load()
+		return [self._playlists[pid] for pid, tracks in self._tracks.items()
+			if pid in self._playlists and any(t['id'] == track_id for t in tracks)]
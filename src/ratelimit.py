@@ -0,0 +1,67 @@
+"""
+Rate Limit Utility Module
+-------------------------
+Thread-safe token bucket shared by every worker (threads or asyncio tasks) that talks to the same API.
+A 429 response pauses the whole bucket for the server's Retry-After window,
+so concurrent workers back off together instead of hammering the API.
+"""
+
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+	def __init__(self, rate, capacity=None):
+		"""
+		rate: tokens added per second.
+		capacity: maximum burst size (defaults to one second worth of tokens).
+		"""
+		self.rate = float(rate)
+		self.capacity = float(capacity or max(1.0, self.rate))
+		self._tokens = self.capacity
+		self._updated = time.monotonic()
+		self._blocked_until = 0.0
+		self._lock = threading.Lock()
+
+	def _refill(self, now):
+		elapsed = now - self._updated
+		if elapsed > 0:
+			self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+			self._updated = now
+
+	def _try_acquire(self):
+		"""Take a token if one is available; otherwise return how long to wait before trying again."""
+		with self._lock:
+			now = time.monotonic()
+			if now < self._blocked_until:
+				return self._blocked_until - now
+			self._refill(now)
+			if self._tokens >= 1:
+				self._tokens -= 1
+				return 0.0
+			return (1 - self._tokens) / self.rate
+
+	def acquire(self):
+		"""Block until a token is available, honoring any active Retry-After pause."""
+		while True:
+			wait = self._try_acquire()
+			if not wait:
+				return
+			time.sleep(wait)
+
+	async def acquire_async(self):
+		"""Asyncio counterpart of acquire(): waits without blocking the event loop."""
+		while True:
+			wait = self._try_acquire()
+			if not wait:
+				return
+			await asyncio.sleep(wait)
+
+	def pause(self, seconds):
+		"""Stop handing out tokens for `seconds` (e.g. a 429 Retry-After value)."""
+		with self._lock:
+			now = time.monotonic()
+			self._blocked_until = max(self._blocked_until, now + float(seconds))
+			self._tokens = 0.0
+			self._updated = self._blocked_until
@@ -0,0 +1,142 @@
+"""
+Resilience Utility Module
+-------------------------
+Deadlines and circuit breakers that keep one slow or failing dependency from stalling a run.
+
+A Deadline is the time budget of one playlist job; each stage takes min(its own budget, what is
+left of the job). A CircuitBreaker is shared per service (google, spotify, llm) by every worker
+in the process: after N consecutive failures it opens and calls fail immediately with
+CircuitOpenError, then after reset_seconds a single trial call decides whether it closes again.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from . import config
+from . import metrics
+
+
+class DeadlineExceeded(Exception):
+	pass
+
+
+class CircuitOpenError(Exception):
+	pass
+
+
+class Deadline:
+	def __init__(self, seconds=None, expires_at=None):
+		"""seconds: budget from now (None or 0 = unbounded); expires_at: an absolute time.monotonic() instead (seconds then only records the budget)."""
+		if expires_at is None and seconds:
+			expires_at = time.monotonic() + seconds
+		self.expires_at = expires_at
+		self.seconds = seconds if expires_at is not None else None  # the budget this deadline started with
+
+	def remaining(self):
+		"""Seconds left (never negative), or None when unbounded."""
+		if self.expires_at is None:
+			return None
+		return max(0.0, self.expires_at - time.monotonic())
+
+	def expired(self):
+		return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+	def budget(self, stage_seconds):
+		"""Seconds a stage may take: its own budget capped by what is left; None when both are unbounded."""
+		remaining = self.remaining()
+		if not stage_seconds:
+			return remaining
+		return stage_seconds if remaining is None else min(stage_seconds, remaining)
+
+	def child(self, stage_seconds):
+		"""A Deadline for one stage that ends no later than this one."""
+		budget = self.budget(stage_seconds)
+		return Deadline(budget, expires_at=None if budget is None else time.monotonic() + budget)
+
+	def check(self, stage):
+		if self.expired():
+			metrics.incr('deadline_exceeded_total', stage=stage)
+			raise DeadlineExceeded(f"Deadline exceeded before {stage}")
+
+
+class CircuitBreaker:
+	def __init__(self, name, failure_threshold=5, reset_seconds=30.0):
+		self.name = name
+		self.failure_threshold = failure_threshold
+		self.reset_seconds = reset_seconds
+		self._failures = 0
+		self._open_until = 0.0
+		self._trial_running = False
+		self._lock = threading.Lock()
+
+	@property
+	def state(self):
+		with self._lock:
+			if self._failures < self.failure_threshold:
+				return 'closed'
+			return 'open' if time.monotonic() < self._open_until else 'half_open'
+
+	def allow(self):
+		"""True if a call may go ahead. Once the open window has passed, only one trial call is let through."""
+		with self._lock:
+			if self._failures < self.failure_threshold:
+				return True
+			if time.monotonic() < self._open_until or self._trial_running:
+				return False
+			self._trial_running = True
+			return True
+
+	def record_success(self):
+		with self._lock:
+			if self._failures >= self.failure_threshold:
+				logging.info(f"[CircuitBreaker] {self.name}: closed again after a successful trial call")
+			self._failures = 0
+			self._trial_running = False
+
+	def record_failure(self):
+		with self._lock:
+			self._failures += 1
+			self._trial_running = False
+			if self._failures >= self.failure_threshold:
+				self._open_until = time.monotonic() + self.reset_seconds
+				if self._failures == self.failure_threshold:
+					logging.warning(f"[CircuitBreaker] {self.name}: open for {self.reset_seconds}s after {self._failures} consecutive failures")
+					metrics.incr('breaker_open_total', service=self.name)
+
+	def release(self):
+		"""End a call that was allowed but neither succeeded nor failed (e.g. rate limited)."""
+		with self._lock:
+			self._trial_running = False
+
+	@contextmanager
+	def guard(self, is_failure=None):
+		"""
+		Wrap one call: raises CircuitOpenError while open, records the outcome otherwise.
+		is_failure(exc) decides which exceptions count against the service (default: all).
+		"""
+		if not self.allow():
+			metrics.incr('breaker_rejected_total', service=self.name)
+			raise CircuitOpenError(f"{self.name} circuit is open")
+		try:
+			yield
+		except BaseException as e:
+			if isinstance(e, Exception) and (is_failure is None or is_failure(e)):
+				self.record_failure()
+			else:
+				self.release()
+			raise
+		self.record_success()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name):
+	"""Process-wide CircuitBreaker for a service, configured from [resilience]."""
+	with _breakers_lock:
+		breaker = _breakers.get(name)
+		if breaker is None:
+			breaker = CircuitBreaker(name, config.BREAKER_FAILURE_THRESHOLD, config.BREAKER_RESET_SECONDS)
+			_breakers[name] = breaker
+		return breaker
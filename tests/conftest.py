@@ -0,0 +1,113 @@
+"""
+Points the project at throwaway configs before any test imports it, so the suite runs
+without credentials, network access or a local config.ini (same approach as bench/run_bench.py).
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+_WORKDIR = tempfile.mkdtemp(prefix='spotify-worker-tests-')
+
+_SPOTIFY_CONFIG = """[logging]
+level = WARNING
+file =
+
+[spotify]
+client_id = test
+client_secret = test
+redirect_uri = http://127.0.0.1/callback
+scope = playlist-modify-private
+token_cache = {workdir}/token_cache.json
+
+[AIPlayList]
+playlist_prefix =
+
+[SearchAPI]
+GoogleSearchAPIKey = test
+GoogleCSEID = test
+
+[history]
+file = {workdir}/history.sqlite3
+
+[catalog]
+file = {workdir}/catalog.sqlite3
+
+[accounts]
+file = {workdir}/accounts.json
+"""
+
+_LLM_CONFIG = """[llm]
+alias = test
+variant = model
+endpoint = http://127.0.0.1:9/v1
+api_key = test
+llm_backend = openai
+default_meta_prompt =
+llm_log = {workdir}/llm_log.txt
+max_tokens = 64
+llm_log_level = WARNING
+cache_enabled = false
+warmup = false
+"""
+
+with open(os.path.join(_WORKDIR, 'config.ini'), 'w', encoding='utf-8') as f:
+    f.write(_SPOTIFY_CONFIG.format(workdir=_WORKDIR))
+with open(os.path.join(_WORKDIR, 'llm_config.ini'), 'w', encoding='utf-8') as f:
+    f.write(_LLM_CONFIG.format(workdir=_WORKDIR))
+os.environ['SPOTIFY_WORKER_CONFIG'] = os.path.join(_WORKDIR, 'config.ini')
+os.environ['LLMLOCAL_CONFIG'] = os.path.join(_WORKDIR, 'llm_config.ini')
+
+from src import db  # noqa: E402
+db.db_path = os.path.join(_WORKDIR, 'spotify_db.json')
+
+from src import api  # noqa: E402
+from src.ratelimit import TokenBucket  # noqa: E402
+from src.resilience import CircuitBreaker  # noqa: E402
+
+
+class MemoryCache:
+    """PersistentCache stand-in backed by a dict."""
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key, default=None):
+        return self.entries.get(key, default)
+
+    def set(self, key, value):
+        self.entries[key] = value
+
+    def flush(self):
+        pass
+
+
+@pytest.fixture
+def make_client_api():
+    """
+    Factory for a SpotifyAPI that skips __init__ (no auth flow, no network): make_client_api(sp, **overrides).
+    sp stands in for the spotipy client; _call runs the spotipy method directly, and the limiter,
+    breaker, search cache and playlist contents are fresh per client. overrides replace any attribute.
+    """
+    def make(sp, **overrides):
+        client_api = object.__new__(api.SpotifyAPI)
+        client_api.sp = sp
+        client_api._call = lambda fn, *args, **kwargs: fn(*args, **kwargs)
+        client_api.limiter = TokenBucket(1000)
+        client_api.breaker = CircuitBreaker('spotify-test', failure_threshold=5, reset_seconds=30)
+        client_api.track_cache = MemoryCache()
+        client_api.catalog = None
+        client_api._playlist_contents = {}
+        client_api._contents_lock = threading.Lock()
+        client_api._user = None
+        client_api._token_info = None
+        for name, value in overrides.items():
+            setattr(client_api, name, value)
+        return client_api
+    return make
@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src import api
+from src.resilience import CircuitOpenError
+
+
+class _OAuth:
+    """SpotifyOAuth stand-in; every token it hands out expires after `lifetime` seconds."""
+
+    def __init__(self, lifetime=3600):
+        self.lifetime = lifetime
+        self.reads = 0
+        self.cache_handler = self
+
+    def get_cached_token(self):
+        self.reads += 1
+        return {'access_token': f"token-{self.reads}", 'expires_at': int(time.time()) + self.lifetime}
+
+    def validate_token(self, token_info):
+        return token_info
+
+
+class _Spotipy:
+    prefix = 'http://spotify.invalid/v1/'
+
+
+@pytest.fixture
+def client_api(make_client_api):
+    return make_client_api(_Spotipy(), oauth=_OAuth())
+
+
+class _Client:
+    """httpx.AsyncClient stand-in that answers from a list of responses or exceptions."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.requests = 0
+
+    async def request(self, method, url, **kwargs):
+        self.requests += 1
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome, json={}, request=httpx.Request(method, url))
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    async def sleep(seconds):
+        return None
+    monkeypatch.setattr(asyncio, 'sleep', sleep)
+
+
+def test_connect_errors_are_retried_then_open_the_breaker(client_api):
+    client = _Client([httpx.ConnectError('refused')])
+    for _ in range(5):
+        with pytest.raises(httpx.ConnectError):
+            asyncio.run(client_api._call_async(client, 'GET', 'me', 'current_user'))
+    assert client.requests == 5 * (1 + api.spotipy.Spotify.max_retries)
+    assert client_api.breaker.state == 'open'
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(client_api._call_async(client, 'GET', 'me', 'current_user'))
+
+
+def test_transient_connect_error_recovers_without_counting(client_api):
+    client = _Client([httpx.ConnectError('refused'), 200])
+    assert asyncio.run(client_api._call_async(client, 'GET', 'me', 'current_user')) == {}
+    assert client_api.breaker._failures == 0
+
+
+def test_client_errors_do_not_count_as_outages(client_api):
+    client = _Client([404])
+    for _ in range(10):
+        with pytest.raises(api.spotipy.SpotifyException):
+            asyncio.run(client_api._call_async(client, 'GET', 'tracks/x', 'track'))
+    assert client_api.breaker.state == 'closed'
+
+
+def test_bearer_token_is_read_once_until_it_nears_expiry(client_api):
+    client = _Client([200])
+
+    async def calls():
+        for _ in range(5):
+            await client_api._call_async(client, 'GET', 'me', 'current_user')
+    asyncio.run(calls())
+    assert client_api.oauth.reads == 1
+
+    client_api.oauth.lifetime = 30
+    client_api._token_info = None
+    asyncio.run(calls())
+    assert client_api.oauth.reads == 6
@@ -0,0 +1,49 @@
+import pytest
+
+from src import api
+from src.catalog import TrackCatalog
+
+
+class _Spotipy:
+    def __init__(self, status=None):
+        self.status = status
+        self.requests = 0
+
+    def audio_features(self, chunk):
+        self.requests += 1
+        if self.status:
+            raise api.spotipy.SpotifyException(self.status, -1, 'refused')
+        return [{'energy': 0.5, 'valence': 0.5} for _ in chunk]
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    catalog = TrackCatalog(str(tmp_path / 'catalog.sqlite3'))
+    monkeypatch.setattr(api, 'get_catalog', lambda: catalog)
+    monkeypatch.setattr(api, '_audio_features_unavailable', None)
+    yield catalog
+    catalog.close()
+
+
+def test_features_are_fetched_and_cached(catalog, make_client_api):
+    client_api = make_client_api(_Spotipy())
+    assert client_api.get_audio_features(['a', 'b'])['a']['energy'] == 0.5
+    client_api.get_audio_features(['a', 'b'])
+    assert client_api.sp.requests == 1
+    assert api.audio_features_available()
+
+
+def test_403_is_remembered_by_later_processes(catalog, make_client_api, monkeypatch):
+    client_api = make_client_api(_Spotipy(403))
+    assert client_api.get_audio_features(['a']) == {}
+    assert not api.audio_features_available()
+    # A new process starts without the in-memory flag
+    monkeypatch.setattr(api, '_audio_features_unavailable', None)
+    assert not api.audio_features_available()
+    assert make_client_api(_Spotipy()).get_audio_features(['b']) == {}
+
+
+def test_other_errors_are_not_remembered(catalog, make_client_api, monkeypatch):
+    make_client_api(_Spotipy(500)).get_audio_features(['a'])
+    monkeypatch.setattr(api, '_audio_features_unavailable', None)
+    assert api.audio_features_available()
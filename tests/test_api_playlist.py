@@ -0,0 +1,69 @@
+import pytest
+
+from src import api
+
+
+class _Spotipy:
+    """Records playlist adds; fails the ones whose first track id is in `failing`."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.added = []
+
+    def playlist_add_items(self, playlist_id, chunk):
+        if chunk[0] in self.failing:
+            raise api.spotipy.SpotifyException(500, -1, 'server error')
+        self.added.extend(chunk)
+        return {'snapshot_id': f"snap-{len(self.added)}"}
+
+
+@pytest.fixture
+def playlist_api(make_client_api):
+    """playlist_api(playlist, failing=()): a SpotifyAPI whose playlist `playlist` (a list of track ids) is served without network."""
+    def make(playlist, failing=()):
+        client_api = make_client_api(_Spotipy(failing), fetches=0)
+
+        def get_playlist_tracks(playlist_id):
+            client_api.fetches += 1
+            return [{'id': track_id} for track_id in playlist + client_api.sp.added]
+        client_api.get_playlist_tracks = get_playlist_tracks
+        return client_api
+    return make
+
+
+def test_contents_are_fetched_once_and_skip_existing_tracks(playlist_api):
+    client_api = playlist_api(['a', 'b'])
+    assert client_api.add_tracks_to_playlist('pl', ['a', 'c'])['added'] == 1
+    assert client_api.add_tracks_to_playlist('pl', ['c', 'd'])['skipped'] == 1
+    assert client_api.fetches == 1
+    assert client_api.sp.added == ['c', 'd']
+
+
+def test_failed_add_forgets_the_contents(playlist_api):
+    client_api = playlist_api(['a'], failing={'x'})
+    result = client_api.add_tracks_to_playlist('pl', ['x'])
+    assert result['failed'] == 1
+    client_api.add_tracks_to_playlist('pl', ['b'])
+    assert client_api.fetches == 2
+
+
+def test_contents_expire(playlist_api, monkeypatch):
+    client_api = playlist_api(['a'])
+    client_api.add_tracks_to_playlist('pl', ['b'])
+    monkeypatch.setattr(api, 'PLAYLIST_CONTENTS_TTL_SECONDS', -1)
+    client_api.add_tracks_to_playlist('pl', ['c'])
+    assert client_api.fetches == 2
+
+
+def test_adds_without_known_contents_do_not_look_complete(playlist_api):
+    client_api = playlist_api(['a'])
+    client_api.add_tracks_to_playlist('pl', ['b'], skip_existing=False)
+    assert client_api.add_tracks_to_playlist('pl', ['a'])['skipped'] == 1
+    assert client_api.fetches == 1
+
+
+@pytest.mark.parametrize('existing_ids', [['a'], set()])
+def test_existing_ids_skip_the_fetch(playlist_api, existing_ids):
+    client_api = playlist_api(['a'])
+    client_api.add_tracks_to_playlist('pl', ['b'], existing_ids=existing_ids)
+    assert client_api.fetches == 0
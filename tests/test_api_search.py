@@ -0,0 +1,37 @@
+class _Spotipy:
+    def __init__(self, items):
+        self.items = items
+        self.searches = 0
+
+    def search(self, q, type, limit):
+        self.searches += 1
+        return {'tracks': {'items': self.items}}
+
+
+def test_results_are_cached(make_client_api):
+    client_api = make_client_api(_Spotipy([{'id': 'a', 'name': 'A', 'artists': []}]))
+    client_api.search_tracks('song artist')
+    client_api.search_tracks('Song, Artist')
+    assert client_api.sp.searches == 1
+
+
+def test_empty_results_are_not_cached(make_client_api):
+    client_api = make_client_api(_Spotipy([]))
+    assert client_api.search_tracks('new release') == []
+    assert client_api.track_cache.entries == {}
+    client_api.sp.items = [{'id': 'a', 'name': 'A', 'artists': []}]
+    assert [track['id'] for track in client_api.search_tracks('new release')] == ['a']
+    assert client_api.sp.searches == 2
+
+
+def test_results_are_compacted_before_caching(make_client_api):
+    track = {
+        'id': 'a', 'uri': 'spotify:track:a', 'name': 'A', 'popularity': 40,
+        'artists': [{'id': 'x', 'name': 'X', 'external_urls': {}}],
+        'album': {'name': 'Album', 'images': [{'url': 'https://i.scdn.co/a'}]},
+        'available_markets': ['US', 'GB'], 'preview_url': None,
+    }
+    client_api = make_client_api(_Spotipy([track, None]))
+    expected = [{'id': 'a', 'name': 'A', 'artists': [{'name': 'X'}], 'album': {'name': 'Album'}, 'popularity': 40, 'uri': 'spotify:track:a'}]
+    assert client_api.search_tracks('a x') == expected
+    assert list(client_api.track_cache.entries.values()) == [expected]
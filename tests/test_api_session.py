@@ -0,0 +1,78 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from src import api
+
+
+class _Server:
+    """Answers every request with a fixed status and counts the hits."""
+
+    def __init__(self, status, headers=None):
+        self.hits = 0
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                outer.hits += 1
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(b'{"error": {"status": %d, "message": "test"}}' % status)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/v1/"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server(request):
+    srv = _Server(*request.param)
+    yield srv
+    srv.close()
+
+
+@pytest.mark.parametrize('server', [(429, {'Retry-After': '5'})], indirect=True)
+def test_429_is_not_retried_by_the_session(server):
+    response = api._pooled_session().get(server.url + 'search', timeout=5)
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '5'
+    assert server.hits == 1
+
+
+@pytest.mark.parametrize('server', [(503, {})], indirect=True)
+def test_exhausted_5xx_surfaces_with_its_status(server):
+    response = api._pooled_session().get(server.url + 'search', timeout=5)
+    assert response.status_code == 503
+    assert server.hits == 1 + api.spotipy.Spotify.max_retries
+
+
+def test_outage_classification():
+    SpotifyException = api.spotipy.SpotifyException
+    assert api._is_outage(SpotifyException(503, -1, 'unavailable'))
+    assert api._is_outage(SpotifyException(429, -1, '/v1/search:\n Max Retries'))
+    assert api._is_outage(ConnectionError('refused'))
+    assert not api._is_outage(SpotifyException(429, -1, 'rate limited', headers={'Retry-After': '1'}))
+    assert not api._is_outage(SpotifyException(404, -1, 'not found'))
+    assert api._is_rate_limited(SpotifyException(429, -1, 'rate limited'))
+    assert not api._is_rate_limited(SpotifyException(429, -1, '/v1/search:\n Max Retries'))
+
+
+@pytest.mark.parametrize('server', [(503, {})], indirect=True)
+def test_spotipy_raises_exhausted_5xx_as_outage(server):
+    sp = api.spotipy.Spotify(auth='test', requests_session=api._pooled_session())
+    sp.prefix = server.url
+    with pytest.raises(api.spotipy.SpotifyException) as raised:
+        sp.search('q')
+    assert raised.value.http_status == 503
+    assert api._is_outage(raised.value)
@@ -0,0 +1,76 @@
+import pytest
+from tinydb import TinyDB
+
+from src import cache, db
+from src.cache import PersistentCache
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    caches = []
+
+    def make(ttl_seconds=0, max_entries=0, table_name='test_cache'):
+        c = PersistentCache(table_name, ttl_seconds=ttl_seconds, max_entries=max_entries, path=str(tmp_path / 'cache.sqlite3'))
+        caches.append(c)
+        return c
+    yield make
+    for c in caches:
+        c.close()
+
+
+def test_roundtrip_and_stats(make_cache):
+    c = make_cache()
+    assert c.get('k') is None
+    c.set('k', [{'id': 'a', 'name': 'Café'}])
+    assert c.get('k') == [{'id': 'a', 'name': 'Café'}]
+    assert c.stats() == {'entries': 1, 'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'expirations': 0, 'evictions': 0}
+
+
+def test_entries_persist_across_instances(make_cache):
+    make_cache().set('k', {'v': 1})
+    assert make_cache().get('k') == {'v': 1}
+
+
+def test_expired_entries_are_dropped(make_cache, monkeypatch):
+    c = make_cache(ttl_seconds=60)
+    c.set('k', 1)
+    now = cache.time.time()
+    monkeypatch.setattr(cache.time, 'time', lambda: now + 61)
+    assert c.get('k') is None
+    assert c.stats()['expirations'] == 1
+    assert c.stats()['entries'] == 0
+
+
+def test_least_recently_used_is_evicted(make_cache, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(cache.time, 'time', lambda: next(clock))
+    c = make_cache(max_entries=2)
+    c.set('a', 1)
+    c.set('b', 2)
+    assert c.get('a') == 1  # 'a' is now more recent than 'b'
+    c.set('c', 3)
+    assert c.get('b') is None
+    assert c.get('a') == 1 and c.get('c') == 3
+    assert c.stats()['evictions'] == 1
+
+
+def test_recency_from_hits_survives_flush(make_cache, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(cache.time, 'time', lambda: next(clock))
+    first = make_cache(max_entries=2)
+    first.set('a', 1)
+    first.set('b', 2)
+    first.get('a')
+    first.flush()
+    second = make_cache(max_entries=2)
+    second.set('c', 3)
+    assert second.get('a') == 1
+    assert second.get('b') is None
+
+
+def test_legacy_tinydb_table_is_dropped(make_cache):
+    legacy = TinyDB(db.db_path, create_dirs=True)
+    legacy.table('legacy_cache').insert({'key': 'k', 'value': 1})
+    legacy.close()
+    make_cache(table_name='legacy_cache').get('k')
+    assert 'legacy_cache' not in db.get_db().tables()
@@ -0,0 +1,73 @@
+import pytest
+
+from src.catalog import TrackCatalog
+
+
+def _track(track_id, name, *artists, popularity=50):
+    return {'id': track_id, 'name': name, 'artists': [{'name': a} for a in artists], 'popularity': popularity}
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = TrackCatalog(str(tmp_path / 'catalog.sqlite3'))
+    catalog.add_tracks([
+        _track('wonderwall', 'Wonderwall - Remastered', 'Oasis', popularity=80),
+        _track('wonderwall-cover', 'Wonderwall', 'The Cover Band', popularity=90),
+        _track('yellow', 'Yellow', 'Coldplay'),
+        _track('fix-you', 'Fix You', 'Coldplay'),
+        _track('halo', 'Halo (feat. Someone)', 'Beyoncé'),
+        _track('the-the', 'Love Song', 'The The'),
+    ], 'saved')
+    yield catalog
+    catalog.close()
+
+
+def _ids(tracks):
+    return [t['id'] for t in tracks]
+
+
+def test_title_and_artist_match(catalog):
+    assert _ids(catalog.lookup('Wonderwall Oasis')) == ['wonderwall']
+    assert _ids(catalog.lookup('yellow coldplay')) == ['yellow']
+
+
+def test_version_suffixes_and_brackets_are_not_required(catalog):
+    assert _ids(catalog.lookup('Halo Beyoncé')) == ['halo']
+
+
+def test_title_alone_is_not_enough(catalog):
+    assert catalog.lookup('Wonderwall') == []
+    assert catalog.lookup('Yellow') == []
+
+
+def test_every_title_token_must_match(catalog):
+    assert catalog.lookup('Fix Coldplay') == []
+    assert _ids(catalog.lookup('Fix You Coldplay')) == ['fix-you']
+
+
+def test_stopword_artist_tokens_do_not_count(catalog):
+    assert catalog.lookup('Wonderwall the') == []
+
+
+def test_most_of_the_query_must_be_explained(catalog):
+    assert catalog.lookup('Yellow Coldplay live at glastonbury 2016') == []
+
+
+def test_unknown_and_empty_queries(catalog):
+    assert catalog.lookup('Bohemian Rhapsody Queen') == []
+    assert catalog.lookup('  ...  ') == []
+
+
+def test_better_coverage_then_popularity_first(catalog):
+    catalog.add_tracks([_track('wonderwall-live', 'Wonderwall', 'Oasis', popularity=95)], 'search')
+    assert _ids(catalog.lookup('Wonderwall Oasis')) == ['wonderwall-live', 'wonderwall']
+    assert _ids(catalog.lookup('Wonderwall Oasis', limit=1)) == ['wonderwall-live']
+
+
+def test_notes_expire(catalog, monkeypatch):
+    assert catalog.get_note('flag') is None
+    catalog.set_note('flag', '403')
+    assert catalog.get_note('flag') == '403'
+    assert catalog.get_note('flag', max_age=60) == '403'
+    monkeypatch.setattr('src.catalog.time.time', lambda: 2e10)
+    assert catalog.get_note('flag', max_age=60) is None
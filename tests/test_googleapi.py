@@ -0,0 +1,67 @@
+import httpx
+import pytest
+import requests
+
+from src import googleapi
+from src.resilience import CircuitBreaker
+
+_REQUEST = httpx.Request('GET', googleapi.SEARCH_URL)
+
+
+def _requests_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"status {status}", response=response)
+
+
+def _httpx_error(status):
+    return httpx.HTTPStatusError(f"status {status}", request=_REQUEST, response=httpx.Response(status, request=_REQUEST))
+
+
+@pytest.mark.parametrize('error', [
+    requests.ConnectionError('refused'),
+    requests.Timeout('read timed out'),
+    _requests_error(503),
+    httpx.ConnectError('refused', request=_REQUEST),
+    httpx.ReadTimeout('read timed out', request=_REQUEST),
+    _httpx_error(500),
+])
+def test_outages(error):
+    assert googleapi._is_outage(error)
+
+
+@pytest.mark.parametrize('error', [
+    _requests_error(403),
+    _requests_error(429),
+    _httpx_error(400),
+    ValueError('bad response'),
+])
+def test_request_errors_are_not_outages(error):
+    assert not googleapi._is_outage(error)
+
+
+class _Session:
+    def __init__(self, status):
+        self.status = status
+
+    def get(self, url, params, timeout):
+        response = requests.Response()
+        response.status_code = self.status
+        response.url = url
+        return response
+
+
+def test_quota_errors_do_not_open_the_breaker():
+    searcher = object.__new__(googleapi.GoogleSearch)
+    searcher.api_key = searcher.cse_id = 'test'
+    searcher.session = _Session(403)
+    searcher.breaker = CircuitBreaker('google-test', failure_threshold=2, reset_seconds=30)
+    for _ in range(3):
+        with pytest.raises(requests.HTTPError):
+            searcher.search('rain', use_cache=False)
+    assert searcher.breaker.state == 'closed'
+    searcher.session.status = 502
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            searcher.search('rain', use_cache=False)
+    assert searcher.breaker.state == 'open'
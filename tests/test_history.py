@@ -0,0 +1,54 @@
+import pytest
+
+from src import history
+from src.history import HistoryStore
+
+
+def _result(mood_prompt, track_ids, **extra):
+    return dict({'mood_prompt': mood_prompt, 'playlist_id': f"pl-{mood_prompt}", 'playlist_name': mood_prompt.title(),
+                 'spotify_track_ids': track_ids, 'track_count': len(track_ids)}, **extra)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.sqlite3'))
+    yield store
+    store.close()
+
+
+def test_record_and_get_roundtrip(store):
+    result = _result('rainy evening', ['a', 'b'], metrics={'spans': {}})
+    run_id = store.record(result, created_at=100.0)
+    assert store.get(run_id) == result
+    assert store.get(run_id + 1) is None
+    assert store.count() == 1
+
+
+def test_recent_is_newest_first_with_limit_and_since(store):
+    for n, prompt in enumerate(['one', 'two', 'three']):
+        store.record(_result(prompt, []), created_at=100.0 + n)
+    assert [run['mood_prompt'] for run in store.recent()] == ['three', 'two', 'one']
+    assert [run['mood_prompt'] for run in store.recent(limit=1)] == ['three']
+    assert [run['mood_prompt'] for run in store.recent(since=101.0)] == ['three', 'two']
+    assert 'result_json' not in store.recent()[0]
+
+
+def test_recent_matches_normalized_mood_prompts(store):
+    store.record(_result('Rainy Evening!', []), created_at=100.0)
+    store.record(_result('sunny morning', []), created_at=101.0)
+    assert [run['mood_prompt'] for run in store.recent(mood_prompt='rainy   evening')] == ['Rainy Evening!']
+
+
+def test_runs_with_track(store):
+    first = store.record(_result('rainy', ['a', 'b']), created_at=100.0)
+    second = store.record(_result('sunny', ['b', 'c', 'b']), created_at=101.0)
+    assert [run['id'] for run in store.runs_with_track('b')] == [second, first]
+    assert [run['id'] for run in store.runs_with_track('a')] == [first]
+    assert store.runs_with_track('z') == []
+
+
+def test_record_run_never_raises(monkeypatch):
+    def broken():
+        raise OSError('disk full')
+    monkeypatch.setattr(history, 'get_history', broken)
+    assert history.record_run(_result('rainy', [])) is None
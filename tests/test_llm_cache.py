@@ -0,0 +1,59 @@
+import os
+from types import SimpleNamespace
+
+from llmlocal import llm
+from llmlocal.cache import ResponseCache
+
+
+def _files(cache_dir):
+    return sorted(name for _, _, names in os.walk(cache_dir) for name in names)
+
+
+def test_memory_tier_serves_recent_keys(tmp_path):
+    cache = ResponseCache(str(tmp_path), memory_entries=2)
+    cache.set('aa1', 'one')
+    cache.set('bb2', 'two')
+    assert cache.get('aa1') == 'one'
+    cache.set('cc3', 'three')  # evicts bb2, the least recently used, from memory
+    assert cache.get('aa1') == 'one'
+    assert cache.get('bb2', disk=False) is None
+    assert cache.get('bb2') == 'two'
+    stats = cache.snapshot()
+    assert stats['memory_hits'] == 2
+    assert stats['disk_hits'] == 1
+    assert stats['memory_evictions'] >= 1
+
+
+def test_disk_tier_evicts_oldest_files(tmp_path):
+    cache = ResponseCache(str(tmp_path), disk_entries=2)
+    for key in ('aa1', 'bb2', 'cc3'):
+        cache.set(key, key.upper())
+    assert _files(tmp_path) == ['bb2.json', 'cc3.json']
+    assert cache.snapshot()['disk_evictions'] == 1
+
+    reopened = ResponseCache(str(tmp_path), disk_entries=2)
+    assert reopened.get('aa1') is None
+    assert reopened.get('cc3') == 'CC3'
+
+
+def _response(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def test_use_cache_false_bypasses_the_cache(tmp_path, monkeypatch):
+    llm._init_llm()
+    monkeypatch.setattr(llm, '_cache', ResponseCache(str(tmp_path)))
+    endpoint = llm._pool.endpoints[0]
+    calls = []
+
+    def create(**request):
+        calls.append(request)
+        return _response(f"reply {len(calls)}")
+    monkeypatch.setattr(endpoint.client.chat.completions, 'create', create)
+    messages = [{'role': 'user', 'content': 'hi'}]
+
+    assert llm.llm_complete(messages, use_cache=True) == 'reply 1'
+    assert llm.llm_complete(messages, use_cache=True) == 'reply 1'
+    assert llm.llm_complete(messages, use_cache=False) == 'reply 2'
+    assert len(calls) == 2
+    assert llm.llm_complete(messages, use_cache=True) == 'reply 1'
@@ -0,0 +1,72 @@
+import httpx
+import openai
+import pytest
+
+from llmlocal import llm
+from llmlocal.config import LLM_TIMEOUT_SECONDS
+from src import resilience
+from src.config import JOB_DEADLINE_SECONDS, LLM_STAGE_SECONDS
+from src.resilience import CircuitBreaker, Deadline
+from util import moodyplaylist
+
+_REQUEST = httpx.Request('POST', 'http://127.0.0.1:9/v1/chat/completions')
+
+
+def _status_error(status):
+    response = httpx.Response(status, request=_REQUEST)
+    return openai.APIStatusError(f"status {status}", response=response, body=None)
+
+
+def test_connection_errors_and_5xx_are_outages():
+    assert llm.is_outage(openai.APIConnectionError(request=_REQUEST))
+    assert llm.is_outage(_status_error(503))
+
+
+def test_4xx_is_not_an_outage():
+    assert not llm.is_outage(_status_error(400))
+    assert not llm.is_outage(ValueError('bad prompt'))
+
+
+def test_timeouts_count_only_near_the_full_timeout():
+    timeout = openai.APITimeoutError(request=_REQUEST)
+    assert llm.is_outage(timeout, None)
+    assert llm.is_outage(timeout, LLM_TIMEOUT_SECONDS)
+    assert llm.is_outage(timeout, 0.95 * LLM_TIMEOUT_SECONDS)
+    assert not llm.is_outage(timeout, 0.4)
+    assert llm.is_outage(timeout, 9.5, budget=10)
+    assert not llm.is_outage(timeout, 5, budget=10)
+
+
+def test_budget_timeouts_do_not_open_the_breaker():
+    breaker = CircuitBreaker('llm-test', failure_threshold=3, reset_seconds=30)
+    for _ in range(10):
+        with pytest.raises(openai.APITimeoutError):
+            with breaker.guard(lambda e: llm.is_outage(e, 0.4)):
+                raise openai.APITimeoutError(request=_REQUEST)
+    assert breaker.state == 'closed'
+
+
+def _timed_out_call(breaker, deadline):
+    timeout = moodyplaylist._llm_timeout(deadline, 'llm.structured')
+    with pytest.raises(openai.APITimeoutError):
+        with breaker.guard(moodyplaylist._llm_outage(deadline, timeout)):
+            raise openai.APITimeoutError(request=_REQUEST)
+    return timeout
+
+
+def test_hanging_llm_opens_the_breaker_within_the_stage_budget():
+    deadline = Deadline(JOB_DEADLINE_SECONDS).child(LLM_STAGE_SECONDS)
+    breaker = CircuitBreaker('llm-test', failure_threshold=3, reset_seconds=30)
+    for _ in range(3):
+        assert _timed_out_call(breaker, deadline) < LLM_TIMEOUT_SECONDS
+    assert breaker.state == 'open'
+
+
+def test_timeouts_after_the_stage_budget_is_mostly_spent_do_not_count(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, 'monotonic', lambda: now[0])
+    breaker = CircuitBreaker('llm-test', failure_threshold=1, reset_seconds=30)
+    deadline = Deadline(100)
+    now[0] += 60
+    assert _timed_out_call(breaker, deadline) == 40
+    assert breaker.state == 'closed'
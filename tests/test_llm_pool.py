@@ -0,0 +1,154 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from llmlocal import llm
+from llmlocal.pool import EndpointPool
+
+_REQUEST = httpx.Request('POST', 'http://127.0.0.1:9/v1/chat/completions')
+
+
+def _chunk(token):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+
+
+def _failing(pool, endpoint, times):
+    for _ in range(times):
+        pool.acquire()
+        pool.release(endpoint, error=openai.APIConnectionError(request=_REQUEST))
+
+
+def test_abandon_keeps_the_failure_count():
+    pool = EndpointPool(['http://127.0.0.1:9/v1'], 'test', eject_after=3)
+    endpoint = pool.endpoints[0]
+    _failing(pool, endpoint, 2)
+    pool.acquire()
+    pool.abandon(endpoint)
+    assert endpoint.outstanding == 0
+    assert endpoint.failures == 2
+
+
+def test_cancelled_request_does_not_reset_ejection():
+    pool = EndpointPool(['http://127.0.0.1:9/v1'], 'test', eject_after=2)
+    endpoint = pool.endpoints[0]
+    _failing(pool, endpoint, 2)
+    ejected_until = endpoint.ejected_until
+    assert ejected_until > 0
+
+    async def hang(**request):
+        await asyncio.sleep(60)
+
+    endpoint.async_client = lambda: SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=hang)))
+
+    async def cancelled_attempt():
+        task = asyncio.create_task(pool._attempt_async(pool.acquire(), {}))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    asyncio.run(cancelled_attempt())
+    assert endpoint.outstanding == 0
+    assert endpoint.failures == 2
+    assert endpoint.ejected_until == ejected_until
+
+
+def test_closing_a_stream_early_leaves_endpoint_health_alone(monkeypatch):
+    llm._init_llm()
+    endpoint = llm._pool.endpoints[0]
+    monkeypatch.setattr(endpoint, 'failures', 2)
+    monkeypatch.setattr(endpoint.client.chat.completions, 'create', lambda **request: iter([_chunk('a\n'), _chunk('b\n'), _chunk('c')]))
+    stream = llm.llm_stream([{'role': 'user', 'content': 'hi'}], lines=True, use_cache=False)
+    assert next(stream) == 'a'
+    stream.close()
+    assert endpoint.outstanding == 0
+    assert endpoint.failures == 2
+
+    assert list(llm.llm_stream([{'role': 'user', 'content': 'hi'}], lines=True, use_cache=False)) == ['a', 'b', 'c']
+    assert endpoint.failures == 0
+
+
+def _pool(n=2, **kwargs):
+    return EndpointPool([f"http://127.0.0.1:9/v{i}" for i in range(n)], 'test', **kwargs)
+
+
+def test_routing_prefers_fewest_outstanding_then_lowest_latency():
+    pool = _pool(3)
+    first, second, third = pool.endpoints
+    second.ewma, third.ewma = 0.5, 0.2
+    assert pool.acquire() is first  # no latency yet sorts first
+    assert pool.acquire() is third
+    assert pool.acquire() is second
+    pool.release(third, 0.2)
+    assert pool.acquire() is third
+
+
+def test_ejected_endpoint_is_skipped_until_it_recovers():
+    pool = _pool(2, eject_after=2, eject_seconds=30)
+    first, second = pool.endpoints
+    _failing(pool, first, 2)
+    assert first.ejected_until > 0
+    assert pool.acquire() is second
+    assert pool.acquire() is second
+    first.ejected_until = 0.0
+    assert pool.acquire() is first
+
+
+def test_all_ejected_picks_the_one_back_soonest():
+    pool = _pool(2, eject_after=1)
+    first, second = pool.endpoints
+    _failing(pool, first, 1)
+    _failing(pool, second, 1)
+    second.ejected_until = first.ejected_until - 5
+    assert pool.acquire() is second
+
+
+def test_request_errors_do_not_eject():
+    pool = _pool(1, eject_after=1)
+    endpoint = pool.endpoints[0]
+    pool.acquire()
+    pool.release(endpoint, error=ValueError('bad request'))
+    assert endpoint.errors == 1
+    assert endpoint.ejected_until == 0.0
+
+
+def test_failover_to_the_next_endpoint(monkeypatch):
+    pool = _pool(2)
+    first, second = pool.endpoints
+
+    def refuse(**request):
+        raise openai.APIConnectionError(request=_REQUEST)
+    monkeypatch.setattr(first.client.chat.completions, 'create', refuse)
+    monkeypatch.setattr(second.client.chat.completions, 'create', lambda **request: 'response')
+    assert pool.complete(model='m', messages=[]) == ('response', second)
+    assert first.failures == 1
+    assert first.outstanding == second.outstanding == 0
+
+
+def test_no_failover_for_request_errors(monkeypatch):
+    pool = _pool(2)
+    first, second = pool.endpoints
+    calls = []
+
+    def reject(**request):
+        calls.append(request)
+        raise openai.BadRequestError('status 400', response=httpx.Response(400, request=_REQUEST), body=None)
+    monkeypatch.setattr(first.client.chat.completions, 'create', reject)
+    monkeypatch.setattr(second.client.chat.completions, 'create', reject)
+    with pytest.raises(openai.BadRequestError):
+        pool.complete(model='m', messages=[])
+    assert len(calls) == 1
+
+
+def test_failover_gives_up_after_every_endpoint(monkeypatch):
+    pool = _pool(2)
+
+    def refuse(**request):
+        raise openai.APIConnectionError(request=_REQUEST)
+    for endpoint in pool.endpoints:
+        monkeypatch.setattr(endpoint.client.chat.completions, 'create', refuse)
+    with pytest.raises(openai.APIConnectionError):
+        pool.complete(model='m', messages=[])
+    assert [ep.failures for ep in pool.endpoints] == [1, 1]
@@ -0,0 +1,36 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from src import metrics
+
+
+def _sample():
+    run = metrics.RunMetrics()
+    with metrics.activate(run):
+        with metrics.span('stage.test'):
+            metrics.incr('tracks_found_total', 3)
+    return run.to_dict()
+
+
+def test_span_and_counter_recorded():
+    data = _sample()
+    assert data['span_totals']['stage.test']['count'] == 1
+    assert data['counters'] == [{'name': 'tracks_found_total', 'labels': {}, 'value': 3.0}]
+
+
+def test_concurrent_exports_to_one_path(tmp_path):
+    path = str(tmp_path / 'metrics.json')
+    data = _sample()
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        futures = [pool.submit(metrics.export, data, path) for _ in range(200)]
+    assert [f.exception() for f in futures if f.exception()] == []
+    assert os.listdir(tmp_path) == ['metrics.json']
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f)['counters'] == data['counters']
+
+
+def test_export_run_never_raises(tmp_path):
+    blocker = tmp_path / 'file'
+    blocker.write_text('not a directory')
+    metrics.export_run(_sample(), str(blocker / 'metrics.json'))
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from util import moodfit
+from util.moodfit import DIMENSIONS, NEUTRAL_FIT, fit_scores, prune, target_profile
+
+
+def test_no_mood_words_means_no_profile():
+    assert target_profile('songs by my favourite band') is None
+
+
+def test_profile_averages_matched_words_over_mentioned_dimensions():
+    targets, weights = target_profile('Sad PARTY')
+    sad, party = moodfit.MOOD_LEXICON['sad'], moodfit.MOOD_LEXICON['party']
+    assert targets[DIMENSIONS.index('valence')] == pytest.approx((sad['valence'] + party['valence']) / 2)
+    assert targets[DIMENSIONS.index('danceability')] == pytest.approx(party['danceability'])
+    assert weights[DIMENSIONS.index('instrumentalness')] == 0
+    assert weights[DIMENSIONS.index('energy')] == 1
+
+
+def test_prefixes_match_word_forms():
+    assert target_profile('dancing in the rain') is not None
+    assert target_profile('melancholic') is not None
+
+
+def test_exact_match_scores_one_and_distance_lowers_fit():
+    profile = target_profile('sad')
+    scores = fit_scores([dict(valence=0.2, energy=0.3), dict(valence=0.9, energy=0.9)], profile)
+    assert scores[0] == pytest.approx(1.0)
+    assert scores[1] < 0.5
+
+
+def test_missing_features_are_neutral():
+    profile = target_profile('sad')
+    scores = fit_scores([None, {}, dict(tempo=120)], profile)
+    assert np.allclose(scores, NEUTRAL_FIT)
+
+
+def test_tempo_is_scaled_from_bpm():
+    profile = target_profile('upbeat')
+    slow = fit_scores([dict(valence=0.8, energy=0.75, tempo=60)], profile)[0]
+    fast = fit_scores([dict(valence=0.8, energy=0.75, tempo=132)], profile)[0]
+    assert fast == pytest.approx(1.0)
+    assert slow < fast
+
+
+def test_prune_keeps_the_best_in_original_order():
+    profile = target_profile('sad')
+    features = {
+        'a': dict(valence=0.9, energy=0.9),
+        'b': dict(valence=0.2, energy=0.3),
+        'c': None,
+        'd': dict(valence=0.25, energy=0.3),
+    }
+    assert prune(['a', 'b', 'c', 'd'], features, profile, keep=2) == ['b', 'd']
+    assert prune(['a', 'b', 'c', 'd'], features, profile, keep=3) == ['b', 'c', 'd']
+
+
+def test_prune_without_profile_or_surplus():
+    assert prune(['a', 'b', 'c'], {}, None, keep=2) == ['a', 'b']
+    assert prune(['a', 'b'], {}, target_profile('sad'), keep=5) == ['a', 'b']
+
+
+def test_prune_ties_keep_llm_order():
+    profile = target_profile('sad')
+    assert prune(['a', 'b', 'c'], {}, profile, keep=2) == ['a', 'b']
@@ -0,0 +1,53 @@
+import logging
+
+import pytest
+
+from src import output
+
+
+class _Payload:
+    """Counts how often it is rendered."""
+
+    def __init__(self):
+        self.renders = 0
+
+    def __str__(self):
+        self.renders += 1
+        return 'payload'
+
+    __repr__ = __str__
+
+
+@pytest.fixture
+def mode():
+    previous = output.mode()
+    yield output.set_mode
+    output.set_mode(previous)
+
+
+def test_quiet_suppresses_say(mode, capsys):
+    mode(output.QUIET)
+    output.say("[Test] %d tracks", 3)
+    assert capsys.readouterr().out == ''
+    mode(output.NORMAL)
+    output.say("[Test] %d tracks", 3)
+    assert capsys.readouterr().out == '[Test] 3 tracks\n'
+
+
+def test_hidden_previews_are_never_rendered(mode, capsys):
+    payload = _Payload()
+    mode(output.QUIET)
+    output.say("[Test] %s", output.preview(payload))
+    logging.info("[Test] %s", output.preview(payload))
+    mode(output.NORMAL)
+    output.detail("[Test] %s", output.preview(payload))
+    assert payload.renders == 0
+    assert capsys.readouterr().out == ''
+
+
+def test_previews_render_when_shown(mode, capsys):
+    payload = _Payload()
+    mode(output.VERBOSE)
+    output.detail("[Test] %s", output.preview(payload))
+    assert payload.renders == 1
+    assert capsys.readouterr().out == '[Test] payload\n'
@@ -0,0 +1,27 @@
+from concurrent.futures import Future
+
+from src.playlistindex import PlaylistIndex
+
+
+class _API:
+    def __init__(self, snapshot_id):
+        self.snapshot_id = snapshot_id
+
+    def get_user_playlists(self, user_id):
+        return {'items': [{'id': 'pl', 'name': 'Rain', 'snapshot_id': self.snapshot_id, 'tracks': {'total': 1}}]}
+
+    def get_playlist_tracks(self, playlist_id):
+        return [{'id': 'a', 'name': 'A', 'artists': []}]
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+def test_current_track_ids_only_at_the_indexed_snapshot():
+    index = PlaylistIndex()
+    index.sync(_API('s1'), 'me')
+    assert index.current_track_ids('pl', 's1') == {'a'}
+    assert index.current_track_ids('pl', 's2') is None
+    assert index.current_track_ids('unknown', 's1') is None
@@ -0,0 +1,23 @@
+from src import metrics
+from util import moodyplaylist
+
+
+def test_prefetched_search_records_into_the_prefetch_metrics(monkeypatch):
+    def search(mood_prompt):
+        with metrics.span('google.search'):
+            metrics.incr('cache_misses_total', cache='google')
+        return [{'title': mood_prompt}]
+    monkeypatch.setattr(moodyplaylist, '_prefetch_google', search)
+
+    prefetch = moodyplaylist.start_prefetch('rainy evening', warm_spotify=False)
+    assert prefetch['google_results'].result(timeout=10) == [{'title': 'rainy evening'}]
+    recorded = prefetch['metrics'].to_dict()
+    assert recorded['span_totals']['google.search']['count'] == 1
+    assert recorded['counters'] == [{'name': 'cache_misses_total', 'labels': {'cache': 'google'}, 'value': 1}]
+
+
+def test_no_warmup_when_disabled(monkeypatch):
+    monkeypatch.setattr(moodyplaylist, '_prefetch_google', lambda mood_prompt: [])
+    # tests/conftest.py sets [llm] warmup = false
+    prefetch = moodyplaylist.start_prefetch('rainy evening', warm_spotify=False)
+    assert 'llm_warmup' not in prefetch
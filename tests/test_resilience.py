@@ -0,0 +1,115 @@
+import pytest
+
+from src import resilience
+from src.resilience import CircuitBreaker, CircuitOpenError, Deadline, DeadlineExceeded
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(resilience.time, 'monotonic', clock)
+    return clock
+
+
+def _fail(breaker, error=RuntimeError('down'), is_failure=None):
+    with pytest.raises(type(error)):
+        with breaker.guard(is_failure):
+            raise error
+
+
+# --- Deadline ---
+
+def test_unbounded_deadline(clock):
+    deadline = Deadline()
+    assert deadline.remaining() is None
+    assert not deadline.expired()
+    assert deadline.budget(None) is None
+    assert deadline.budget(5) == 5
+    assert deadline.child(None).remaining() is None
+
+
+def test_deadline_counts_down_and_expires(clock):
+    deadline = Deadline(10)
+    clock.now += 4
+    assert deadline.remaining() == 6
+    clock.now += 7
+    assert deadline.remaining() == 0.0
+    assert deadline.expired()
+    with pytest.raises(DeadlineExceeded):
+        deadline.check('search')
+
+
+def test_stage_budget_is_capped_by_the_job(clock):
+    deadline = Deadline(10)
+    assert deadline.budget(3) == 3
+    assert deadline.budget(None) == 10
+    clock.now += 8
+    assert deadline.budget(3) == 2
+    child = deadline.child(3)
+    assert child.expires_at == deadline.expires_at
+    deadline.check('llm')
+
+
+# --- CircuitBreaker ---
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_seconds=30)
+    for _ in range(2):
+        _fail(breaker)
+    assert breaker.state == 'closed'
+    _fail(breaker)
+    assert breaker.state == 'open'
+    with pytest.raises(CircuitOpenError):
+        with breaker.guard():
+            pass
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_seconds=30)
+    for _ in range(2):
+        _fail(breaker)
+    with breaker.guard():
+        pass
+    for _ in range(2):
+        _fail(breaker)
+    assert breaker.state == 'closed'
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_seconds=30)
+    _fail(breaker)
+    clock.now += 31
+    assert breaker.state == 'half_open'
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+
+def test_failed_trial_reopens(clock):
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_seconds=30)
+    _fail(breaker)
+    clock.now += 31
+    _fail(breaker)
+    assert breaker.state == 'open'
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 2
+    assert breaker.allow()
+
+
+def test_uncounted_errors_release_the_trial(clock):
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_seconds=30)
+    _fail(breaker)
+    clock.now += 31
+    _fail(breaker, ValueError('bad request'), is_failure=lambda e: not isinstance(e, ValueError))
+    assert breaker.state == 'half_open'
+    assert breaker.allow()
@@ -0,0 +1,35 @@
+import pytest
+
+from util.moodyplaylist import _parse_structured_response
+
+_PARSED = ('Rainy Day', ['Song A Artist A', 'Song B Artist B'])
+
+
+@pytest.mark.parametrize('response, expected', [
+    ('{"playlist_name": "Rainy Day", "song_queries": ["Song A Artist A", "Song B Artist B"]}', _PARSED),
+    ('```json\n{"playlist_name": "Rainy Day", "song_queries": ["Song A Artist A", "Song B Artist B"]}\n```', _PARSED),
+    ('Sure! Here is your playlist:\n{"playlist_name": "Rainy Day", "song_queries": ["Song A Artist A", "Song B Artist B"]}\nEnjoy!', _PARSED),
+    # Trailing comma: not valid JSON, so the fields come from the regex fallback
+    ('{"playlist_name": "Rainy Day", "song_queries": ["Song A Artist A", "Song B Artist B",]}', _PARSED),
+    ('{"playlist_name": " Rainy Day ", "song_queries": ["  Song A Artist A", "", 7, "Song B Artist B"]}', _PARSED),
+    ('{"playlist_name": "Rainy Day", "song_queries": ["Song A Artist A"], "mood": "wistful"}', ('Rainy Day', ['Song A Artist A'])),
+])
+def test_valid_replies(response, expected):
+    assert _parse_structured_response(response) == expected
+
+
+@pytest.mark.parametrize('response', [
+    None,
+    '',
+    'Rainy Day\nSong A Artist A',
+    '{"song_queries": ["Song A Artist A"]}',
+    '{"playlist_name": "", "song_queries": ["Song A Artist A"]}',
+    '{"playlist_name": "   ", "song_queries": ["Song A Artist A"]}',
+    '{"playlist_name": "Rainy Day"}',
+    '{"playlist_name": "Rainy Day", "song_queries": []}',
+    '{"playlist_name": "Rainy Day", "song_queries": ["", "  "]}',
+    '{"playlist_name": "Rainy Day", "song_queries": "Song A Artist A"}',
+    '{"playlist_name": "Rainy Day", "song_queries": [}',
+])
+def test_invalid_replies(response):
+    assert _parse_structured_response(response) is None
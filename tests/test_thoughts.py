@@ -0,0 +1,14 @@
+from util.thoughts import ThoughtsIndex
+
+
+def test_non_ascii_words_are_indexed():
+    index = ThoughtsIndex("Ich habe Sehnsucht nach dem Meer.\n\nUn café en été, ÉTÉ toujours.\n\n雨の日は静かな音楽")
+    assert index.scores('Sehnsucht').argmax() == 0
+    assert index.scores('été').argmax() == 1
+    assert index.scores('Été')[1] > 0
+    assert index.scores('雨の日は静かな音楽').argmax() == 2
+
+
+def test_select_prefers_matching_passages():
+    index = ThoughtsIndex("rain on the window\n\nsunny beach party\n\nquiet rain at night", passage_words=80)
+    assert index.select('rain', token_budget=10) == 'rain on the window quiet rain at night'
@@ -0,0 +1,26 @@
+from util.trackmatch import _normalize, best_track
+
+
+def _track(name, artist, popularity=50):
+    return {'name': name, 'artists': [{'name': artist}], 'popularity': popularity}
+
+
+def test_normalize_keeps_non_latin_words_and_folds_accents():
+    assert _normalize('Beyoncé – Déjà Vu') == 'beyonce deja vu'
+    assert _normalize('Sigur Rós') == 'sigur ros'
+    assert _normalize('宇多田ヒカル First Love') == '宇多田ヒカル first love'
+    assert _normalize('STRASSE Straße') == 'strasse strasse'
+
+
+def test_best_track_matches_non_latin_titles():
+    tracks = [
+        _track('Lemon', 'Kenshi Yonezu Tribute Band', popularity=80),
+        _track('Cover of Lemon', 'Some Band', popularity=90),
+        _track('レモン', '米津玄師', popularity=40),
+    ]
+    assert best_track('レモン 米津玄師', tracks)['name'] == 'レモン'
+
+
+def test_best_track_ignores_missing_accents_in_the_query():
+    tracks = [_track('Halo', 'Beyoncé'), _track('Halo', 'Karaoke Stars', popularity=70)]
+    assert best_track('Halo Beyonce', tracks)['artists'][0]['name'] == 'Beyoncé'
@@ -0,0 +1,38 @@
+import json
+
+from llmlocal.txlog import TransactionLog
+
+
+def _read(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_records_are_written_as_jsonl(tmp_path):
+    path = tmp_path / 'logs' / 'llm.jsonl'
+    log = TransactionLog(str(path))
+    for i in range(50):
+        log.write({'n': i, 'response': 'déjà vu'})
+    log.flush()
+    assert [record['n'] for record in _read(path)] == list(range(50))
+    assert _read(path)[0]['response'] == 'déjà vu'
+    log.close()
+
+
+def test_write_after_close_restarts_the_writer(tmp_path):
+    path = tmp_path / 'llm.jsonl'
+    log = TransactionLog(str(path))
+    log.write({'n': 1})
+    log.close()
+    assert _read(path) == [{'n': 1}]
+    log.write({'n': 2})
+    log.close()
+    assert _read(path) == [{'n': 1}, {'n': 2}]
+
+
+def test_no_path_writes_nothing(tmp_path):
+    log = TransactionLog('')
+    log.write({'n': 1})
+    log.flush()
+    log.close()
+    assert log._thread is None
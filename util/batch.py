@@ -0,0 +1,247 @@
+"""
+Moody Playlist Batch Runner
+---------------------------
+Headless counterpart of the interactive menu: reads jobs from a JSONL file, runs
+create_moody_playlist across a worker pool with one shared SpotifyAPI per account (or, with
+use_async, create_moody_playlist_async on one event loop), and streams one result line per job
+to an output JSONL file as jobs finish.
+
+Job lines look like: {"id": "optional", "mood_prompt": "...", "thoughts_file": "optional.md", "account": "optional"}
+
+"account" names an entry in the account registry (src/accounts.py); jobs without one use the
+[spotify] token_cache. With processes > 0, each account's jobs run in one worker process of a
+process pool (so its rate limiter sees all of its traffic) while different accounts run in parallel;
+each job's record is sent back as soon as it finishes. Every worker process keeps its own warm
+LLM and Google clients and its own TinyDB file.
+"""
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import time
+import traceback
+from src import db, output
+from src.api import get_api
+from util.moodyplaylist import create_moody_playlist, _get_searcher
+from llmlocal import llm
+from llmlocal.config import LLM_WARMUP
+
+THOUGHTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'playlist-thoughts', 'thoughts')
+# Process mode: how often the parent checks for finished or dead workers, and how long it waits
+# for records still in flight from a worker before giving up on them
+_POLL_SECONDS = 0.2
+_DRAIN_SECONDS = 1.0
+
+def _read_jobs(jobs_path):
+    jobs = []
+    with open(jobs_path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            job = json.loads(line)
+            if not job.get('mood_prompt'):
+                raise ValueError(f"{jobs_path}:{line_no}: job is missing 'mood_prompt'")
+            job.setdefault('id', line_no)
+            jobs.append(job)
+    return jobs
+
+def _resolve_thoughts_file(name):
+    """Thoughts files are given by name (as listed in the menu) or by path."""
+    if not name:
+        return None
+    path = name if os.path.isabs(name) or os.path.exists(name) else os.path.join(THOUGHTS_DIR, name)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Thoughts file not found: {name}")
+    return path
+
+def _new_record(job):
+    record = {'id': job['id'], 'mood_prompt': job['mood_prompt']}
+    if job.get('account'):
+        record['account'] = job['account']
+    return record
+
+def _group_by_account(jobs):
+    groups = defaultdict(list)
+    for job in jobs:
+        groups[job.get('account')].append(job)
+    return groups
+
+def _run_job(job, api=None):
+    start = time.perf_counter()
+    record = _new_record(job)
+    try:
+        api = api or get_api(job.get('account'), interactive=False)
+        result = create_moody_playlist(job['mood_prompt'], _resolve_thoughts_file(job.get('thoughts_file')), api=api)
+        record.update(status='ok', result=result)
+    except Exception as e:
+        record.update(status='error', error=str(e), traceback=traceback.format_exc())
+    record['elapsed'] = round(time.perf_counter() - start, 3)
+    return record
+
+async def _run_jobs_async(jobs, workers, on_record):
+    """Run jobs on one AsyncEngine per account, at most `workers` at a time overall, calling on_record as each finishes."""
+    from util.moodyasync import AsyncEngine
+    gate = asyncio.Semaphore(workers)
+
+    async def run(engine, job):
+        async with gate:
+            start = time.perf_counter()
+            record = _new_record(job)
+            try:
+                thoughts_file = _resolve_thoughts_file(job.get('thoughts_file'))
+                result = await engine.create_moody_playlist(job['mood_prompt'], thoughts_file)
+                record.update(status='ok', result=result)
+            except Exception as e:
+                record.update(status='error', error=str(e), traceback=traceback.format_exc())
+            record['elapsed'] = round(time.perf_counter() - start, 3)
+            on_record(record)
+
+    async def run_account(account, account_jobs):
+        api = await asyncio.to_thread(get_api, account, False)
+        async with AsyncEngine(api=api) as engine:
+            await asyncio.gather(*(run(engine, job) for job in account_jobs))
+    await asyncio.gather(*(run_account(account, account_jobs) for account, account_jobs in _group_by_account(jobs).items()))
+
+_records = None  # in worker processes: queue of (job index, record) back to the parent
+
+def _init_worker_process(slots, db_path, output_mode, records):
+    """
+    Process-pool initializer. TinyDB is not safe across processes, so each worker gets its own
+    database file next to the main one (data/spotify_db.worker<N>.json, reused by later runs);
+    the Google client and the LLM endpoint pool are created (and warmed, unless [llm] warmup
+    is off) once per process.
+    The parent's output mode (e.g. from --quiet) is applied, since spawned workers re-read config.
+    """
+    global _records
+    _records = records
+    output.set_mode(output_mode)
+    with slots.get_lock():
+        slot = slots.value
+        slots.value += 1
+    base, ext = os.path.splitext(db_path)
+    db.db_path = f"{base}.worker{slot}{ext}"
+    try:
+        _get_searcher()
+        if LLM_WARMUP:
+            llm.warmup()
+    except Exception as e:
+        logging.warning(f"[Batch] Worker {slot} warmup failed: {e}")
+
+def _run_account_jobs(indexed_jobs, workers):
+    """
+    Process-pool task: one account's (index, job) pairs on `workers` threads sharing this
+    process's clients. Each record goes back to the parent as soon as its job finishes.
+    """
+    def run(indexed_job):
+        index, job = indexed_job
+        _records.put((index, _run_job(job)))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job') as pool:
+        list(pool.map(run, indexed_jobs))
+
+def _drain_records(records, unreported, on_record, timeout):
+    """Report records from the worker processes until none arrives for `timeout` seconds."""
+    while True:
+        try:
+            index, record = records.get(timeout=timeout)
+        except queue.Empty:
+            return
+        unreported.pop(index, None)
+        on_record(record)
+
+def _run_jobs_in_processes(jobs, processes, workers, on_record):
+    # spawn, not fork: the parent already runs logging/LLM background threads
+    context = multiprocessing.get_context('spawn')
+    slots = context.Value('i', 0)
+    records = context.Queue()
+    groups = defaultdict(list)
+    for index, job in enumerate(jobs):
+        groups[job.get('account')].append((index, job))
+    unreported = dict(enumerate(jobs))
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=min(processes, len(groups)), mp_context=context,
+                             initializer=_init_worker_process, initargs=(slots, db.db_path, output.mode(), records)) as pool:
+        futures = {pool.submit(_run_account_jobs, indexed_jobs, workers): indexed_jobs for indexed_jobs in groups.values()}
+        while futures:
+            _drain_records(records, unreported, on_record, _POLL_SECONDS)
+            for future in [f for f in futures if f.done()]:
+                indexed_jobs = futures.pop(future)
+                error = future.exception()
+                if error is None:
+                    continue
+                # The worker process died: collect what it sent before, then fail only the jobs it never finished
+                _drain_records(records, unreported, on_record, _DRAIN_SECONDS)
+                for index, job in indexed_jobs:
+                    if unreported.pop(index, None) is not None:
+                        on_record(dict(_new_record(job), status='error', error=str(error), elapsed=round(time.perf_counter() - start, 3)))
+        _drain_records(records, unreported, on_record, _DRAIN_SECONDS)
+
+def _percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def run_batch(jobs_path, output_path, workers=4, use_async=False, processes=0):
+    """
+    Run every job in jobs_path with `workers` concurrent playlists, on worker threads or,
+    with use_async, as tasks on one asyncio event loop. With processes > 0, accounts are spread
+    over that many worker processes and `workers` is the number of concurrent playlists per account.
+    Appends one JSON line per finished job to output_path and returns a summary dict.
+    """
+    if use_async and processes:
+        raise ValueError("use_async and processes cannot be combined")
+    jobs = _read_jobs(jobs_path)
+    # Authorize every account up front, while there is a terminal for a first-time login
+    accounts = sorted({job.get('account') for job in jobs}, key=lambda account: account or '')
+    for account in accounts:
+        get_api(account)
+    elapsed = []
+    failures = 0
+    start = time.perf_counter()
+    if processes:
+        mode = f"{workers} workers per account in {min(processes, len(accounts))} processes"
+    else:
+        mode = f"{workers} {'async tasks' if use_async else 'workers'}"
+    print(f"[Batch] Running {len(jobs)} jobs for {len(accounts)} account(s) with {mode} -> {output_path}")
+    with open(output_path, 'a', encoding='utf-8') as out:
+        def on_record(record):
+            nonlocal failures
+            elapsed.append(record['elapsed'])
+            if record['status'] != 'ok':
+                failures += 1
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            out.flush()
+            print(f"[Batch] Job {record['id']}: {record['status']} in {record['elapsed']:.2f}s")
+
+        if processes:
+            _run_jobs_in_processes(jobs, processes, workers, on_record)
+        elif use_async:
+            asyncio.run(_run_jobs_async(jobs, workers, on_record))
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job') as pool:
+                futures = [pool.submit(_run_job, job) for job in jobs]
+                for future in as_completed(futures):
+                    on_record(future.result())
+    wall = time.perf_counter() - start
+    summary = {
+        'jobs': len(jobs),
+        'succeeded': len(jobs) - failures,
+        'failed': failures,
+        'wall_seconds': round(wall, 3),
+        'jobs_per_minute': round(len(jobs) / wall * 60, 2) if wall > 0 else 0.0,
+        'p50_seconds': _percentile(elapsed, 50) if elapsed else 0.0,
+        'p95_seconds': _percentile(elapsed, 95) if elapsed else 0.0,
+    }
+    print(
+        f"[Batch] Done: {summary['succeeded']}/{summary['jobs']} succeeded in {summary['wall_seconds']:.1f}s | "
+        f"{summary['jobs_per_minute']:.2f} jobs/min | p50 {summary['p50_seconds']:.2f}s | p95 {summary['p95_seconds']:.2f}s"
+    )
+    return summary
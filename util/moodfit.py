@@ -0,0 +1,118 @@
+"""
+Mood Fit Scoring
+----------------
+Checks resolved tracks against the mood they were generated for. Mood words in the prompt
+(rainy, party, focus, ...) map to targets on Spotify audio features; the prompt's target
+profile is the average of the words it contains, and only the features they mention count.
+
+Every candidate is scored in one matrix pass: fit = 1 - weighted RMS distance between its
+features and the target (features scaled to 0..1). Tracks without features get a neutral
+fit, so they are neither preferred nor dropped because of missing data.
+"""
+
+import re
+import numpy as np
+
+DIMENSIONS = ('energy', 'valence', 'danceability', 'acousticness', 'instrumentalness', 'tempo')
+NEUTRAL_FIT = 0.5
+
+# Word prefix -> targets (0..1; tempo is scaled from 60..180 BPM)
+MOOD_LEXICON = {
+    'sad': {'valence': 0.2, 'energy': 0.3},
+    'melanchol': {'valence': 0.2, 'energy': 0.3, 'acousticness': 0.6},
+    'heartbr': {'valence': 0.15, 'energy': 0.35},
+    'lonely': {'valence': 0.2, 'energy': 0.25},
+    'rainy': {'valence': 0.3, 'energy': 0.3, 'acousticness': 0.6},
+    'gloom': {'valence': 0.15, 'energy': 0.3},
+    'dark': {'valence': 0.2},
+    'moody': {'valence': 0.3, 'energy': 0.4},
+    'nostalg': {'valence': 0.4, 'acousticness': 0.5},
+    'happy': {'valence': 0.85, 'energy': 0.7},
+    'joy': {'valence': 0.85, 'energy': 0.7},
+    'sunny': {'valence': 0.8, 'energy': 0.65},
+    'summer': {'valence': 0.8, 'energy': 0.7, 'danceability': 0.7},
+    'upbeat': {'valence': 0.8, 'energy': 0.75, 'tempo': 0.6},
+    'party': {'energy': 0.85, 'danceability': 0.85, 'valence': 0.75},
+    'danc': {'danceability': 0.85, 'energy': 0.8},
+    'club': {'danceability': 0.85, 'energy': 0.85},
+    'workout': {'energy': 0.9, 'tempo': 0.7, 'danceability': 0.7},
+    'gym': {'energy': 0.9, 'tempo': 0.7},
+    'running': {'energy': 0.85, 'tempo': 0.75},
+    'hype': {'energy': 0.9, 'valence': 0.7},
+    'angry': {'energy': 0.9, 'valence': 0.25},
+    'rage': {'energy': 0.95, 'valence': 0.2},
+    'chill': {'energy': 0.3, 'acousticness': 0.5, 'tempo': 0.35},
+    'calm': {'energy': 0.2, 'acousticness': 0.7, 'tempo': 0.3},
+    'relax': {'energy': 0.25, 'acousticness': 0.6, 'tempo': 0.3},
+    'sleep': {'energy': 0.1, 'acousticness': 0.8, 'instrumentalness': 0.6, 'tempo': 0.2},
+    'lullab': {'energy': 0.1, 'acousticness': 0.85, 'tempo': 0.2},
+    'focus': {'instrumentalness': 0.7, 'energy': 0.4},
+    'study': {'instrumentalness': 0.7, 'energy': 0.35},
+    'romant': {'valence': 0.6, 'energy': 0.4, 'acousticness': 0.5},
+    'love': {'valence': 0.6, 'energy': 0.45},
+    'acoustic': {'acousticness': 0.85},
+    'road': {'energy': 0.65, 'valence': 0.65},
+    'morning': {'valence': 0.65, 'energy': 0.5},
+    'night': {'energy': 0.4},
+}
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+def target_profile(mood_prompt):
+    """
+    (targets, weights) arrays over DIMENSIONS for the prompt's mood words, or None when the
+    prompt contains none (nothing to score against).
+    """
+    words = _WORD_RE.findall(mood_prompt.lower())
+    matched = [targets for prefix, targets in MOOD_LEXICON.items() if any(w.startswith(prefix) for w in words)]
+    if not matched:
+        return None
+    sums = np.zeros(len(DIMENSIONS))
+    counts = np.zeros(len(DIMENSIONS))
+    for targets in matched:
+        for dim, value in targets.items():
+            sums[DIMENSIONS.index(dim)] += value
+            counts[DIMENSIONS.index(dim)] += 1
+    targets = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+    return targets, (counts > 0).astype(np.float64)
+
+
+def _feature_matrix(features_list):
+    """Rows of scaled features per track; NaN rows for tracks without features."""
+    matrix = np.full((len(features_list), len(DIMENSIONS)), np.nan)
+    for row, features in enumerate(features_list):
+        if not features:
+            continue
+        matrix[row] = [features.get(dim) if features.get(dim) is not None else np.nan for dim in DIMENSIONS]
+    tempo = DIMENSIONS.index('tempo')
+    matrix[:, tempo] = np.clip((matrix[:, tempo] - 60.0) / 120.0, 0.0, 1.0)
+    return matrix
+
+
+def fit_scores(features_list, profile):
+    """Mood fit in 0..1 for each entry of features_list (Spotify audio features dicts or None)."""
+    if not features_list:
+        return np.zeros(0)
+    targets, weights = profile
+    matrix = _feature_matrix(features_list)
+    present = ~np.isnan(matrix) & (weights > 0)
+    diff = np.where(present, matrix - targets, 0.0)
+    used = (present * weights).sum(axis=1)
+    rms = np.sqrt(np.divide((diff ** 2 * weights).sum(axis=1), used, out=np.zeros(len(matrix)), where=used > 0))
+    return np.where(used > 0, 1.0 - rms, NEUTRAL_FIT)
+
+
+def prune(track_ids, features, profile, keep):
+    """
+    The `keep` best-fitting track ids (features: {id: features or None}), in their original
+    order. Without a profile the first `keep` are returned.
+    """
+    if len(track_ids) <= keep:
+        return list(track_ids)
+    if profile is None:
+        return list(track_ids[:keep])
+    scores = fit_scores([features.get(tid) for tid in track_ids], profile)
+    # Stable sort: equal fits keep the LLM's order
+    best = sorted(np.argsort(-scores, kind='stable')[:keep])
+    return [track_ids[i] for i in best]
@@ -0,0 +1,276 @@
+"""
+Moody Playlist Asyncio Engine
+-----------------------------
+Async counterpart of util/moodyplaylist.py: the same six stages, but Google and Spotify go
+through one shared httpx.AsyncClient and the LLM through openai.AsyncOpenAI, so a single
+event loop can run dozens of playlist jobs at once.
+
+An AsyncEngine owns the HTTP client and one concurrency semaphore per service, shared by
+every job running on its loop. Prompts, response parsing, track reranking, the search caches
+and the Spotify rate limiter are shared with the blocking pipeline.
+
+    results = run_moody_playlists([{"mood_prompt": "rainy night"}, ...])   # from blocking code
+
+    async with AsyncEngine() as engine:                                   # inside an event loop
+        result = await engine.create_moody_playlist("rainy night")
+"""
+
+import asyncio
+import httpx
+from src.api import get_api
+from src.config import (
+    AI_PLAYLIST_LLM_MODE, AI_PLAYLIST_SEARCH_CANDIDATES, METRICS_EXPORT_FILE,
+    SPOTIFY_MAX_CONCURRENCY, GOOGLE_MAX_CONCURRENCY, HISTORY_ENABLED,
+    JOB_DEADLINE_SECONDS, GOOGLE_TIMEOUT_SECONDS, LLM_STAGE_SECONDS, SPOTIFY_RESOLVE_SECONDS
+)
+from src import metrics, output
+from src.resilience import Deadline, get_breaker
+from src.history import record_run
+from llmlocal import llm
+from llmlocal.config import LLM_MAX_CONCURRENCY
+from util.moodyplaylist import (
+    _get_searcher, _shorten_google_results, _read_and_normalize_thoughts, _build_llm_context,
+    _playlist_name_prompt, _song_query_prompt, _structured_prompt, _clean_playlist_name,
+    _split_song_queries, _parse_structured_response, _pick_tracks, _build_result, _llm_timeout,
+    _llm_outage, _query_count, _fit_to_mood
+)
+
+
+class AsyncEngine:
+    """HTTP client plus per-service semaphores shared by every playlist job on one event loop."""
+
+    def __init__(self, api=None, spotify_concurrency=None, google_concurrency=None, llm_concurrency=None):
+        self.api = api
+        self.spotify = asyncio.Semaphore(spotify_concurrency or SPOTIFY_MAX_CONCURRENCY)
+        self.google = asyncio.Semaphore(google_concurrency or GOOGLE_MAX_CONCURRENCY)
+        self.llm = asyncio.Semaphore(llm_concurrency or LLM_MAX_CONCURRENCY)
+        self.http = None
+
+    async def __aenter__(self):
+        pool_size = max(10, SPOTIFY_MAX_CONCURRENCY + GOOGLE_MAX_CONCURRENCY)
+        self.http = httpx.AsyncClient(limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size))
+        if self.api is None:
+            # First use may run the interactive OAuth flow; keep it off the loop
+            self.api = await asyncio.to_thread(get_api)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.http.aclose()
+
+    async def create_moody_playlist(self, mood_prompt, thoughts_file=None):
+        """Async create_moody_playlist: same result dict, including 'metrics' and 'history_id'."""
+        run_metrics = metrics.RunMetrics()
+        try:
+            with metrics.activate(run_metrics), run_metrics.span('pipeline.total'):
+                result = await self._run_pipeline(mood_prompt, thoughts_file)
+        finally:
+            if METRICS_EXPORT_FILE:
+                await asyncio.to_thread(metrics.export_run, run_metrics.to_dict(), METRICS_EXPORT_FILE)
+        result['metrics'] = run_metrics.to_dict()
+        if HISTORY_ENABLED:
+            result['history_id'] = await asyncio.to_thread(record_run, result)
+        return result
+
+    async def _google_context(self, mood_prompt, deadline):
+        """Async _google_context: empty context when Google is slow, failing or out of budget."""
+        searcher = _get_searcher()
+        try:
+            deadline.check('google_search')
+            budget = deadline.budget(GOOGLE_TIMEOUT_SECONDS)
+
+            async def search():
+                async with self.google:
+                    return await searcher.search_async(mood_prompt, self.http, num=5, timeout=budget)
+            with metrics.span('stage.google_search'):
+                # The budget also covers time spent waiting for the Google semaphore
+                google_results = await asyncio.wait_for(search(), budget)
+                await asyncio.to_thread(searcher.cache.flush)
+        except Exception as e:
+            output.say("[MoodyPlaylist] (async) Skipping Google context: %r", e)
+            metrics.incr('stages_skipped_total', stage='google_search')
+            return ""
+        return _shorten_google_results(google_results)
+
+    async def _thoughts_context(self, mood_prompt, thoughts_file):
+        with metrics.span('stage.thoughts'):
+            return await asyncio.to_thread(_read_and_normalize_thoughts, thoughts_file, mood_prompt)
+
+    async def _llm_complete(self, prompt, span_name, deadline=None):
+        async with self.llm:
+            timeout = _llm_timeout(deadline, span_name)
+            with get_breaker('llm').guard(_llm_outage(deadline, timeout)), metrics.span(span_name):
+                response = await llm.llm_complete_async(prompt, timeout=timeout)
+        metrics.incr('cache_hits_total' if llm.last_call_cached() else 'cache_misses_total', cache='llm')
+        return response
+
+    async def _search(self, query):
+        async with self.spotify:
+            return await self.api.search_tracks_or_empty_async(self.http, query, limit=AI_PLAYLIST_SEARCH_CANDIDATES)
+
+    async def _generate_name_and_queries(self, llm_context, song_count, deadline=None):
+        """Async _generate_name_and_queries: one JSON completion, or two concurrent ones ('split' or fallback)."""
+        if AI_PLAYLIST_LLM_MODE == 'single':
+            structured_prompt = _structured_prompt(llm_context, song_count)
+            structured_response = await self._llm_complete(structured_prompt, 'llm.structured', deadline)
+            parsed = _parse_structured_response(structured_response)
+            if parsed:
+                playlist_name, song_queries = parsed
+                return {
+                    'playlist_name': playlist_name,
+                    'song_queries': song_queries,
+                    'name_prompt': structured_prompt,
+                    'name_response': structured_response,
+                    'query_prompt': structured_prompt,
+                    'query_response': structured_response,
+                }
+            output.say("[MoodyPlaylist] Structured response failed validation; falling back to parallel calls.")
+            metrics.incr('retries_total', service='llm')
+
+        playlist_name_prompt = _playlist_name_prompt(llm_context)
+        song_query_prompt = _song_query_prompt(llm_context, song_count)
+        playlist_name_response, song_queries_raw = await asyncio.gather(
+            self._llm_complete(playlist_name_prompt, 'llm.playlist_name', deadline),
+            self._llm_complete(song_query_prompt, 'llm.song_queries', deadline),
+        )
+        return {
+            'playlist_name': _clean_playlist_name(playlist_name_response),
+            'song_queries': _split_song_queries(song_queries_raw),
+            'name_prompt': playlist_name_prompt,
+            'name_response': playlist_name_response,
+            'query_prompt': song_query_prompt,
+            'query_response': song_queries_raw,
+        }
+
+    async def _stream_name_and_queries(self, llm_context, song_count, deadline=None):
+        """
+        Async 'stream' mode: each streamed song query starts its Spotify search immediately.
+        If deadline passes mid-stream (even while waiting for the next line), the queries streamed so far are used.
+        """
+        playlist_name_prompt = _playlist_name_prompt(llm_context)
+        song_query_prompt = _song_query_prompt(llm_context, song_count)
+        name_task = asyncio.create_task(self._llm_complete(playlist_name_prompt, 'llm.playlist_name', deadline))
+        song_queries = []
+        search_tasks = []
+        response_lines = []
+        try:
+            async with self.llm:
+                timeout = _llm_timeout(deadline, 'llm.song_queries_stream')
+                stream = llm.llm_stream_async(song_query_prompt, lines=True, timeout=timeout)
+                try:
+                    with get_breaker('llm').guard(_llm_outage(deadline, timeout)), metrics.span('llm.song_queries_stream'):
+                        while True:
+                            try:
+                                line = await asyncio.wait_for(stream.__anext__(), deadline.remaining() if deadline else None)
+                            except StopAsyncIteration:
+                                break
+                            except asyncio.TimeoutError:
+                                output.say("[MoodyPlaylist] (async) LLM stage budget used up; continuing with %d streamed queries", len(song_queries))
+                                metrics.incr('stages_cut_short_total', stage='llm')
+                                break
+                            response_lines.append(line)
+                            query = line.strip()
+                            if query:
+                                song_queries.append(query)
+                                search_tasks.append(asyncio.create_task(self._search(query)))
+                finally:
+                    await stream.aclose()
+            metrics.incr('cache_hits_total' if llm.last_call_cached() else 'cache_misses_total', cache='llm')
+            playlist_name_response = await name_task
+        except BaseException:
+            for task in [name_task] + search_tasks:
+                task.cancel()
+            raise
+        return {
+            'playlist_name': _clean_playlist_name(playlist_name_response),
+            'song_queries': song_queries,
+            'search_tasks': search_tasks,
+            'name_prompt': playlist_name_prompt,
+            'name_response': playlist_name_response,
+            'query_prompt': song_query_prompt,
+            'query_response': '\n'.join(response_lines),
+        }
+
+    async def _run_pipeline(self, mood_prompt, thoughts_file):
+        deadline = Deadline(JOB_DEADLINE_SECONDS)
+        output.say("[MoodyPlaylist] (async) Gathering Google and thoughts context for '%s'...", mood_prompt)
+        search_context, thoughts_context = await asyncio.gather(
+            self._google_context(mood_prompt, deadline),
+            self._thoughts_context(mood_prompt, thoughts_file),
+        )
+        with metrics.span('stage.context'):
+            llm_context = _build_llm_context(mood_prompt, search_context, thoughts_context)
+
+        output.say("[MoodyPlaylist] (async) Generating playlist name and song queries (mode: %s)...", AI_PLAYLIST_LLM_MODE)
+        llm_deadline = deadline.child(LLM_STAGE_SECONDS)
+        with metrics.span('stage.llm', mode=AI_PLAYLIST_LLM_MODE):
+            if AI_PLAYLIST_LLM_MODE == 'stream':
+                generated = await self._stream_name_and_queries(llm_context, _query_count(mood_prompt), llm_deadline)
+            else:
+                generated = await self._generate_name_and_queries(llm_context, _query_count(mood_prompt), llm_deadline)
+        song_queries = generated['song_queries']
+
+        output.say("[MoodyPlaylist] (async) Resolving %d song queries on Spotify...", len(song_queries))
+        user_id = (await asyncio.to_thread(self.api.current_user))['id']
+        with metrics.span('stage.spotify_resolve'):
+            search_tasks = generated.get('search_tasks') or [asyncio.create_task(self._search(query)) for query in song_queries]
+            search_results = await _collect_searches(search_tasks, deadline.budget(SPOTIFY_RESOLVE_SECONDS))
+            await asyncio.to_thread(self.api.track_cache.flush)
+        found_tracks = _pick_tracks(song_queries, search_results)
+        with metrics.span('stage.mood_fit'):
+            found_tracks = await asyncio.to_thread(_fit_to_mood, mood_prompt, found_tracks, self.api, deadline)
+
+        with metrics.span('stage.spotify_create'):
+            async with self.spotify:
+                playlist = await self.api.create_playlist_async(
+                    self.http, user_id, generated['playlist_name'], description=f"Moody playlist: {mood_prompt}"
+                )
+        with metrics.span('stage.spotify_add'):
+            async with self.spotify:
+                add_result = await self.api.add_tracks_to_playlist_async(self.http, playlist['id'], found_tracks)
+        output.say("[MoodyPlaylist] (async) Created playlist '%s' with %d tracks", generated['playlist_name'], add_result['added'])
+
+        return _build_result(mood_prompt, thoughts_file, search_context, llm_context, generated, playlist, add_result, found_tracks)
+
+
+async def _collect_searches(tasks, timeout):
+    """Async SpotifyAPI.collect_searches: searches not done after timeout are cancelled and count as empty."""
+    if not tasks:
+        return []
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    if pending:
+        for task in pending:
+            task.cancel()
+        output.say("[MoodyPlaylist] (async) %d of %d searches still pending after %.1fs; continuing without them", len(pending), len(tasks), timeout)
+        metrics.incr('searches_abandoned_total', len(pending))
+    return [task.result() if task in done else [] for task in tasks]
+
+
+async def create_moody_playlist_async(mood_prompt, thoughts_file=None, api=None, engine=None):
+    """
+    Async public interface: create one moody playlist.
+    Pass a running AsyncEngine to share its client and semaphores with other jobs;
+    otherwise a short-lived engine is created for this call.
+    """
+    if engine is not None:
+        return await engine.create_moody_playlist(mood_prompt, thoughts_file)
+    async with AsyncEngine(api=api) as engine:
+        return await engine.create_moody_playlist(mood_prompt, thoughts_file)
+
+
+async def run_moody_playlists_async(jobs, api=None, max_jobs=None):
+    """
+    Run many jobs ({"mood_prompt": ..., "thoughts_file": optional}) on one engine, at most
+    max_jobs at a time (default: all). Returns results in job order; a failed job's entry is its exception.
+    """
+    async with AsyncEngine(api=api) as engine:
+        gate = asyncio.Semaphore(max_jobs or max(len(jobs), 1))
+
+        async def run(job):
+            async with gate:
+                return await engine.create_moody_playlist(job['mood_prompt'], job.get('thoughts_file'))
+        return await asyncio.gather(*(run(job) for job in jobs), return_exceptions=True)
+
+
+def run_moody_playlists(jobs, api=None, max_jobs=None):
+    """Blocking wrapper around run_moody_playlists_async for callers without an event loop."""
+    return asyncio.run(run_moody_playlists_async(jobs, api=api, max_jobs=max_jobs))
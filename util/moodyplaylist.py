@@ -6,16 +6,81 @@ All orchestration, Spotify state, and context gathering are handled internally.
 No user_id, cse_id, or Spotify details required from the caller.
 """
 
-from src.api import SpotifyAPI
+from concurrent.futures import ThreadPoolExecutor, wait
+import json
+import math
+import os
+import re
+import threading
+from src.api import get_api, audio_features_available
 from src.googleapi import GoogleSearch
+from src.config import AI_PLAYLIST_SONG_COUNT, AI_PLAYLIST_LLM_MODE, AI_PLAYLIST_THOUGHTS_TOKEN_BUDGET, AI_PLAYLIST_SEARCH_CANDIDATES, METRICS_EXPORT_FILE, HISTORY_ENABLED
+from src.config import AI_PLAYLIST_MOOD_FIT, AI_PLAYLIST_MOOD_FIT_EXTRA
+from src.config import JOB_DEADLINE_SECONDS, GOOGLE_TIMEOUT_SECONDS, LLM_STAGE_SECONDS, SPOTIFY_RESOLVE_SECONDS
+from src import metrics, output
+from src.resilience import Deadline, get_breaker
+from src.history import record_run
 from llmlocal import llm
+from llmlocal.config import LLM_WARMUP
+from util import moodfit, thoughts, trackmatch
 
-def _read_and_normalize_thoughts(thoughts_file):
-    """Read and normalize the selected thoughts file for LLM context."""
+_searcher = None
+_searcher_lock = threading.Lock()
+
+def _get_searcher():
+    """Shared GoogleSearch (keep-alive session + cache), created on first use."""
+    global _searcher
+    with _searcher_lock:
+        if _searcher is None:
+            _searcher = GoogleSearch()
+        return _searcher
+
+_prefetch_executor = None
+_prefetch_lock = threading.Lock()
+
+def start_prefetch(mood_prompt, thoughts_files=(), warm_spotify=True):
+    """
+    Speculatively start the slow work of a run while the user is still answering prompts:
+    the Google search for mood_prompt, LLM warmup (unless [llm] warmup is off), thoughts-file
+    indexing and (with warm_spotify) Spotify auth plus the user profile. Returns a dict of
+    futures to pass as create_moody_playlist(..., prefetch=...); it is ignored if the mood
+    prompt changes. The Google search records its spans and counters into the prefetch's
+    RunMetrics, which the run that uses the prefetch continues.
+    """
+    global _prefetch_executor
+    with _prefetch_lock:
+        if _prefetch_executor is None:
+            _prefetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='prefetch')
+    executor = _prefetch_executor
+    run_metrics = metrics.RunMetrics()
+    with metrics.activate(run_metrics):
+        google_results = metrics.submit(executor, _prefetch_google, mood_prompt)
+    prefetch = {
+        'mood_prompt': mood_prompt,
+        'metrics': run_metrics,
+        'google_results': google_results,
+        'thoughts': {os.path.abspath(path): executor.submit(thoughts.get_index, path) for path in thoughts_files},
+    }
+    if LLM_WARMUP:
+        prefetch['llm_warmup'] = executor.submit(llm.warmup)
+    if warm_spotify:
+        prefetch['spotify_user'] = executor.submit(lambda: get_api().current_user())
+    return prefetch
+
+def _prefetch_google(mood_prompt):
+    searcher = _get_searcher()
+    google_results = searcher.search(mood_prompt, num=5)
+    searcher.cache.flush()
+    return google_results
+
+def _read_and_normalize_thoughts(thoughts_file, mood_prompt=""):
+    """
+    Normalized thoughts-file context for the LLM.
+    Files over the token budget are cut down to the passages most relevant to the mood prompt.
+    """
     if not thoughts_file:
         return ""
-    with open(thoughts_file, 'r', encoding='utf-8') as f:
-        return ' '.join(f.read().strip().split())
+    return thoughts.select_context(thoughts_file, mood_prompt, AI_PLAYLIST_THOUGHTS_TOKEN_BUDGET)
 
 def _shorten_google_results(results, max_chars=800):
     """Shorten Google search results for LLM context."""
@@ -28,75 +93,348 @@ def _shorten_google_results(results, max_chars=800):
         texts.append(f"{title}: {snippet}")
     return '\n'.join(texts)[:max_chars]
 
-def create_moody_playlist(mood_prompt, thoughts_file=None):
+def _google_context(mood_prompt, deadline, prefetched=None):
     """
-    Public interface: create a moody playlist from a mood prompt and optional thoughts file.
-    Handles all Spotify state, context gathering, and orchestration internally.
-    Returns a summary/result object (playlist name, etc).
+    Shortened Google results for the LLM context; empty when Google is slow, failing or out of budget.
+    prefetched: a start_prefetch future for the same search, waited on instead of searching again.
     """
-    print("[MoodyPlaylist] Step 1: Google search for mood/idea...")
-    searcher = GoogleSearch()
-    google_results = searcher.search(mood_prompt, num=5)
-    print(f"[MoodyPlaylist] Google results: {google_results}")
-    search_context = _shorten_google_results(google_results)
-
-    print("[MoodyPlaylist] Step 2: Normalize thoughts file...")
-    thoughts_context = _read_and_normalize_thoughts(thoughts_file)
-    print(f"[MoodyPlaylist] Thoughts context: {thoughts_context}")
+    searcher = _get_searcher()
+    try:
+        deadline.check('google_search')
+        with metrics.span('stage.google_search'):
+            if prefetched is not None:
+                google_results = prefetched.result(timeout=deadline.budget(GOOGLE_TIMEOUT_SECONDS))
+                metrics.incr('prefetch_used_total', stage='google_search')
+            else:
+                google_results = searcher.search(mood_prompt, num=5, timeout=deadline.budget(GOOGLE_TIMEOUT_SECONDS))
+                searcher.cache.flush()
+    except Exception as e:
+        output.say("[MoodyPlaylist] Skipping Google context: %r", e)
+        metrics.incr('stages_skipped_total', stage='google_search')
+        return ""
+    output.say("[MoodyPlaylist] Google results: %s", output.preview(google_results))
+    return _shorten_google_results(google_results)
 
-    print("[MoodyPlaylist] Step 3: Build LLM context...")
-    llm_context = f"Mood prompt: {mood_prompt}\n\nGoogle context: {search_context}\n\nThoughts: {thoughts_context}"
-    print(f"[MoodyPlaylist] LLM context:\n{llm_context}")
+def _build_llm_context(mood_prompt, search_context, thoughts_context):
+    return f"Mood prompt: {mood_prompt}\n\nGoogle context: {search_context}\n\nThoughts: {thoughts_context}"
 
-    print("[MoodyPlaylist] Step 4: Generate playlist name via LLM...")
-    playlist_name_prompt = [
-        {"role": "user", "content": f"Given the following context, generate a short, fun, moody playlist name.\n\n{llm_context}"}
-    ]
-    print(f"[MoodyPlaylist] Playlist name LLM prompt: {playlist_name_prompt}")
-    playlist_name_response = llm.llm_complete(playlist_name_prompt)
-    print(f"[MoodyPlaylist] Playlist name LLM response: {playlist_name_response}")
-    playlist_name = playlist_name_response.strip().replace('"', '')
-
-    print("[MoodyPlaylist] Step 5: Generate song search queries via LLM...")
-    song_query_prompt = [
-        {"role": "user", "content": f"Given the following context, generate a list of 10 Spotify-friendly song search queries (one per line, no numbering, no extra text).\n\n{llm_context}"}
-    ]
-    print(f"[MoodyPlaylist] Song queries LLM prompt: {song_query_prompt}")
-    song_queries_raw = llm.llm_complete(song_query_prompt)
-    print(f"[MoodyPlaylist] Song queries LLM response: {song_queries_raw}")
-    song_queries = [q.strip() for q in song_queries_raw.split('\n') if q.strip()]
-
-    print("[MoodyPlaylist] Step 6: Search Spotify for tracks and create playlist...")
-    api = SpotifyAPI()
-    user = api.sp.current_user()
-    user_id = user['id']
+def _pick_tracks(song_queries, search_results):
+    """Best-matching track id per query (queries without results are dropped); updates the track counters."""
     found_tracks = []
-    for query in song_queries:
-        print(f"[MoodyPlaylist] Searching Spotify for: {query}")
-        tracks = api.search_tracks(query, limit=1)
-        print(f"[MoodyPlaylist] Spotify search result: {tracks}")
-        if tracks:
-            found_tracks.append(tracks[0]['id'])
+    for query, tracks in zip(song_queries, search_results):
+        output.detail("[MoodyPlaylist] Spotify search result for '%s': %s", query, tracks)
+        best = trackmatch.best_track(query, tracks)
+        if best:
+            if best is not tracks[0]:
+                metrics.incr('tracks_reranked_total')
+            found_tracks.append(best['id'])
+    metrics.incr('tracks_requested_total', len(song_queries))
+    metrics.incr('tracks_found_total', len(found_tracks))
+    output.say("[MoodyPlaylist] Matched %d of %d song queries", len(found_tracks), len(song_queries))
     if not found_tracks:
-        print("[MoodyPlaylist] No tracks found for generated queries.")
+        output.say("[MoodyPlaylist] No tracks found for generated queries.")
         raise Exception("No tracks found for generated queries.")
+    return found_tracks
 
-    playlist = api.create_playlist(user_id, playlist_name, description=f"Moody playlist: {mood_prompt}")
-    print(f"[MoodyPlaylist] Created playlist: {playlist}")
-    api.add_tracks_to_playlist(playlist['id'], found_tracks)
-    print(f"[MoodyPlaylist] Added tracks: {found_tracks}")
+def _query_count(mood_prompt):
+    """Song queries to ask the LLM for: with mood fit on, extra candidates so the worst fits can be pruned."""
+    if not AI_PLAYLIST_MOOD_FIT or not audio_features_available() or moodfit.target_profile(mood_prompt) is None:
+        return AI_PLAYLIST_SONG_COUNT
+    return math.ceil(AI_PLAYLIST_SONG_COUNT * (1 + AI_PLAYLIST_MOOD_FIT_EXTRA))
 
+def _fit_to_mood(mood_prompt, found_tracks, api, deadline):
+    """
+    Prune over-generated tracks to song_count, keeping the best fits to the mood's target profile.
+    Audio features come from the local cache or one request per 100 tracks; without them
+    (endpoint refused, stage failed, no budget left) the first song_count tracks are kept.
+    """
+    found_tracks = list(dict.fromkeys(found_tracks))
+    if len(found_tracks) <= AI_PLAYLIST_SONG_COUNT:
+        return found_tracks
+    profile = moodfit.target_profile(mood_prompt) if AI_PLAYLIST_MOOD_FIT else None
+    features = {}
+    if profile is not None:
+        try:
+            deadline.check('mood_fit')
+            features = api.get_audio_features(found_tracks)
+        except Exception as e:
+            output.say("[MoodyPlaylist] Skipping mood fit: %r", e)
+            metrics.incr('stages_skipped_total', stage='mood_fit')
+            profile = None
+    kept = moodfit.prune(found_tracks, features, profile, AI_PLAYLIST_SONG_COUNT)
+    metrics.incr('tracks_pruned_total', len(found_tracks) - len(kept))
+    output.say("[MoodyPlaylist] Kept %d of %d tracks%s", len(kept), len(found_tracks), " by mood fit" if features else "")
+    return kept
+
+def _build_result(mood_prompt, thoughts_file, search_context, llm_context, generated, playlist, add_result, found_tracks):
     return {
         'playlist_id': playlist['id'],
-        'playlist_name': playlist_name,
-        'track_count': len(found_tracks),
+        'playlist_name': generated['playlist_name'],
+        'track_count': add_result['added'],
         'mood_prompt': mood_prompt,
         'thoughts_file': thoughts_file,
         'google_context': search_context,
         'llm_context': llm_context,
-        'llm_playlist_name_prompt': playlist_name_prompt,
-        'llm_playlist_name_response': playlist_name_response,
-        'llm_song_query_prompt': song_query_prompt,
-        'llm_song_query_response': song_queries_raw,
+        'llm_playlist_name_prompt': generated['name_prompt'],
+        'llm_playlist_name_response': generated['name_response'],
+        'llm_song_query_prompt': generated['query_prompt'],
+        'llm_song_query_response': generated['query_response'],
         'spotify_track_ids': found_tracks
     }
+
+def _llm_timeout(deadline, stage):
+    """Seconds left for an LLM call in this stage (None = client default); raises DeadlineExceeded when none are left."""
+    if deadline is None:
+        return None
+    deadline.check(stage)
+    return deadline.remaining()
+
+def _llm_outage(deadline, timeout):
+    """LLM breaker failure predicate for a call given timeout (from _llm_timeout) within deadline's stage budget."""
+    budget = deadline.seconds if deadline is not None else None
+    return lambda e: llm.is_outage(e, timeout, budget)
+
+def _llm_complete(prompt, span_name, deadline=None):
+    """llm.llm_complete inside a metrics span and the LLM circuit breaker; also counts LLM cache hits/misses."""
+    timeout = _llm_timeout(deadline, span_name)
+    with get_breaker('llm').guard(_llm_outage(deadline, timeout)), metrics.span(span_name):
+        response = llm.llm_complete(prompt, timeout=timeout)
+    metrics.incr('cache_hits_total' if llm.last_call_cached() else 'cache_misses_total', cache='llm')
+    return response
+
+def _playlist_name_prompt(llm_context):
+    return [
+        {"role": "user", "content": f"Given the following context, generate a short, fun, moody playlist name.\n\n{llm_context}"}
+    ]
+
+def _song_query_prompt(llm_context, song_count):
+    return [
+        {"role": "user", "content": f"Given the following context, generate a list of {song_count} Spotify-friendly song search queries (one per line, no numbering, no extra text).\n\n{llm_context}"}
+    ]
+
+def _structured_prompt(llm_context, song_count):
+    return [
+        {"role": "user", "content": (
+            "Given the following context, reply with ONLY a JSON object and no other text, shaped like "
+            '{"playlist_name": "...", "song_queries": ["...", "..."]}. '
+            f"playlist_name is a short, fun, moody playlist name; song_queries is a list of {song_count} "
+            "Spotify-friendly song search queries (song title and artist, no numbering).\n\n"
+            f"{llm_context}"
+        )}
+    ]
+
+def _clean_playlist_name(response):
+    return response.strip().replace('"', '')
+
+def _split_song_queries(response):
+    return [q.strip() for q in response.split('\n') if q.strip()]
+
+def _parse_structured_response(response):
+    """
+    Parse and validate the single-call JSON reply.
+    Tolerates code fences and chatter around the object, then falls back to pulling the
+    fields out with regexes. Returns (playlist_name, song_queries) or None if invalid.
+    """
+    if not response:
+        return None
+    data = None
+    start, end = response.find('{'), response.rfind('}')
+    if start != -1 and end > start:
+        try:
+            data = json.loads(response[start:end + 1])
+        except ValueError:
+            data = None
+    if not isinstance(data, dict):
+        name_match = re.search(r'"playlist_name"\s*:\s*"([^"]*)"', response)
+        queries_match = re.search(r'"song_queries"\s*:\s*\[(.*?)\]', response, re.S)
+        data = {
+            'playlist_name': name_match.group(1) if name_match else None,
+            'song_queries': re.findall(r'"([^"]+)"', queries_match.group(1)) if queries_match else None,
+        }
+    name = data.get('playlist_name')
+    queries = data.get('song_queries')
+    if not isinstance(name, str) or not name.strip():
+        return None
+    if not isinstance(queries, list):
+        return None
+    queries = [q.strip() for q in queries if isinstance(q, str) and q.strip()]
+    if not queries:
+        return None
+    return _clean_playlist_name(name), queries
+
+def _generate_name_and_queries(llm_context, song_count, deadline=None):
+    """
+    Step 4+5: get the playlist name and song queries from the LLM.
+    In 'single' mode one JSON completion provides both; if it fails validation (or in
+    'split' mode) the name and query completions run in parallel.
+    Every call must finish before deadline (the LLM stage budget).
+    Returns a dict with the parsed values and every prompt/response used.
+    """
+    if AI_PLAYLIST_LLM_MODE == 'single':
+        structured_prompt = _structured_prompt(llm_context, song_count)
+        output.say("[MoodyPlaylist] Structured LLM prompt: %s", output.preview(structured_prompt))
+        structured_response = _llm_complete(structured_prompt, 'llm.structured', deadline)
+        output.say("[MoodyPlaylist] Structured LLM response: %s", output.preview(structured_response))
+        parsed = _parse_structured_response(structured_response)
+        if parsed:
+            playlist_name, song_queries = parsed
+            return {
+                'playlist_name': playlist_name,
+                'song_queries': song_queries,
+                'name_prompt': structured_prompt,
+                'name_response': structured_response,
+                'query_prompt': structured_prompt,
+                'query_response': structured_response,
+            }
+        output.say("[MoodyPlaylist] Structured response failed validation; falling back to parallel calls.")
+        metrics.incr('retries_total', service='llm')
+
+    playlist_name_prompt = _playlist_name_prompt(llm_context)
+    song_query_prompt = _song_query_prompt(llm_context, song_count)
+    output.say("[MoodyPlaylist] Playlist name LLM prompt: %s", output.preview(playlist_name_prompt))
+    output.say("[MoodyPlaylist] Song queries LLM prompt: %s", output.preview(song_query_prompt))
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix='llm') as pool:
+        name_future = metrics.submit(pool, _llm_complete, playlist_name_prompt, 'llm.playlist_name', deadline)
+        query_future = metrics.submit(pool, _llm_complete, song_query_prompt, 'llm.song_queries', deadline)
+        playlist_name_response = name_future.result()
+        song_queries_raw = query_future.result()
+    output.say("[MoodyPlaylist] Playlist name LLM response: %s", output.preview(playlist_name_response))
+    output.say("[MoodyPlaylist] Song queries LLM response: %s", output.preview(song_queries_raw))
+    return {
+        'playlist_name': _clean_playlist_name(playlist_name_response),
+        'song_queries': _split_song_queries(song_queries_raw),
+        'name_prompt': playlist_name_prompt,
+        'name_response': playlist_name_response,
+        'query_prompt': song_query_prompt,
+        'query_response': song_queries_raw,
+    }
+
+def _stream_name_and_queries(llm_context, song_count, api, deadline=None):
+    """
+    Step 4+5 in 'stream' mode: the name completion runs in the background while the song
+    query completion streams; each finished line is sent to Spotify search immediately.
+    If deadline passes mid-stream, the queries streamed so far are used.
+    Returns the same dict as _generate_name_and_queries plus the pending search futures.
+    """
+    playlist_name_prompt = _playlist_name_prompt(llm_context)
+    song_query_prompt = _song_query_prompt(llm_context, song_count)
+    output.say("[MoodyPlaylist] Playlist name LLM prompt: %s", output.preview(playlist_name_prompt))
+    output.say("[MoodyPlaylist] Song queries LLM prompt (streaming): %s", output.preview(song_query_prompt))
+    song_queries = []
+    search_futures = []
+    response_lines = []
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='llm') as pool:
+        name_future = metrics.submit(pool, _llm_complete, playlist_name_prompt, 'llm.playlist_name', deadline)
+        timeout = _llm_timeout(deadline, 'llm.song_queries_stream')
+        with get_breaker('llm').guard(_llm_outage(deadline, timeout)), metrics.span('llm.song_queries_stream'):
+            for line in llm.llm_stream(song_query_prompt, lines=True, timeout=timeout):
+                if deadline is not None and deadline.expired():
+                    output.say("[MoodyPlaylist] LLM stage budget used up; continuing with %d streamed queries", len(song_queries))
+                    metrics.incr('stages_cut_short_total', stage='llm')
+                    break
+                response_lines.append(line)
+                query = line.strip()
+                if query:
+                    output.say("[MoodyPlaylist] Streamed song query, searching Spotify: %s", query)
+                    song_queries.append(query)
+                    search_futures.append(api.submit_search(query, limit=AI_PLAYLIST_SEARCH_CANDIDATES))
+        metrics.incr('cache_hits_total' if llm.last_call_cached() else 'cache_misses_total', cache='llm')
+        playlist_name_response = name_future.result()
+    song_queries_raw = '\n'.join(response_lines)
+    output.say("[MoodyPlaylist] Playlist name LLM response: %s", output.preview(playlist_name_response))
+    output.say("[MoodyPlaylist] Song queries LLM response: %s", output.preview(song_queries_raw))
+    return {
+        'playlist_name': _clean_playlist_name(playlist_name_response),
+        'song_queries': song_queries,
+        'search_futures': search_futures,
+        'name_prompt': playlist_name_prompt,
+        'name_response': playlist_name_response,
+        'query_prompt': song_query_prompt,
+        'query_response': song_queries_raw,
+    }
+
+def create_moody_playlist(mood_prompt, thoughts_file=None, api=None, prefetch=None):
+    """
+    Public interface: create a moody playlist from a mood prompt and optional thoughts file.
+    Handles all Spotify state, context gathering, and orchestration internally.
+    Uses the process-wide SpotifyAPI unless another client is passed as `api`.
+    `prefetch` is an optional start_prefetch() result for the same mood prompt.
+    Returns a summary/result object (playlist name, etc), including timing spans and
+    counters under 'metrics' (also exported to [metrics] export_file when configured).
+    Successful runs are appended to the run history (src/history.py) as 'history_id'.
+    """
+    if prefetch is not None and prefetch.get('mood_prompt') == mood_prompt and 'metrics' in prefetch:
+        run_metrics = prefetch['metrics']
+    else:
+        run_metrics = metrics.RunMetrics()
+    try:
+        with metrics.activate(run_metrics), run_metrics.span('pipeline.total'):
+            result = _run_pipeline(mood_prompt, thoughts_file, api, prefetch)
+    finally:
+        if METRICS_EXPORT_FILE:
+            metrics.export_run(run_metrics.to_dict(), METRICS_EXPORT_FILE)
+    result['metrics'] = run_metrics.to_dict()
+    if HISTORY_ENABLED:
+        result['history_id'] = record_run(result)
+    return result
+
+def _run_pipeline(mood_prompt, thoughts_file, api, prefetch=None):
+    """
+    The six pipeline stages; each runs inside a metrics span and within the job deadline
+    ([resilience] job_deadline_seconds), with its own stage budget capped by what is left.
+    """
+    deadline = Deadline(JOB_DEADLINE_SECONDS)
+    if prefetch is None or prefetch.get('mood_prompt') != mood_prompt:
+        prefetch = {}
+    output.say("[MoodyPlaylist] Step 1: Google search for mood/idea...")
+    search_context = _google_context(mood_prompt, deadline, prefetch.get('google_results'))
+
+    output.say("[MoodyPlaylist] Step 2: Select relevant thoughts...")
+    with metrics.span('stage.thoughts'):
+        pending_index = prefetch.get('thoughts', {}).get(os.path.abspath(thoughts_file)) if thoughts_file else None
+        if pending_index is not None:
+            # Let the background build finish rather than indexing the same file twice
+            wait([pending_index])
+        thoughts_context = _read_and_normalize_thoughts(thoughts_file, mood_prompt)
+    output.say("[MoodyPlaylist] Thoughts context: %s", output.preview(thoughts_context))
+
+    output.say("[MoodyPlaylist] Step 3: Build LLM context...")
+    with metrics.span('stage.context'):
+        llm_context = _build_llm_context(mood_prompt, search_context, thoughts_context)
+    output.say("[MoodyPlaylist] LLM context:\n%s", output.preview(llm_context))
+
+    api = api or get_api()
+    output.say("[MoodyPlaylist] Step 4+5: Generate playlist name and song search queries via LLM (mode: %s)...", AI_PLAYLIST_LLM_MODE)
+    llm_deadline = deadline.child(LLM_STAGE_SECONDS)
+    with metrics.span('stage.llm', mode=AI_PLAYLIST_LLM_MODE):
+        if AI_PLAYLIST_LLM_MODE == 'stream':
+            generated = _stream_name_and_queries(llm_context, _query_count(mood_prompt), api, llm_deadline)
+        else:
+            generated = _generate_name_and_queries(llm_context, _query_count(mood_prompt), llm_deadline)
+    playlist_name = generated['playlist_name']
+    song_queries = generated['song_queries']
+
+    output.say("[MoodyPlaylist] Step 6: Search Spotify for tracks and create playlist...")
+    user_id = api.user_id
+    # Searches still running when the resolve budget is spent are dropped; the playlist uses what was found
+    resolve_budget = deadline.budget(SPOTIFY_RESOLVE_SECONDS)
+    with metrics.span('stage.spotify_resolve'):
+        if 'search_futures' in generated:
+            output.say("[MoodyPlaylist] Collecting %d Spotify searches started during streaming...", len(song_queries))
+            search_results = api.collect_searches(generated['search_futures'], timeout=resolve_budget)
+        else:
+            output.say("[MoodyPlaylist] Searching Spotify for %d queries concurrently...", len(song_queries))
+            search_results = api.resolve_tracks(song_queries, limit=AI_PLAYLIST_SEARCH_CANDIDATES, timeout=resolve_budget)
+    found_tracks = _pick_tracks(song_queries, search_results)
+    with metrics.span('stage.mood_fit'):
+        found_tracks = _fit_to_mood(mood_prompt, found_tracks, api, deadline)
+
+    with metrics.span('stage.spotify_create'):
+        playlist = api.create_playlist(user_id, playlist_name, description=f"Moody playlist: {mood_prompt}")
+    output.say("[MoodyPlaylist] Created playlist '%s' (%s)", playlist.get('name', playlist_name), playlist['id'])
+    output.detail("[MoodyPlaylist] Playlist object: %s", playlist)
+    with metrics.span('stage.spotify_add'):
+        add_result = api.add_tracks_to_playlist(playlist['id'], found_tracks)
+    output.say("[MoodyPlaylist] Added tracks: %s (%s)", output.preview(found_tracks), add_result)
+
+    return _build_result(mood_prompt, thoughts_file, search_context, llm_context, generated, playlist, add_result, found_tracks)
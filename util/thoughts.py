@@ -0,0 +1,142 @@
+"""
+Thoughts Context Index
+----------------------
+Selects the passages of a thoughts file that are most relevant to a mood prompt, so the
+LLM context stays within a token budget however large the file grows.
+
+Each file is split into passages (markdown paragraphs, long ones cut into word windows)
+and indexed once for BM25 scoring; the index is rebuilt only when the file's mtime or
+size changes. Postings are kept as flat numpy arrays sorted by term, so scoring a prompt
+is a handful of array slices and one scatter-add instead of a Python loop per passage.
+"""
+
+import os
+import re
+import threading
+import numpy as np
+
+PASSAGE_WORDS = 80
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Unicode words, case-folded, as src/catalog.py tokenizes (non-English thoughts and prompts must match too)
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _tokenize(text):
+    return _TOKEN_RE.findall(text.casefold())
+
+
+def estimate_tokens(text):
+    """Rough LLM token count (~4 characters per token); good enough for budgeting."""
+    return (len(text) + 3) // 4
+
+
+def _split_passages(text, passage_words=PASSAGE_WORDS):
+    """Paragraphs with whitespace collapsed; paragraphs longer than passage_words are windowed."""
+    passages = []
+    for paragraph in re.split(r'\n\s*\n', text):
+        words = paragraph.split()
+        for start in range(0, len(words), passage_words):
+            passages.append(' '.join(words[start:start + passage_words]))
+    return passages
+
+
+class ThoughtsIndex:
+    """BM25 index over the passages of one thoughts file."""
+
+    def __init__(self, text, passage_words=PASSAGE_WORDS):
+        self.passages = _split_passages(text, passage_words)
+        self.token_counts = np.array([estimate_tokens(p) for p in self.passages], dtype=np.int64)
+        self.vocab = {}
+        doc_ids, term_ids = [], []
+        lengths = []
+        for doc_id, passage in enumerate(self.passages):
+            tokens = _tokenize(passage)
+            lengths.append(len(tokens))
+            for token in tokens:
+                term_ids.append(self.vocab.setdefault(token, len(self.vocab)))
+                doc_ids.append(doc_id)
+        self.doc_lengths = np.array(lengths, dtype=np.float64)
+        self.avg_length = float(self.doc_lengths.mean()) if lengths else 0.0
+        if self.avg_length <= 0:
+            self.avg_length = 1.0
+
+        # Collapse (term, doc) pairs into postings sorted by term: term t's postings are
+        # post_docs[offsets[t]:offsets[t + 1]] with frequencies post_tf[offsets[t]:offsets[t + 1]]
+        n_docs = max(len(self.passages), 1)
+        pairs = np.array(term_ids, dtype=np.int64) * n_docs + np.array(doc_ids, dtype=np.int64)
+        unique_pairs, tf = np.unique(pairs, return_counts=True)
+        self.post_terms = unique_pairs // n_docs
+        self.post_docs = unique_pairs % n_docs
+        self.post_tf = tf.astype(np.float64)
+        self.offsets = np.searchsorted(self.post_terms, np.arange(len(self.vocab) + 1))
+        df = np.diff(self.offsets).astype(np.float64)
+        self.idf = np.log1p((len(self.passages) - df + 0.5) / (df + 0.5))
+
+    def __len__(self):
+        return len(self.passages)
+
+    def scores(self, query):
+        """BM25 score of every passage for the query text."""
+        scores = np.zeros(len(self.passages), dtype=np.float64)
+        term_ids = {self.vocab[t] for t in _tokenize(query) if t in self.vocab}
+        for term_id in term_ids:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.post_docs[start:end]
+            tf = self.post_tf[start:end]
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[docs] / self.avg_length)
+            np.add.at(scores, docs, self.idf[term_id] * tf * (BM25_K1 + 1) / (tf + norm))
+        return scores
+
+    def select(self, query, token_budget):
+        """
+        Best-scoring passages that fit token_budget, returned in document order.
+        When nothing matches the query, the opening passages are used instead.
+        """
+        if not self.passages:
+            return ''
+        if token_budget <= 0 or int(self.token_counts.sum()) <= token_budget:
+            return ' '.join(self.passages)
+        scores = self.scores(query)
+        if scores.any():
+            # Highest score first; ties keep document order
+            order = np.lexsort((np.arange(len(scores)), -scores))
+            order = order[scores[order] > 0]
+        else:
+            order = np.arange(len(scores))
+        chosen = []
+        used = 0
+        for doc_id in order:
+            cost = int(self.token_counts[doc_id])
+            if used + cost > token_budget:
+                continue
+            chosen.append(doc_id)
+            used += cost
+        return ' '.join(self.passages[i] for i in sorted(chosen))
+
+
+_indexes = {}  # path -> (mtime_ns, size, ThoughtsIndex)
+_indexes_lock = threading.Lock()
+
+
+def get_index(path):
+    """ThoughtsIndex for path, rebuilt only when the file's mtime or size changed."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    with _indexes_lock:
+        cached = _indexes.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+    with open(path, 'r', encoding='utf-8') as f:
+        index = ThoughtsIndex(f.read())
+    with _indexes_lock:
+        _indexes[path] = (stat.st_mtime_ns, stat.st_size, index)
+    return index
+
+
+def select_context(path, query, token_budget):
+    """Relevant passages of the thoughts file at path for query, within token_budget tokens."""
+    if not path:
+        return ''
+    return get_index(path).select(query, token_budget)
@@ -0,0 +1,90 @@
+"""
+Track Match Scoring
+-------------------
+Picks the best Spotify search candidate for an LLM song query instead of blindly taking
+the first hit (often a karaoke, cover or tribute version).
+
+All candidates of a query are scored together: titles, artists and the query are turned
+into hashed character-trigram count vectors, and one matrix pass gives title and artist
+containment in the query, overall cosine similarity, a popularity prior and a penalty for
+version markers the query did not ask for.
+"""
+
+import unicodedata
+import zlib
+import numpy as np
+from src.catalog import tokenize
+
+DIM = 4096
+
+WEIGHT_TITLE = 0.45
+WEIGHT_ARTIST = 0.30
+WEIGHT_COSINE = 0.15
+WEIGHT_POPULARITY = 0.10
+VERSION_PENALTY = 0.5
+
+# Title markers of versions that are rarely what the query means, unless it says so
+VERSION_MARKERS = (
+    'karaoke', 'cover', 'tribute', 'instrumental', 'made famous', 'originally performed',
+    'in the style of', 'lullaby', '8-bit', 'backing track', 'remake', 'sped up', 'slowed',
+)
+
+def _normalize(text):
+    """Catalog tokens (Unicode words, case-folded) with accents folded, so 'Beyonce' still matches 'Beyoncé'."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ' '.join(tokenize(''.join(c for c in decomposed if not unicodedata.combining(c))))
+
+
+def _trigram_vectors(texts):
+    """Hashed character-trigram counts, one row per text."""
+    matrix = np.zeros((len(texts), DIM), dtype=np.float64)
+    for row, text in enumerate(texts):
+        padded = f" {text} "
+        if len(padded) < 3:
+            continue
+        ids = [zlib.crc32(padded[i:i + 3].encode('utf-8')) % DIM for i in range(len(padded) - 2)]
+        matrix[row] = np.bincount(ids, minlength=DIM)
+    return matrix
+
+
+def _containment(parts, query):
+    """Share of each row's trigrams that also occur in the query vector."""
+    totals = parts.sum(axis=1)
+    overlap = np.minimum(parts, query).sum(axis=1)
+    return np.divide(overlap, totals, out=np.zeros_like(totals), where=totals > 0)
+
+
+def score_tracks(query, tracks):
+    """Match score for every track (Spotify track objects) against the query; higher is better."""
+    if not tracks:
+        return np.zeros(0)
+    query_text = _normalize(query)
+    titles = [_normalize(t.get('name', '')) for t in tracks]
+    artists = [_normalize(' '.join(a.get('name', '') for a in t.get('artists', []))) for t in tracks]
+    vectors = _trigram_vectors([query_text] + titles + artists)
+    q = vectors[0]
+    title_vecs = vectors[1:len(tracks) + 1]
+    artist_vecs = vectors[len(tracks) + 1:]
+
+    title_score = _containment(title_vecs, q)
+    artist_score = _containment(artist_vecs, q)
+    combined = title_vecs + artist_vecs
+    norms = np.linalg.norm(combined, axis=1) * np.linalg.norm(q)
+    cosine = np.divide(combined @ q, norms, out=np.zeros(len(tracks)), where=norms > 0)
+    popularity = np.array([t.get('popularity') or 0 for t in tracks], dtype=np.float64) / 100.0
+
+    raw_titles = [t.get('name', '').casefold() for t in tracks]
+    unwanted = [m for m in VERSION_MARKERS if m not in query.casefold()]
+    penalty = np.array([any(m in title for m in unwanted) for title in raw_titles], dtype=np.float64)
+
+    return (WEIGHT_TITLE * title_score + WEIGHT_ARTIST * artist_score + WEIGHT_COSINE * cosine
+            + WEIGHT_POPULARITY * popularity - VERSION_PENALTY * penalty)
+
+
+def best_track(query, tracks):
+    """The best-scoring track for the query, or None when there are no candidates."""
+    if not tracks:
+        return None
+    if len(tracks) == 1:
+        return tracks[0]
+    return tracks[int(np.argmax(score_tracks(query, tracks)))]